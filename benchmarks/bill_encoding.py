@@ -0,0 +1,225 @@
+"""
+Bill storage before and after the compact encoding (bill_rows).
+
+Builds a bills table in the legacy layout (REAL money, TEXT CIDs and
+billing types) carrying the index set of the time, then lets the app's own
+init_db migrate it:
+
+    python benchmarks/bill_encoding.py --bills 500000
+
+Reports, before and after (both VACUUMed):
+  size       - database file size, and the pages of the bills data and its
+               indexes from dbstat (after: bill_rows, its dictionaries and
+               indexes)
+  aggregates - best-of-N timings of the revenue sums the pages run: on the
+               legacy table, on bill_rows in integer paise, and through the
+               `bills` compatibility view
+Verifies the migration row by row against a copy of the legacy table:
+same ids, CIDs, types, details, timestamps and hoods, and money equal to
+the legacy value rounded to the paisa. Also shows how far the legacy REAL
+SUM is from the exact paise total. Exits non-zero on any mismatch.
+"""
+import argparse
+import logging
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TYPES = ["REPAIR", "CUSTOMIZATION", "UPGRADES", "ITEMS", "MEMBERSHIP"]
+RATES = [0.10, 0.15, 0.18, 0.20, 0.25]
+FMT = "%Y-%m-%d %H:%M:%S"
+# the bills indexes before the encoding (db.INDEXES at the time)
+LEGACY_INDEXES = {
+    "idx_bills_ts": "bills(timestamp)",
+    "idx_bills_emp_ts": "bills(employee_cid, timestamp, total_amount)",
+    "idx_bills_emp_type": "bills(employee_cid, billing_type)",
+    "idx_bills_cust_ts": "bills(customer_cid, timestamp)",
+    "idx_bills_hood_ts": "bills(hood, timestamp, total_amount)",
+}
+BILL_OBJECTS = ("bills", "bill_rows", "cid_keys", "billing_types")
+
+# label -> (legacy / view SQL, bill_rows SQL); `?` is the week start or one employee CID
+AGGREGATES = {
+    "all-time totals": (
+        "SELECT SUM(total_amount), SUM(commission), SUM(tax) FROM bills",
+        "SELECT SUM(amount_paise), SUM(commission_paise), SUM(tax_paise) FROM bill_rows"),
+    "revenue per employee": (
+        "SELECT employee_cid, SUM(total_amount) FROM bills GROUP BY employee_cid",
+        "SELECT k.cid, SUM(b.amount_paise) FROM bill_rows b LEFT JOIN cid_keys k ON k.id = b.employee_key "
+        "GROUP BY b.employee_key"),
+    "revenue per type": (
+        "SELECT billing_type, COUNT(*), SUM(total_amount) FROM bills GROUP BY billing_type",
+        "SELECT t.name, COUNT(*), SUM(b.amount_paise) FROM bill_rows b "
+        "LEFT JOIN billing_types t ON t.code = b.type_code GROUP BY b.type_code"),
+    "hood war, last 7 days": (
+        "SELECT hood, SUM(total_amount) FROM bills WHERE timestamp >= ? GROUP BY hood",
+        "SELECT hood, SUM(amount_paise) FROM bill_rows WHERE timestamp >= ? GROUP BY hood"),
+    "one employee's sales": (
+        "SELECT SUM(total_amount) FROM bills WHERE employee_cid = ?",
+        "SELECT SUM(amount_paise) FROM bill_rows WHERE employee_key = (SELECT id FROM cid_keys WHERE cid = ?)"),
+}
+
+
+def build_legacy(path, bills, employees, customers, now):
+    """A legacy-layout bills table, filled the way save_bill used to (unrounded commission and tax)."""
+    rnd = random.Random(11)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+      CREATE TABLE bills (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_cid TEXT,
+        customer_cid TEXT,
+        billing_type TEXT,
+        details TEXT,
+        total_amount REAL,
+        timestamp TEXT,
+        commission REAL DEFAULT 0,
+        tax REAL DEFAULT 0,
+        hood TEXT
+      )
+    """)
+    rates = {f"EMP{e:05d}": rnd.choice(RATES) for e in range(employees)}
+
+    def row():
+        emp = f"EMP{rnd.randrange(employees):05d}"
+        btype = rnd.choice(TYPES)
+        amount = rnd.randint(10000, 2000000) / 100
+        commission = 0.0 if btype in ("UPGRADES", "MEMBERSHIP") else amount * rates[emp]
+        ts = (now - timedelta(seconds=rnd.randint(0, 365 * 86400))).strftime(FMT)
+        return (emp, f"CUS{rnd.randrange(customers):06d}", btype, "Repair Kit×1", amount, ts,
+                commission, commission * 0.05, f"Hood{int(emp[3:]) % 8}")
+
+    conn.executemany(
+        "INSERT INTO bills (employee_cid, customer_cid, billing_type, details, total_amount, timestamp, "
+        "commission, tax, hood) VALUES (?,?,?,?,?,?,?,?,?)", (row() for _ in range(bills)))
+    for name, definition in LEGACY_INDEXES.items():
+        conn.execute(f"CREATE INDEX {name} ON {definition}")
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def sizes(conn):
+    """(bytes of the bills data, bytes of its indexes) from dbstat."""
+    owner = dict(conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table', 'index')"))
+    data = index = 0
+    for name, pages in conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"):
+        if owner.get(name) not in BILL_OBJECTS:
+            continue
+        if name in BILL_OBJECTS:
+            data += pages
+        else:
+            index += pages
+    return data, index
+
+
+def timed(conn, sql, params, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def verify(conn):
+    """Rows of bill_rows (and the view) that differ from the legacy copy attached as `legacy`."""
+    missing = conn.execute("""
+        SELECT (SELECT COUNT(*) FROM legacy.bills) - (SELECT COUNT(*) FROM bill_rows),
+               (SELECT COUNT(*) FROM legacy.bills l WHERE NOT EXISTS (SELECT 1 FROM bill_rows b WHERE b.id = l.id))
+    """).fetchone()
+    raw = conn.execute("""
+        SELECT COUNT(*) FROM legacy.bills l JOIN bill_rows b ON b.id = l.id
+        WHERE b.employee_key IS NOT (SELECT id FROM cid_keys WHERE cid = l.employee_cid)
+           OR b.customer_key IS NOT (SELECT id FROM cid_keys WHERE cid = l.customer_cid)
+           OR b.type_code IS NOT (SELECT code FROM billing_types WHERE name = l.billing_type)
+           OR b.details IS NOT l.details OR b.timestamp IS NOT l.timestamp OR b.hood IS NOT l.hood
+           OR b.amount_paise IS NOT CAST(round(l.total_amount * 100) AS INTEGER)
+           OR b.commission_paise IS NOT CAST(round(l.commission * 100) AS INTEGER)
+           OR b.tax_paise IS NOT CAST(round(l.tax * 100) AS INTEGER)
+    """).fetchone()[0]
+    view = conn.execute("""
+        SELECT COUNT(*) FROM legacy.bills l JOIN bills v ON v.id = l.id
+        WHERE v.employee_cid IS NOT l.employee_cid OR v.customer_cid IS NOT l.customer_cid
+           OR v.billing_type IS NOT l.billing_type OR v.details IS NOT l.details
+           OR v.timestamp IS NOT l.timestamp OR v.hood IS NOT l.hood
+           OR abs(v.total_amount - l.total_amount) > 0.005 + 1e-9
+           OR abs(v.commission - l.commission) > 0.005 + 1e-9 OR abs(v.tax - l.tax) > 0.005 + 1e-9
+    """).fetchone()[0]
+    return {"row count difference": missing[0], "ids missing": missing[1],
+            "bill_rows mismatches": raw, "view mismatches": view}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--bills", type=int, default=500000)
+    ap.add_argument("--employees", type=int, default=80)
+    ap.add_argument("--customers", type=int, default=50000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the app's DB paths are relative
+        from exoticbill.config import DB_PATH, IST
+        from exoticbill.core.db import get_conn, init_db
+
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+        now = datetime.now(IST)
+        week = (now - timedelta(days=7)).strftime(FMT)
+        build_legacy("legacy.db", args.bills, args.employees, args.customers, now)
+        shutil.copy("legacy.db", DB_PATH)
+
+        conn = sqlite3.connect("legacy.db")
+        before_file = os.path.getsize("legacy.db")
+        before = sizes(conn)
+        one = conn.execute("SELECT employee_cid FROM bills LIMIT 1").fetchone()[0]
+        params = {label: ((week,) if "?" in sql and "timestamp" in sql else (one,) if "?" in sql else ())
+                  for label, (sql, _) in AGGREGATES.items()}
+        legacy_ms = {label: timed(conn, sql, params[label], args.repeat) for label, (sql, _) in AGGREGATES.items()}
+        legacy_sum = conn.execute("SELECT SUM(total_amount) FROM bills").fetchone()[0]
+        conn.close()
+
+        t0 = time.perf_counter()
+        init_db()
+        migrate_s = time.perf_counter() - t0
+        conn = get_conn()
+        conn.execute("VACUUM")
+        conn.execute("ANALYZE")
+        after_file = os.path.getsize(DB_PATH)
+        after = sizes(conn)
+        paise_ms = {label: timed(conn, sql, params[label], args.repeat) for label, (_, sql) in AGGREGATES.items()}
+        view_ms = {label: timed(conn, sql, params[label], args.repeat) for label, (sql, _) in AGGREGATES.items()}
+        exact = conn.execute("SELECT SUM(amount_paise) FROM bill_rows").fetchone()[0]
+        conn.execute("ATTACH DATABASE 'legacy.db' AS legacy")
+        problems = verify(conn)
+        conn.close()
+        os.chdir("/")
+
+    mb = 1024 * 1024
+    print(f"{args.bills:,} bills, {args.employees} employees, {args.customers:,} customers; "
+          f"migration (init_db) took {migrate_s:.1f} s\n")
+    print(f"{'':28s}{'legacy':>12s}{'encoded':>12s}{'change':>9s}")
+    for label, old, new in (("database file", before_file, after_file),
+                            ("bills data (dbstat)", before[0], after[0]),
+                            ("bills indexes (dbstat)", before[1], after[1])):
+        print(f"{label:28s}{old / mb:9.1f} MB{new / mb:9.1f} MB{(new - old) / old * 100:+8.0f}%")
+    print(f"\n{'aggregate (best of ' + str(args.repeat) + ')':28s}{'legacy':>12s}{'paise':>12s}{'via view':>12s}")
+    for label in AGGREGATES:
+        print(f"{label:28s}{legacy_ms[label]:9.1f} ms{paise_ms[label]:9.1f} ms{view_ms[label]:9.1f} ms")
+    print(f"\nSUM(total_amount) in REAL: {legacy_sum:,.6f}; exact paise total: {exact // 100:,}.{exact % 100:02d} "
+          f"(REAL is off by {legacy_sum - exact / 100:+.6f})")
+    failed = any(problems.values())
+    print("verification: " + ("OK" if not failed else ", ".join(f"{k}={v}" for k, v in problems.items() if v)))
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
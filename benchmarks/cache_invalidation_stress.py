@@ -0,0 +1,135 @@
+"""
+Cross-process staleness check for exoticbill.core.cache.TableCache.
+
+Runs against a scratch database created by the app's own init_db:
+
+    python benchmarks/cache_invalidation_stress.py --readers 6 --seconds 5
+
+Processes, all on the same DB file:
+  items writer   - bumps one item's price in its own transaction, then
+                   publishes the committed price to shared memory
+  noise writer   - keeps rewriting employees (other table, same DB), so
+                   PRAGMA data_version changes constantly
+  readers        - each with its own cache, look the price up in a loop;
+                   a read is stale if it is lower than the price published
+                   before the lookup started
+Mode "naive" (a plain dict, no invalidation) shows what the readers would see
+without generations. Exits non-zero if the table cache serves a stale read.
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def load_price(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT price FROM items WHERE name = 'Harness'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def items_writer(path, published, stop):
+    conn = sqlite3.connect(path, timeout=30)
+    while not stop.is_set():
+        with conn:
+            price = conn.execute(
+                "UPDATE items SET price = price + 1 WHERE name = 'Harness' RETURNING price"
+            ).fetchone()[0]
+        with published.get_lock():
+            published.value = max(published.value, price)
+        time.sleep(0.005)
+    conn.close()
+
+
+def noise_writer(path, stop):
+    conn = sqlite3.connect(path, timeout=30)
+    n = 0
+    while not stop.is_set():
+        n += 1
+        with conn:
+            conn.execute("UPDATE employees SET name = ? WHERE cid = 'E1'", (f"Noise {n}",))
+        time.sleep(0.001)
+    conn.close()
+
+
+def reader(path, mode, published, stop, out):
+    from exoticbill.core.cache import TableCache
+    cache = TableCache(path)
+    naive = {}
+    lookups = stale = 0
+    spent = 0.0
+    while not stop.is_set():
+        floor = published.value
+        t0 = time.perf_counter()
+        if mode == "table":
+            price = cache.get(("price",), ("items",), lambda: load_price(path))
+        else:
+            if "price" not in naive:
+                naive["price"] = load_price(path)
+            price = naive["price"]
+        spent += time.perf_counter() - t0
+        lookups += 1
+        stale += price < floor
+    out.put((lookups, stale, cache.hits, cache.misses, spent))
+
+
+def run(mode, readers, seconds, path):
+    published, stop, out = mp.Value("d", 0.0), mp.Event(), mp.Queue()
+    procs = [mp.Process(target=items_writer, args=(path, published, stop)),
+             mp.Process(target=noise_writer, args=(path, stop))]
+    procs += [mp.Process(target=reader, args=(path, mode, published, stop, out)) for _ in range(readers)]
+    for p in procs:
+        p.start()
+    time.sleep(seconds)
+    stop.set()
+    results = [out.get() for _ in range(readers)]
+    for p in procs:
+        p.join()
+    lookups = sum(r[0] for r in results)
+    stale = sum(r[1] for r in results)
+    hits, misses = sum(r[2] for r in results), sum(r[3] for r in results)
+    us = sum(r[4] for r in results) / lookups * 1e6
+    extra = f" hits={hits} misses={misses} hit_rate={hits / max(1, hits + misses):.1%}" if mode == "table" else ""
+    print(f"{mode:6s} readers={readers} lookups={lookups} stale_reads={stale}{extra} avg_lookup={us:.1f}us")
+    return stale
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--readers", type=int, default=6)
+    ap.add_argument("--seconds", type=float, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the app's DB paths are relative
+        from exoticbill.core.db import init_db
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+        init_db()
+        path = os.path.join(tmp, "auto_exotic_billing.db")
+        conn = sqlite3.connect(path)
+        conn.execute("INSERT INTO items (name, price, stock) VALUES ('Harness', 12000, 5)")
+        conn.execute("INSERT INTO employees (cid, name) VALUES ('E1', 'Noise')")
+        conn.commit()
+        conn.close()
+
+        t0 = time.perf_counter()
+        for _ in range(2000):
+            load_price(path)
+        print(f"uncached lookup (connect + SELECT): {(time.perf_counter() - t0) / 2000 * 1e6:.1f}us")
+
+        run("naive", args.readers, args.seconds, path)
+        stale = run("table", args.readers, args.seconds, path)
+        os.chdir("/")
+    raise SystemExit(1 if stale else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Cold-start and rerun cost of the Streamlit app, per page.
+
+Needs streamlit installed. Every scenario runs in a fresh interpreter so the
+first run pays all module imports, exactly like the first visitor after a
+server start; later runs show the steady per-rerun cost:
+
+    python benchmarks/cold_start.py                   # this checkout's app.py
+    python benchmarks/cold_start.py --app /tmp/old/app.py --reruns 10
+
+All scenarios share one scratch working directory, so the database is
+created once (by a warm-up run) and not counted. "pandas" says whether pandas
+was imported by the end of the first run; on admin pages the background
+Parquet exporter thread may import it too.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = [
+    ("login", None, None),
+    ("user panel", "user", None),
+    ("admin: Sales", "admin", "Sales"),
+    ("admin: Tracking", "admin", "Tracking"),
+    ("admin: Bill Logs", "admin", "Bill Logs"),
+    ("admin: Payroll", "admin", "Payroll"),
+    ("admin: Performance", "admin", "Performance"),
+]
+
+CHILD = r"""
+import json, sys, time
+app, role, menu, reruns = sys.argv[1], sys.argv[2] or None, sys.argv[3] or None, int(sys.argv[4])
+sys.path.insert(0, __import__("os").path.dirname(app))  # as `streamlit run` does
+from streamlit.testing.v1 import AppTest
+before = set(sys.modules)
+
+def make():
+    at = AppTest.from_file(app, default_timeout=120)
+    if role:
+        at.session_state["logged_in"] = True
+        at.session_state["role"] = role
+        at.session_state["username"] = "owner" if role == "admin" else "emp"
+    return at
+
+t0 = time.perf_counter()
+at = make()
+at.run()
+if menu and at.sidebar.selectbox and at.sidebar.selectbox[0].value != menu:
+    at.sidebar.selectbox[0].select(menu).run()
+first = (time.perf_counter() - t0) * 1000
+errors = [e.value for e in at.exception]
+loaded = set(sys.modules) - before
+rerun = []
+for _ in range(reruns):
+    t0 = time.perf_counter()
+    at.run()
+    rerun.append((time.perf_counter() - t0) * 1000)
+print(json.dumps({"first_ms": first, "rerun_ms": rerun, "modules": len(loaded),
+                  "pandas": "pandas" in sys.modules, "errors": errors}))
+"""
+
+
+def run_child(app, role, menu, reruns, cwd):
+    out = subprocess.run([sys.executable, "-c", CHILD, app, role or "", menu or "", str(reruns)],
+                         cwd=cwd, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--app", default=os.path.join(HERE, "..", "app.py"))
+    ap.add_argument("--reruns", type=int, default=5)
+    args = ap.parse_args()
+    app = os.path.abspath(args.app)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run_child(app, "admin", "Sales", 0, tmp)  # creates the database
+        print(f"{'scenario':20s} {'cold ms':>9s} {'rerun p50':>10s} {'modules':>8s}  pandas")
+        for name, role, menu in SCENARIOS:
+            r = run_child(app, role, menu, args.reruns, tmp)
+            p50 = statistics.median(r["rerun_ms"]) if r["rerun_ms"] else float("nan")
+            flag = "yes" if r["pandas"] else "no"
+            err = f"  ERROR {r['errors']}" if r["errors"] else ""
+            print(f"{name:20s} {r['first_ms']:9.0f} {p50:10.1f} {r['modules']:8d}  {flag}{err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Consistency checker: drift detection, repair, incremental re-runs and writer latency.
+
+Runs against a scratch database created by the app's own init_db:
+
+    python benchmarks/consistency_check.py --customers 50000 --bills 300000
+
+Seeds bills (part of them tiered into the archive), shifts, loyalty, items
+and memberships with every derived value correct. It then:
+  clean      - full pass; must find no drift
+  inject     - writes drift straight into loyalty, customers, shifts,
+               items and memberships, bypassing the app
+  detect     - an incremental run sees only the feed-visible part; a full
+               pass must report exactly the injected keys
+  repair     - an incremental repair run fixes them via the open drift on
+               record; a full pass afterwards must be clean
+  resume     - a full pass interrupted after a few chunks resumes from its
+               checkpoint instead of starting over
+  writers    - save_bill / loyalty / stock / membership writes with and
+               without a full repair pass running beside them; save_bill
+               latency is printed. The incremental run afterwards must
+               check only the keys those writes touched, and find no drift.
+Exits non-zero on any failed expectation.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TYPES = ["REPAIR", "CUSTOMIZATION", "UPGRADES", "ITEMS"]
+FMT = "%Y-%m-%d %H:%M:%S"
+
+
+class Interrupted(Exception):
+    pass
+
+
+def seed(conn, customers, bills, now):
+    rnd = random.Random(9)
+    conn.executemany("INSERT INTO employees (cid, name, rank, hood) VALUES (?,?,?,?)",
+                     [(f"E{i}", f"Emp {i}", "Mechanic", "No Hood") for i in range(40)])
+    rows = []
+    for _ in range(bills):
+        amount = float(rnd.randint(100, 20000))
+        rows.append((f"E{rnd.randrange(40)}", f"C{rnd.randrange(customers)}", rnd.choice(TYPES), "bench", amount,
+                     (now - timedelta(seconds=rnd.randint(7200, 60 * 86400))).strftime(FMT), amount * 0.1, 0.0))
+    conn.executemany(
+        "INSERT INTO bills (employee_cid, customer_cid, billing_type, details, total_amount, timestamp, "
+        "commission, tax, hood) VALUES (?,?,?,?,?,?,?,?,'No Hood')", rows)
+    conn.executemany(
+        "INSERT INTO loyalty_ledger (customer_cid, ts, kind, points) VALUES (?, ?, 'earn', ?)",
+        ((f"C{rnd.randrange(customers)}", (now - timedelta(days=rnd.randint(1, 60))).strftime(FMT),
+          rnd.randint(1, 200)) for _ in range(customers * 2)))
+    conn.execute("""
+        INSERT INTO loyalty (customer_cid, points, last_activity)
+        SELECT customer_cid, SUM(points), MAX(ts) FROM loyalty_ledger GROUP BY customer_cid
+    """)
+    # closed 8h shifts back to back per employee; the first 10 employees are on shift now
+    conn.executemany(
+        "INSERT INTO shifts (employee_cid, start_ts, end_ts, duration_minutes) VALUES (?,?,?,480)",
+        ((f"E{e}", (now - timedelta(hours=8 * i + 8)).strftime(FMT), (now - timedelta(hours=8 * i)).strftime(FMT))
+         for e in range(40) for i in range(1, 180)))
+    conn.executemany("INSERT INTO shifts (employee_cid, start_ts) VALUES (?, ?)",
+                     [(f"E{e}", (now - timedelta(hours=1)).strftime(FMT)) for e in range(10)])
+    conn.execute("""
+        UPDATE shifts SET
+          bills_count = (SELECT COUNT(*) FROM bills b WHERE b.employee_cid = shifts.employee_cid
+                         AND b.timestamp >= shifts.start_ts AND (shifts.end_ts IS NULL OR b.timestamp <= shifts.end_ts)),
+          revenue = (SELECT COALESCE(SUM(total_amount), 0) FROM bills b WHERE b.employee_cid = shifts.employee_cid
+                     AND b.timestamp >= shifts.start_ts AND (shifts.end_ts IS NULL OR b.timestamp <= shifts.end_ts)),
+          commission = (SELECT COALESCE(SUM(commission), 0) FROM bills b WHERE b.employee_cid = shifts.employee_cid
+                        AND b.timestamp >= shifts.start_ts AND (shifts.end_ts IS NULL OR b.timestamp <= shifts.end_ts))
+    """)
+    conn.executemany("INSERT INTO inventory_movements (item, ts, kind, delta) VALUES (?, ?, ?, ?)",
+                     [(f"Item{i}", now.strftime(FMT), "opening", 1000) for i in range(200)]
+                     + [(f"Item{rnd.randrange(200)}", now.strftime(FMT), "sale", -rnd.randint(1, 3))
+                        for _ in range(20000)])
+    conn.execute("""
+        INSERT INTO items (name, price, stock)
+        SELECT item, 100, SUM(delta) FROM inventory_movements GROUP BY item
+    """)
+    conn.executemany("INSERT INTO memberships (customer_cid, tier, dop) VALUES (?, 'Tier1', ?)",
+                     [(f"C{i}", (now - timedelta(days=rnd.randint(0, 5))).strftime(FMT))
+                      for i in range(0, customers, 20)])
+    conn.executemany("INSERT INTO membership_history (customer_cid, tier, dop, expired_at) VALUES (?,?,?,?)",
+                     [(f"C{i}", "Tier2", "2025-01-01 10:00:00", "2025-01-08 10:00:00") for i in range(0, customers, 7)])
+    conn.commit()
+
+
+def inject(conn, rnd, now, n):
+    """Drift written around the app; returns {check: {keys}} the checker must report."""
+    expected = {}
+
+    def pick(sql):
+        return [r[0] for r in conn.execute(sql + " ORDER BY random() LIMIT ?", (n,))]
+
+    expected["loyalty"] = set(pick("SELECT customer_cid FROM loyalty"))
+    conn.executemany("UPDATE loyalty SET points = points + 5 WHERE customer_cid = ?",
+                     [(k,) for k in expected["loyalty"]])
+    expected["customers"] = set(pick("SELECT customer_cid FROM customers"))
+    conn.executemany("UPDATE customers SET bill_count = bill_count + 1 WHERE customer_cid = ?",
+                     [(k,) for k in expected["customers"]])
+    expected["shifts"] = set(pick("SELECT id FROM shifts"))
+    conn.executemany("UPDATE shifts SET revenue = revenue + 10 WHERE id = ?", [(k,) for k in expected["shifts"]])
+    expected["inventory"] = set(pick("SELECT name FROM items"))
+    conn.executemany("UPDATE items SET stock = stock - 1 WHERE name = ?", [(k,) for k in expected["inventory"]])
+    # expired but never purged, and purged into history but never deleted
+    stale = (now - timedelta(days=10)).strftime(FMT)
+    conn.executemany("INSERT INTO memberships (customer_cid, tier, dop) VALUES (?, 'Tier1', ?)",
+                     [(f"X{i}", stale) for i in range(n)])
+    conn.executemany("INSERT INTO customers (customer_cid, membership_tier) VALUES (?, 'Tier1')",
+                     [(f"X{i}",) for i in range(n)])
+    dup = pick("SELECT customer_cid FROM memberships WHERE customer_cid LIKE 'C%'")
+    conn.execute("""
+        INSERT INTO membership_history (customer_cid, tier, dop, expired_at)
+        SELECT customer_cid, tier, dop, datetime(dop, '+7 days') FROM memberships
+        WHERE customer_cid IN (SELECT value FROM json_each(?))
+    """, (json.dumps(dup),))
+    expected["memberships"] = {f"X{i}" for i in range(n)} | set(dup)
+    conn.commit()
+    return expected
+
+
+def reported(conn):
+    found = {}
+    for check, key in conn.execute("SELECT DISTINCT check_name, row_key FROM consistency_drift "
+                                   "WHERE repaired_at IS NULL"):
+        found.setdefault(check, set()).add(key)
+    return found
+
+
+def summary(label, results):
+    for r in results:
+        print(f"  {label:12s} {r['check']:12s} {r['mode']:12s} checked={r['checked']:7,d} "
+              f"drift={r['drift']:5d} repaired={r['repaired']:5d} {r['ms']:9.1f} ms  "
+              f"slowest step={r['max_step_ms']:6.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--customers", type=int, default=50000)
+    ap.add_argument("--bills", type=int, default=300000)
+    ap.add_argument("--drift", type=int, default=25, help="keys drifted per table")
+    ap.add_argument("--writes", type=int, default=300, help="save_bill calls per latency run")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the app's DB paths are relative
+        from exoticbill.config import IST
+        from exoticbill.core.bills import save_bill
+        from exoticbill.core.consistency import run_check, run_consistency
+        from exoticbill.core.customers import rebuild_customers
+        from exoticbill.core.db import get_conn, init_db
+        from exoticbill.core.items import update_item_stock
+        from exoticbill.core.loyalty import add_loyalty_points
+        from exoticbill.core.memberships import add_membership
+        from exoticbill.core.tiering import tier_old_bills
+
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+        errors = []
+        init_db()
+        now = datetime.now(IST)
+        conn = get_conn()
+        seed(conn, args.customers, args.bills, now)
+        conn.close()
+        tier_old_bills(days=30)
+        rebuild_customers()
+
+        results = run_consistency()
+        summary("clean", results)
+        if any(r["drift"] for r in results):
+            errors.append(f"clean data reported drift: {[(r['check'], r['drift']) for r in results]}")
+
+        conn = get_conn()
+        expected = inject(conn, random.Random(4), now, args.drift)
+        conn.close()
+        summary("incremental", run_consistency())
+        results = run_consistency(full=True)
+        summary("full", results)
+        conn = get_conn()
+        found = reported(conn)
+        conn.close()
+        for check, keys in expected.items():
+            keys = {str(k) for k in keys}
+            if found.get(check, set()) != keys:
+                errors.append(f"{check}: reported {len(found.get(check, ()))} key(s), injected {len(keys)} "
+                              f"(missed {sorted(keys - found.get(check, set()))[:3]}, "
+                              f"extra {sorted(found.get(check, set()) - keys)[:3]})")
+
+        results = run_consistency(repair=True)
+        summary("repair", results)
+        results = run_consistency(full=True)
+        summary("after repair", results)
+        if any(r["drift"] for r in results):
+            errors.append(f"drift left after repair: {[(r['check'], r['drift']) for r in results]}")
+
+        chunks = []
+
+        def stop_early(name, checked):
+            chunks.append(checked)
+            if len(chunks) == 3:
+                raise Interrupted
+
+        try:
+            run_check("customers", full=True, progress=stop_early)
+        except Interrupted:
+            pass
+        resumed = run_check("customers")
+        total = results[[r["check"] for r in results].index("customers")]["checked"]
+        print(f"  resume       customers interrupted after {chunks[-1]:,} keys, resumed {resumed['mode']} pass "
+              f"checked {resumed['checked']:,} of {total:,}")
+        if resumed["mode"] != "full" or resumed["checked"] != total - chunks[-1]:
+            errors.append(f"resume: {resumed}")
+
+        # app writes, alone and next to a full repair pass
+        rnd = random.Random(8)
+        touched = {"customers": set(), "loyalty": set(), "inventory": set(), "memberships": set()}
+
+        def writer(out):
+            for i in range(args.writes):
+                cust = f"C{rnd.randrange(args.customers)}"
+                t0 = time.perf_counter()
+                save_bill(f"E{rnd.randrange(10)}", cust, rnd.choice(TYPES), "bench", float(rnd.randint(100, 20000)))
+                out.append((time.perf_counter() - t0) * 1000)
+                touched["customers"].add(cust)
+                touched["loyalty"].add(cust)
+                if i % 10 == 0:
+                    item = f"Item{rnd.randrange(200)}"
+                    update_item_stock(item, 5, actor="bench")
+                    touched["inventory"].add(item)
+                    member = f"C{rnd.randrange(args.customers)}"
+                    add_membership(member, "Tier3")
+                    add_loyalty_points(member, 10, kind="adjust", actor="bench")
+                    touched["memberships"].add(member)
+                    touched["customers"].add(member)
+                    touched["loyalty"].add(member)
+
+        alone = []
+        writer(alone)
+        results = run_consistency()
+        summary("after writes", results)
+        beside = []
+        thread = threading.Thread(target=writer, args=(beside,))
+        thread.start()
+        t0 = time.perf_counter()
+        passes = 0
+        while thread.is_alive():
+            run_consistency(repair=True, full=True)
+            passes += 1
+        thread.join()
+        print(f"  full repair passes during writes: {passes} ({time.perf_counter() - t0:.1f} s)")
+        for label, samples in (("alone", alone), ("beside checker", beside)):
+            samples = sorted(samples)
+            print(f"  save_bill {label:15s} p50={statistics.median(samples):6.2f} ms  "
+                  f"p99={samples[int(len(samples) * 0.99) - 1]:7.2f} ms  max={samples[-1]:7.2f} ms")
+
+        results = {r["check"]: r for r in run_consistency()}
+        summary("incremental", results.values())
+        for check, keys in touched.items():
+            if results[check]["checked"] > len(keys):
+                errors.append(f"{check}: incremental run checked {results[check]['checked']} keys, "
+                              f"{len(keys)} touched")
+        if any(r["drift"] for r in results.values()):
+            errors.append(f"app writes caused drift: {[(r['check'], r['drift']) for r in results.values()]}")
+        results = run_consistency(full=True)
+        if any(r["drift"] for r in results):
+            errors.append(f"final full pass found drift: {[(r['check'], r['drift']) for r in results]}")
+
+        print(f"\nverification: {'OK' if not errors else ''}")
+        for e in errors:
+            print(f"  FAIL {e}")
+        os.chdir("/")
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
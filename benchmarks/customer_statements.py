@@ -0,0 +1,149 @@
+"""
+Monthly customer statements: per-customer lookups vs. the batch generator.
+
+Runs against a scratch database created by the app's own init_db:
+
+    python benchmarks/customer_statements.py --customers 100000 --bills 400000 --workers 4
+
+Seeds one month of bills, loyalty activity and memberships. It then:
+  baseline - times get_customer_bills for a sample of customers (the
+             UI's per-customer path) and extrapolates to all of them
+  batch    - runs generate_statements, interrupts it after a third of the
+             chunks, then resumes it from the checkpoint
+Verifies the result: the manifest holds exactly one record per active
+customer, in order. Every file exists and matches its size and sha256.
+Exits non-zero otherwise.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+MONTH = "2025-06"
+TYPES = ["REPAIR", "CUSTOMIZATION", "UPGRADES", "ITEMS", "MEMBERSHIP"]
+
+
+class Interrupted(Exception):
+    pass
+
+
+def seed(conn, customers, bills):
+    rnd = random.Random(5)
+    conn.executemany(
+        "INSERT INTO bills (employee_cid, customer_cid, billing_type, details, total_amount, timestamp, hood) "
+        "VALUES (?,?,?,?,?,?,?)",
+        ((f"E{rnd.randrange(40)}", f"C{rnd.randrange(customers)}", rnd.choice(TYPES), "Repair Kit×2",
+          float(rnd.randint(100, 20000)), f"{MONTH}-{rnd.randint(1, 30):02d} {rnd.randint(0, 23):02d}:00:00",
+          "No Hood") for _ in range(bills))
+    )
+    # a few customers only earn/redeem points or hold a membership (no bills)
+    conn.executemany(
+        "INSERT INTO loyalty_ledger (customer_cid, ts, kind, points) VALUES (?,?,?,?)",
+        ((f"L{i}", f"{MONTH}-15 12:00:00", "earn", 50) for i in range(customers // 50))
+    )
+    conn.executemany("INSERT OR REPLACE INTO loyalty (customer_cid, points) VALUES (?, ?)",
+                     ((f"C{i}", rnd.randint(0, 900)) for i in range(0, customers, 3)))
+    conn.executemany("INSERT OR REPLACE INTO memberships (customer_cid, tier, dop) VALUES (?,?,?)",
+                     ((f"M{i}", "Tier2", "2025-06-28 10:00:00") for i in range(customers // 100)))
+    conn.commit()
+
+
+def expected_customers(conn):
+    start, end = f"{MONTH}-01", "2025-07-01"
+    billed = {r[0] for r in conn.execute(
+        "SELECT DISTINCT customer_cid FROM bills WHERE timestamp >= ? AND timestamp < ?", (start, end))}
+    loyal = {r[0] for r in conn.execute(
+        "SELECT DISTINCT customer_cid FROM loyalty_ledger WHERE ts >= ? AND ts < ?", (start, end))}
+    members = {r[0] for r in conn.execute("SELECT customer_cid FROM memberships")}
+    return sorted(billed | loyal | members)
+
+
+def verify(out_dir, expected):
+    month_dir = os.path.join(out_dir, MONTH)
+    with open(os.path.join(month_dir, "manifest.jsonl"), encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    errors = []
+    if [r["customer_cid"] for r in records] != expected:
+        errors.append(f"manifest lists {len(records)} customers, expected {len(expected)} in order")
+    for r in records:
+        path = os.path.join(month_dir, r["file"])
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            errors.append(f"missing {r['file']}")
+            continue
+        if len(data) != r["bytes"] or hashlib.sha256(data).hexdigest() != r["sha256"]:
+            errors.append(f"checksum mismatch {r['file']}")
+    return errors
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--customers", type=int, default=100000)
+    ap.add_argument("--bills", type=int, default=400000)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--sample", type=int, default=300)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the app's DB paths are relative
+        from exoticbill.core.bills import get_customer_bills
+        from exoticbill.core.db import get_conn, init_db
+        from exoticbill.core.snapshot import refresh_snapshot
+        from exoticbill.core.statements import generate_statements
+
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+        init_db()
+        conn = get_conn()
+        seed(conn, args.customers, args.bills)
+        expected = expected_customers(conn)
+        conn.close()
+        refresh_snapshot()
+
+        sample = random.Random(1).sample(expected, min(args.sample, len(expected)))
+        t0 = time.perf_counter()
+        for cid in sample:
+            get_customer_bills(cid)
+        per = (time.perf_counter() - t0) / len(sample)
+        print(f"active customers: {len(expected):,}")
+        print(f"baseline get_customer_bills: {per * 1000:.2f} ms/customer -> "
+              f"{per * len(expected):,.0f} s for all (queries only, no rendering)")
+
+        chunks = []
+
+        def stop_early(ckpt):
+            chunks.append(ckpt)
+            if len(chunks) == max(1, len(expected) // 500 // 3):
+                raise Interrupted
+
+        t0 = time.perf_counter()
+        try:
+            generate_statements(MONTH, workers=args.workers, progress=stop_early)
+        except Interrupted:
+            pass
+        first = time.perf_counter() - t0
+        done_before = chunks[-1]["statements"]
+        t0 = time.perf_counter()
+        final = generate_statements(MONTH, workers=args.workers)
+        second = time.perf_counter() - t0
+        print(f"batch ({args.workers} workers): interrupted after {done_before:,} statements in {first:.1f} s, "
+              f"resumed and finished in {second:.1f} s -> {final['statements']:,} statements, "
+              f"{(first + second) / len(expected) * 1000:.2f} ms/customer")
+
+        errors = verify("statements", expected)
+        size = sum(os.path.getsize(os.path.join(root, n)) for root, _, names in os.walk("statements") for n in names)
+        print(f"output {size / 1e6:.1f} MB; verification: {'OK' if not errors else errors[:5]}")
+        os.chdir("/")
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Page queries vs. the index set, and what the indexes cost bill inserts.
+
+Runs against a scratch database created by the app's own init_db:
+
+    python benchmarks/index_plans.py --bills 100000 --inserts 5000
+
+Seeds every table the pages read, moves bills older than 30 days to the
+archive and restarts init_db so each index has planner stats. Then:
+  plans   - runs the page queries through the app's own functions (and the
+            Tracking page through AppTest for its inline queries). Checks
+            that each one's EXPLAIN QUERY PLAN, as recorded by QueryStats,
+            goes through the index listed for it in EXPECTED and does not
+            scan a table
+  inserts - times inserting bills into a seeded copy of the bills: in
+            the legacy layout (REAL money, TEXT keys) with no secondary index
+            and the old index set, and as encoded bill_rows with none, the
+            new set, and the new set minus each one of its indexes
+Exits non-zero if any page query misses its index.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TYPES = ["REPAIR", "CUSTOMIZATION", "UPGRADES", "ITEMS", "MEMBERSHIP"]
+FMT = "%Y-%m-%d %H:%M:%S"
+# the bills indexes init_db created before the index set was designed
+OLD_BILL_INDEXES = {
+    "idx_bills_ts": "bills(timestamp)",
+    "idx_bills_emp_ts": "bills(employee_cid, timestamp)",
+    "idx_bills_cust_ts": "bills(customer_cid, timestamp)",
+    "idx_bills_hood_ts": "bills(hood, timestamp, total_amount)",
+}
+# page query -> (a fragment of its SQL, indexes its plan must use)
+EXPECTED = {
+    "Tracking: employee summary": (
+        "FROM bill_rows_all LEFT JOIN billing_types t", ["idx_bills_emp_type", "idx_arch_bills_emp_"]),
+    "Tracking: rankings by type": (
+        "FROM bill_rows_all WHERE employee_key=? AND type_code=?", ["idx_bills_emp_type", "idx_arch_bills_emp_type"]),
+    "Tracking: custom filter": (
+        "FROM bill_rows WHERE employee_key=(SELECT id FROM cid_keys WHERE cid=?) AND timestamp>=?",
+        ["COVERING INDEX idx_bills_emp_ts"]),
+    "Tracking: employee bills page": (
+        "FROM bill_rows_all WHERE employee_key = ? ORDER BY timestamp DESC", ["idx_bills_emp_ts", "idx_arch_bills_emp_ts"]),
+    "Tracking: customer bills": (
+        "FROM bill_rows_all WHERE customer_key = ?", ["idx_bills_cust_ts", "idx_arch_bills_cust_ts"]),
+    "Tracking: past memberships": (
+        "FROM membership_history ORDER BY expired_at DESC", ["idx_membership_hist_exp"]),
+    "Tracking: past memberships of a customer": (
+        "FROM membership_history WHERE customer_cid = ?", ["idx_membership_hist_cust"]),
+    "Tracking: deleted bills": (
+        "FROM bills_deleted_all WHERE 1=1 ORDER BY deleted_at DESC", ["idx_bills_deleted_at"]),
+    "User panel: login lookup": ("SELECT cid FROM employees WHERE name = ?", ["idx_employees_name"]),
+    "User panel: open shift": ("FROM shifts WHERE employee_cid=? AND end_ts IS NULL", ["idx_shifts_one_open"]),
+    "Shifts: by employee": ("WHERE s.employee_cid = ? AND s.start_ts >= ?", ["idx_shifts_emp_start"]),
+    "Payroll: shifts": ("FROM shifts WHERE start_ts >= ? AND start_ts <= ?", ["idx_shifts_emp_start"]),
+    "Payroll: bills": ("FROM main.bill_rows INDEXED BY idx_bills_ts", ["COVERING INDEX idx_bills_ts"]),
+    "Payroll: bills, both tiers": ("FROM archive.bill_rows INDEXED BY idx_arch_bills_ts",
+                                   ["COVERING INDEX idx_bills_ts", "COVERING INDEX idx_arch_bills_ts"]),
+    "Live feed: open shifts": ("FROM shifts WHERE end_ts IS NULL", ["idx_shifts_one_open"]),
+    "Hood War": ("GROUP BY hood", ["COVERING INDEX idx_bills_hood_ts"]),
+    "Memberships: expiry": ("FROM memberships WHERE dop <= ?", ["idx_memberships_dop"]),
+    "Customers: list": ("FROM customers WHERE bill_count > 0", ["COVERING INDEX idx_customers_billed"]),
+    "Customers: recent": ("FROM customers WHERE last_seen IS NOT NULL", ["idx_customers_last_seen"]),
+    "Loyalty: top 100": ("FROM loyalty WHERE points > 0 ORDER BY points DESC", ["idx_loyalty_points"]),
+    "Loyalty: expiry": ("WHERE last_activity < ? AND points > 0", ["idx_loyalty_activity"]),
+    "Loyalty: customer ledger": ("FROM loyalty_ledger WHERE customer_cid = ?", ["idx_loyalty_ledger_cust_ts"]),
+    "Inventory: all movements": ("FROM inventory_movements ORDER BY ts DESC", ["idx_inventory_ts"]),
+    "Inventory: one item": ("FROM inventory_movements WHERE item = ?", ["idx_inventory_item_ts"]),
+    "Audit: newest first": ("FROM audit_log ORDER BY ts DESC", ["idx_audit_ts"]),
+    "Audit: by actor": ("FROM audit_log WHERE actor = ?", ["idx_audit_actor_ts"]),
+    "Audit: row history": ("FROM audit_log WHERE table_name = ? AND row_id = ?", ["idx_audit_table_row_ts"]),
+}
+
+
+def seed(conn, bills, now):
+    rnd = random.Random(9)
+    ts = lambda days: (now - timedelta(seconds=rnd.randint(0, int(days * 86400)))).strftime(FMT)  # noqa: E731
+    conn.executemany("INSERT INTO hoods (name, location) VALUES (?, ?)", [(f"Hood{i}", "LS") for i in range(6)])
+    conn.executemany("INSERT INTO employees (cid, name, rank, hood) VALUES (?,?,?,?)",
+                     [(f"E{i}", f"Emp {i}", "Mechanic", f"Hood{i % 6}") for i in range(40)])
+    conn.executemany("INSERT INTO items (name, price, stock) VALUES (?,?,?)",
+                     [(f"Item{i}", 100.0, 10 ** 6) for i in range(30)])
+    conn.executemany(
+        "INSERT INTO bills (employee_cid, customer_cid, billing_type, details, total_amount, timestamp, "
+        "commission, tax, hood) VALUES (?,?,?,?,?,?,?,?,?)",
+        ((f"E{e}", f"C{rnd.randrange(bills // 20)}", rnd.choice(TYPES), "bench", float(rnd.randint(100, 20000)),
+          ts(90), 10.0, 5.0, f"Hood{e % 6}") for e in (rnd.randrange(40) for _ in range(bills)))
+    )
+    conn.execute("""
+        INSERT INTO customers (customer_cid, first_seen, last_seen, bill_count, lifetime_spend)
+        SELECT customer_cid, MIN(timestamp), MAX(timestamp), COUNT(*), SUM(total_amount)
+        FROM bills GROUP BY customer_cid
+    """)
+    conn.executemany("INSERT INTO customers (customer_cid, bill_count) VALUES (?, 0)",
+                     [(f"N{i}",) for i in range(bills // 20)])
+    conn.executemany(
+        "INSERT INTO bills_deleted (id, employee_cid, customer_cid, billing_type, details, total_amount, "
+        "timestamp, deleted_by, deleted_at) VALUES (?,?,?,?,?,?,?,?,?)",
+        ((bills + i, "E1", "C1", "REPAIR", "bench", 100.0, ts(90), "owner", ts(90)) for i in range(bills // 20))
+    )
+    conn.executemany(
+        "INSERT INTO shifts (employee_cid, start_ts, end_ts, duration_minutes, bills_count, revenue) "
+        "VALUES (?,?,?,?,?,?)",
+        ((f"E{i % 40}", (now - timedelta(hours=8 * i + 9)).strftime(FMT),
+          (now - timedelta(hours=8 * i + 1)).strftime(FMT), 480, 10, 5000.0) for i in range(20000))
+    )
+    conn.executemany("INSERT INTO shifts (employee_cid, start_ts) VALUES (?, ?)",
+                     [(f"E{i}", ts(0.3)) for i in range(0, 40, 4)])
+    conn.executemany("INSERT OR REPLACE INTO memberships (customer_cid, tier, dop) VALUES (?,?,?)",
+                     ((f"C{i}", "Tier2", ts(6)) for i in range(0, bills // 20, 10)))
+    conn.executemany("INSERT INTO membership_history (customer_cid, tier, dop, expired_at) VALUES (?,?,?,?)",
+                     ((f"C{rnd.randrange(bills // 20)}", "Tier1", ts(90), ts(80)) for _ in range(bills // 5)))
+    conn.executemany("INSERT OR REPLACE INTO loyalty (customer_cid, points, last_activity) VALUES (?,?,?)",
+                     ((f"C{i}", rnd.choice([0, 0, 0, rnd.randint(1, 900)]), ts(90)) for i in range(bills // 20)))
+    conn.executemany("INSERT INTO loyalty_ledger (customer_cid, ts, kind, points) VALUES (?,?,?,?)",
+                     ((f"C{rnd.randrange(bills // 20)}", ts(90), "earn", 10) for _ in range(bills // 2)))
+    conn.executemany(
+        "INSERT INTO inventory_movements (item, ts, kind, delta) VALUES (?,?,?,?)",
+        ((f"Item{rnd.randrange(30)}", ts(90), "sale", -1) for _ in range(bills // 2)))
+    conn.executemany(
+        "INSERT INTO audit_log (action, table_name, row_id, actor, ts) VALUES (?,?,?,?,?)",
+        ((rnd.choice(["UPDATE_EMP", "ADD_BILL"]), "employees", f"E{rnd.randrange(40)}",
+          rnd.choice(["owner", "emp"]), ts(90)) for _ in range(bills // 2)))
+    conn.commit()
+
+
+def run_pages(now):
+    """Every page query in EXPECTED, through the app's own code."""
+    from streamlit.testing.v1 import AppTest
+
+    from exoticbill.core.audit import query_audit_log
+    from exoticbill.core.bills import (
+        get_all_customers, get_billing_summary_by_cid, get_customer_bills, get_deleted_bills,
+        get_employee_bills_page, get_hood_war
+    )
+    from exoticbill.core.customers import get_recent_customers
+    from exoticbill.core.feed import get_live_aggregates
+    from exoticbill.core.items import get_inventory_movements
+    from exoticbill.core.loyalty import expire_loyalty_points, get_loyalty_history
+    from exoticbill.core.memberships import get_past_memberships, purge_expired_memberships
+    from exoticbill.core.payroll import compute_payroll
+    from exoticbill.core.shifts import end_shift, get_employee_shifts
+
+    start, end = (now - timedelta(days=7)).strftime(FMT), now.strftime(FMT)
+    get_billing_summary_by_cid("E3")
+    get_employee_bills_page("E3")
+    get_customer_bills("C7")
+    get_past_memberships()
+    get_past_memberships("C7")
+    get_deleted_bills.uncached()
+    get_employee_shifts.uncached("E3", start, end)
+    compute_payroll(start, end)
+    compute_payroll((now - timedelta(days=60)).strftime(FMT), end)
+    get_hood_war.uncached(start, end)
+    purge_expired_memberships()
+    get_all_customers()
+    get_recent_customers()
+    get_loyalty_history("C7")
+    expire_loyalty_points(days=60)
+    get_inventory_movements()
+    get_inventory_movements("Item3")
+    query_audit_log()
+    query_audit_log(actor="emp")
+    query_audit_log(table_name="employees", row_id="E3")
+    get_live_aggregates().refresh()
+    end_shift("E4")
+
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py")
+    at = AppTest.from_file(app, default_timeout=120)
+    at.session_state["logged_in"] = True
+    at.session_state["role"] = "user"
+    at.session_state["username"] = "emp"
+    at.session_state["display_name"] = "Emp 4"
+    at.run()
+    at = AppTest.from_file(app, default_timeout=120)
+    at.session_state["logged_in"] = True
+    at.session_state["role"] = "admin"
+    at.session_state["username"] = "owner"
+    at.run()
+    at.sidebar.selectbox[0].select("Loyalty").run()
+    at.sidebar.selectbox[0].select("Tracking").run()
+    next(s for s in at.selectbox if s.label == "Select ranking metric").select("REPAIR").run()
+    next(b for b in at.button if b.label == "Apply Filter").click().run()
+    return [e.value for e in at.exception]
+
+
+def check_plans(stats):
+    failures = 0
+    for page, (fragment, indexes) in EXPECTED.items():
+        rows = [r for r in stats if fragment in r["sql"]]
+        if not rows:
+            print(f"FAIL {page:42s} query not run")
+            failures += 1
+            continue
+        plan = [d for r in rows for d in r["plan"]]
+        missing = [i for i in indexes if not any(i in d for d in plan)]
+        views = {d.split()[1] for d in plan if d.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+        scans = [d for d in plan if d.startswith("SCAN ") and "USING" not in d and "CONSTANT" not in d
+                 and d.split()[1] not in views]
+        ok = not missing and not scans
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {page:42s} {' | '.join(plan)}")
+        if missing:
+            print(f"     missing {missing}")
+    return failures
+
+
+def insert_cost(conn, table, indexes, base_rows, inserts):
+    """
+    Microseconds per bill insert into a copy of `table` (bills: the legacy
+    layout, read back through the view; bill_rows: encoded) of base_rows
+    rows carrying `indexes`.
+    """
+    conn.execute(f"DROP TABLE IF EXISTS bench_{table}")
+    conn.execute(f"CREATE TABLE bench_{table} AS SELECT * FROM {table} LIMIT 0")
+    conn.execute(f"INSERT INTO bench_{table} SELECT * FROM {table} ORDER BY id LIMIT ?", (base_rows,))
+    for name, definition in indexes.items():
+        conn.execute(f"CREATE INDEX bench_{name} ON bench_{definition}")
+    conn.commit()
+    rnd = random.Random(4)
+    ts = datetime(2030, 1, 1).strftime(FMT)
+    if table == "bills":
+        cols = "employee_cid, customer_cid, billing_type, details, total_amount, timestamp, commission, tax, hood"
+        rows = [(f"E{rnd.randrange(40)}", f"C{rnd.randrange(5000)}", rnd.choice(TYPES), "bench",
+                 float(rnd.randint(100, 20000)), ts, 10.0, 5.0, f"Hood{rnd.randrange(6)}") for _ in range(inserts)]
+    else:
+        cols = ("employee_key, customer_key, type_code, details, amount_paise, timestamp, commission_paise, "
+                "tax_paise, hood")
+        rows = [(rnd.randrange(40) + 1, rnd.randrange(5000) + 41, rnd.randrange(len(TYPES)) + 1, "bench",
+                 rnd.randint(100, 20000) * 100, ts, 1000, 500, f"Hood{rnd.randrange(6)}") for _ in range(inserts)]
+    t0 = time.perf_counter()
+    for i in range(0, inserts, 100):  # save_bill-sized transactions would time fsync, not the indexes
+        conn.executemany(f"INSERT INTO bench_{table} ({cols}) VALUES (?,?,?,?,?,?,?,?,?)", rows[i:i + 100])
+        conn.commit()
+    per = (time.perf_counter() - t0) / inserts * 1e6
+    conn.execute(f"DROP TABLE bench_{table}")
+    conn.commit()
+    return per
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--bills", type=int, default=100000)
+    ap.add_argument("--inserts", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the app's DB paths are relative
+        from exoticbill.config import IST
+        from exoticbill.core.cache import get_query_cache
+        from exoticbill.core.db import INDEXES, get_conn, get_query_stats, init_db
+        from exoticbill.core.tiering import tier_old_bills
+
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+        init_db()
+        now = datetime.now(IST)
+        conn = get_conn()
+        seed(conn, args.bills, now)
+        conn.close()
+        tier_old_bills(days=30)
+        init_db()  # a restart: indexes built on empty tables get their stats
+
+        get_query_stats().reset()
+        get_query_cache().clear()
+        errors = run_pages(now)
+        print(f"page query plans ({args.bills:,} bills, archive holds the ones older than 30 days):")
+        failures = check_plans(get_query_stats().snapshot())
+        if errors:
+            print(f"page errors: {errors}")
+            failures += 1
+
+        new = {n: d for n, d in INDEXES.items() if d.startswith("bill_rows(")}
+        conn = get_conn()
+        base = conn.execute("SELECT COUNT(*) FROM bill_rows").fetchone()[0]
+        sets = {"legacy layout, no secondary index": ("bills", {}),
+                "legacy layout, old index set": ("bills", OLD_BILL_INDEXES),
+                "no secondary index": ("bill_rows", {}), "new index set": ("bill_rows", new)}
+        sets.update({f"new set without {n}": ("bill_rows", {k: v for k, v in new.items() if k != n}) for n in new})
+        cost = {}
+        for label, (table, indexes) in sets.items():
+            cost[label] = min(insert_cost(conn, table, indexes, base, args.inserts) for _ in range(args.repeat))
+        conn.close()
+        print(f"\nbill insert cost ({base:,} rows in the table, best of {args.repeat}):")
+        for label, us in cost.items():
+            extra = ""
+            if label.startswith("new set without "):
+                extra = f"  -> {label[len('new set without '):]} costs {cost['new index set'] - us:5.1f} us"
+            print(f"  {label:42s} {us:6.1f} us/insert{extra}")
+        print(f"\n{len(EXPECTED) - failures}/{len(EXPECTED)} page queries use their index")
+        os.chdir("/")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
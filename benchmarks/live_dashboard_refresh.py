@@ -0,0 +1,131 @@
+"""
+Live dashboard refresh: re-aggregating bills vs. replaying the change feed.
+
+Runs against scratch databases created by the app's own init_db:
+
+    python benchmarks/live_dashboard_refresh.py --sizes 20000 200000
+
+For each table size it times
+  legacy  - the queries Live Stats, Live Shifts and the admin header used to
+            run on every refresh (today / last hour / by type / open shifts /
+            all-time revenue)
+  feed    - LiveAggregates.refresh() after 0, 10 and 100 new bills
+            (the inserts themselves are not timed)
+and the write-side price: inserting 1000 bills with and without the feed
+triggers.
+"""
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TYPES = ["REPAIR", "CUSTOMIZATION", "UPGRADES", "ITEMS", "MEMBERSHIP"]
+
+
+def bill_rows(n, now, days):
+    rnd = random.Random(n)
+    for _ in range(n):
+        ts = now - timedelta(seconds=rnd.randint(0, days * 86400))
+        yield (f"E{rnd.randint(1, 40)}", f"C{rnd.randint(1, 5000)}", rnd.choice(TYPES), "bench",
+               float(rnd.randint(100, 20000)), ts.strftime("%Y-%m-%d %H:%M:%S"), 0.0, 0.0)
+
+
+INSERT = ("INSERT INTO bills (employee_cid, customer_cid, billing_type, details, total_amount, timestamp, "
+          "commission, tax) VALUES (?,?,?,?,?,?,?,?)")
+
+
+def legacy_refresh(path, now):
+    today = now.strftime("%Y-%m-%d 00:00:00")
+    hour = (now - timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(path)
+    for sql, params in [
+        ("SELECT COUNT(*) FROM bills WHERE timestamp>=?", (today,)),
+        ("SELECT COALESCE(SUM(total_amount),0) FROM bills WHERE timestamp>=?", (today,)),
+        ("SELECT COUNT(*) FROM bills WHERE timestamp>=?", (hour,)),
+        ("SELECT COALESCE(SUM(total_amount),0) FROM bills WHERE timestamp>=?", (hour,)),
+        ("SELECT billing_type, COUNT(*), COALESCE(SUM(total_amount),0) FROM bills WHERE timestamp>=? "
+         "GROUP BY billing_type ORDER BY 3 DESC", (today,)),
+        ("SELECT employee_cid, start_ts, bills_count, revenue FROM shifts WHERE end_ts IS NULL", ()),
+        ("SELECT SUM(total_amount) FROM bills", ()),
+    ]:
+        conn.execute(sql, params).fetchall()
+    conn.close()
+
+
+def timed(fn, repeat=7):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def run(size, workdir):
+    from exoticbill.config import IST
+    from exoticbill.core.db import init_db
+    from exoticbill.core.feed import LiveAggregates
+
+    os.chdir(workdir)
+    init_db()
+    path = os.path.join(workdir, "auto_exotic_billing.db")
+    now = datetime.now(IST)
+    conn = sqlite3.connect(path)
+    conn.executemany(INSERT, bill_rows(size, now, 180))
+    conn.execute("DELETE FROM change_feed")
+    conn.commit()
+
+    legacy_ms = timed(lambda: legacy_refresh(path, now))
+    agg = LiveAggregates()
+    t0 = time.perf_counter()
+    agg.refresh()
+    first_ms = (time.perf_counter() - t0) * 1000
+
+    out = [f"bills={size:>7,}  legacy={legacy_ms:7.1f} ms  feed first (rebuild)={first_ms:7.1f} ms"]
+    for new in (0, 10, 100):
+        samples = []
+        for _ in range(7):
+            if new:
+                conn.executemany(INSERT, bill_rows(new, now, 0))
+                conn.commit()
+            t0 = time.perf_counter()
+            agg.refresh()
+            samples.append((time.perf_counter() - t0) * 1000)
+        out.append(f"feed +{new:<3d}={statistics.median(samples):6.2f} ms")
+    print("  ".join(out))
+
+    # write-side cost of the triggers: same 1000 bills, with and without them
+    with_ms = timed(lambda: (conn.executemany(INSERT, bill_rows(1000, now, 0)), conn.commit()), 3)
+    triggers = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_feed_bills_%'"
+    ).fetchall()
+    for (name,) in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    without_ms = timed(lambda: (conn.executemany(INSERT, bill_rows(1000, now, 0)), conn.commit()), 3)
+    print(f"  insert 1000 bills: {with_ms:.1f} ms with feed triggers, {without_ms:.1f} ms without")
+    conn.close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[20000, 200000])
+    args = ap.parse_args()
+
+    import exoticbill.core.db  # noqa: F401  (streamlit imported; quiet its bare-mode warning)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            run(size, tmp)
+            os.chdir("/")
+
+
+if __name__ == "__main__":
+    main()
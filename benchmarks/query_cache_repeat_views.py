@@ -0,0 +1,164 @@
+"""
+Repeat-view latency and correctness of the query result cache.
+
+Runs against a scratch database created by the app's own init_db:
+
+    python benchmarks/query_cache_repeat_views.py --bills 200000 --steps 300
+
+Times the Bill Logs ("Last 7 days"), Hood War and Shifts "By Employee"
+queries uncached, on first (cold) view and on repeat views. Then runs a
+random mix of views and writes:
+  - new bills, shifts and renamed employees on the live DB;
+  - snapshot refreshes;
+  - tiering into the archive;
+  - soft deletes and restores that touch archived rows.
+Every view is compared with the uncached query against the same data.
+Exits non-zero on any difference.
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+TYPES = ["REPAIR", "CUSTOMIZATION", "UPGRADES", "ITEMS", "MEMBERSHIP"]
+FMT = "%Y-%m-%d %H:%M:%S"
+
+
+def seed(conn, bills, now):
+    rnd = random.Random(3)
+    conn.executemany("INSERT INTO hoods (name, location) VALUES (?, ?)", [(f"Hood{i}", "LS") for i in range(6)])
+    conn.executemany("INSERT INTO employees (cid, name, rank, hood) VALUES (?,?,?,?)",
+                     [(f"E{i}", f"Emp {i}", "Mechanic", f"Hood{i % 6}") for i in range(40)])
+    conn.executemany(
+        "INSERT INTO bills (employee_cid, customer_cid, billing_type, details, total_amount, timestamp, hood) "
+        "VALUES (?,?,?,?,?,?,?)",
+        ((f"E{e}", f"C{rnd.randint(1, 5000)}", rnd.choice(TYPES), "bench", float(rnd.randint(100, 20000)),
+          (now - timedelta(seconds=rnd.randint(0, 60 * 86400))).strftime(FMT), f"Hood{e % 6}")
+         for e in (rnd.randrange(40) for _ in range(bills)))
+    )
+    conn.executemany(
+        "INSERT INTO shifts (employee_cid, start_ts, end_ts, duration_minutes, bills_count, revenue) "
+        "VALUES (?,?,?,?,?,?)",
+        ((f"E{i % 40}", (now - timedelta(hours=8 * i + 9)).strftime(FMT),
+          (now - timedelta(hours=8 * i + 1)).strftime(FMT), 480, 10, 5000.0) for i in range(3000))
+    )
+    conn.commit()
+
+
+def median_ms(fn, repeat=7):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--bills", type=int, default=200000)
+    ap.add_argument("--steps", type=int, default=300)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the app's DB paths are relative
+        from exoticbill.config import IST
+        from exoticbill.core.bills import (
+            _query_bill_logs, get_bill_logs, get_hood_war, restore_bills, soft_delete_bills
+        )
+        from exoticbill.core.cache import get_query_cache
+        from exoticbill.core.db import get_conn, init_db
+        from exoticbill.core.shifts import get_employee_shifts
+        from exoticbill.core.snapshot import get_snapshot_refresher, refresh_snapshot
+        from exoticbill.core.tiering import tier_old_bills
+
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+        init_db()
+        now = datetime.now(IST)
+        conn = get_conn()
+        seed(conn, args.bills, now)
+        conn.close()
+        refresh_snapshot()
+        refresher = get_snapshot_refresher()
+
+        def window(days):
+            t = datetime.now(IST)
+            return (t - timedelta(days=days)).strftime(FMT), t.strftime(FMT)
+
+        def day_range(days):
+            t = datetime.now(IST)
+            return (t - timedelta(days=days)).strftime("%Y-%m-%d 00:00:00"), t.strftime("%Y-%m-%d 23:59:59")
+
+        views = {
+            "bill_logs (last 7 days)": (lambda: get_bill_logs(*window(7), analytics=True),
+                                        lambda: _query_bill_logs(*window(7), analytics=True)),
+            "hood_war (7 days)": (lambda: get_hood_war(*day_range(7)),
+                                  lambda: get_hood_war.uncached(*day_range(7))),
+            "shifts_by_employee": (lambda: get_employee_shifts("E7", *day_range(30)),
+                                   lambda: get_employee_shifts.uncached("E7", *day_range(30))),
+        }
+        for name, (cached, uncached) in views.items():
+            with refresher._lock:  # no snapshot swap in the middle of a measurement
+                plain = median_ms(uncached)
+                get_query_cache().clear()
+                t0 = time.perf_counter()
+                cached()
+                cold = (time.perf_counter() - t0) * 1000
+                warm = median_ms(cached, 21)
+            print(f"{name:26s} uncached={plain:8.2f} ms  first view={cold:8.2f} ms  repeat view={warm:7.3f} ms")
+
+        # random views and writes; every view must equal the uncached query
+        rnd = random.Random(11)
+        mismatches = 0
+        archived = False
+        for step in range(args.steps):
+            action = rnd.random()
+            conn = get_conn()
+            if action < 0.15:
+                conn.execute(
+                    "INSERT INTO bills (employee_cid, customer_cid, billing_type, details, total_amount, "
+                    "timestamp, hood) VALUES (?,?,?,?,?,?,?)",
+                    (f"E{rnd.randrange(40)}", "C1", "REPAIR", "new", 999.0, datetime.now(IST).strftime(FMT), "Hood1"))
+            elif action < 0.2:
+                conn.execute("UPDATE employees SET name = ? WHERE cid = ?", (f"Renamed {step}", f"E{rnd.randrange(40)}"))
+            elif action < 0.25:
+                conn.execute("UPDATE shifts SET revenue = revenue + 1 WHERE employee_cid = 'E7'")
+            conn.commit()
+            conn.close()
+            if action < 0.3 and rnd.random() < 0.3:
+                refresh_snapshot()
+            elif 0.3 <= action < 0.32 and not archived:
+                tier_old_bills(days=20)
+                archived = True
+            elif 0.32 <= action < 0.36 and archived:
+                c = get_conn()
+                ids = [r[0] for r in c.execute(
+                    "SELECT id FROM bills WHERE timestamp < ? ORDER BY random() LIMIT 3",
+                    ((datetime.now(IST) - timedelta(days=6)).strftime(FMT),)).fetchall()]
+                c.close()
+                soft_delete_bills(ids, "bench") if rnd.random() < 0.6 else restore_bills(ids, "bench")
+
+            for name, (cached, uncached) in views.items():
+                with refresher._lock:
+                    if cached() != uncached():
+                        mismatches += 1
+                        print(f"MISMATCH step={step} view={name}")
+
+        print("\nquery                 lookups  hit rate  stale  expired  entries      KiB")
+        for r in get_query_cache().snapshot():
+            print(f"{r['query']:20s} {r['lookups']:8d} {r['hit_rate']:8.1%} {r['stale']:6d} {r['expired']:8d} "
+                  f"{r['entries']:8d} {r['bytes'] / 1024:8.0f}")
+        print(f"\n{args.steps} steps, {mismatches} mismatching view(s)")
+        os.chdir("/")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Billing write latency while the analytics snapshot refreshes and reports run.
+
+Runs against a scratch database created by the app's own init_db:
+
+    python benchmarks/snapshot_write_latency.py --bills 300000 --seconds 5
+
+Each phase times real save_bill calls (bill, shift counters, customer and
+loyalty rows in one transaction) from one writer thread:
+  idle              - nothing else running
+  refresh, 1 step   - refresh_snapshot in a loop, copying the whole DB in
+                      one backup step (how the snapshot used to be taken)
+  refresh, paged    - refresh_snapshot in a loop as shipped
+                      (SNAPSHOT_BACKUP_PAGES per step)
+  report on live    - a Hood War style report loop on the live DB
+  report on snapshot- the same loop on the snapshot, opened the way
+                      get_analytics_conn opens it (mode=ro, query_only, mmap)
+Exits non-zero if a save fails, the paged phase completes no refresh, or
+the final snapshot does not hold every saved bill.
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+EMPLOYEES = 200
+TYPES = ["REPAIR", "CUSTOMIZATION", "UPGRADES", "ITEMS"]
+REPORT_SQL = """
+    SELECT e.hood, COALESCE(SUM(b.amount_paise), 0) AS revenue
+    FROM employees e
+    LEFT JOIN cid_keys k ON k.cid = e.cid
+    LEFT JOIN bill_rows b ON b.employee_key = k.id
+    GROUP BY e.hood
+    ORDER BY revenue DESC
+"""
+
+
+def seed(conn, n_bills):
+    rnd = random.Random(1)
+    conn.executemany("INSERT INTO employees (cid, name, rank, hood) VALUES (?,?,?,?)",
+                     [(f"E{i}", f"Emp {i}", "Mechanic", f"Hood{i % 8}") for i in range(EMPLOYEES)])
+    conn.executemany(
+        "INSERT INTO bills (employee_cid, customer_cid, billing_type, details, total_amount, timestamp, hood) "
+        "VALUES (?,?,?,?,?,?,?)",
+        ((f"E{e}", f"C{rnd.randrange(50000)}", rnd.choice(TYPES), "bench", rnd.randint(10000, 500000) / 100,
+          f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} 12:00:00", f"Hood{e % 8}")
+         for e in (rnd.randrange(EMPLOYEES) for _ in range(n_bills)))
+    )
+    conn.commit()
+
+
+def measure_saves(seconds, errors):
+    from exoticbill.core.bills import save_bill
+
+    lat = []
+    end = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < end:
+        t0 = time.perf_counter()
+        try:
+            ok, msg = save_bill(f"E{i % EMPLOYEES}", f"CB{i % 500}", "REPAIR", "bench", 450.0)
+            if not ok:
+                errors.append(msg)
+        except Exception as e:  # "database is locked" after the busy timeout
+            errors.append(repr(e))
+        lat.append((time.perf_counter() - t0) * 1000.0)
+        i += 1
+        time.sleep(0.002)  # counter-like pacing
+    return lat
+
+
+def refresh_loop(stop, counter, errors):
+    from exoticbill.core.snapshot import refresh_snapshot
+
+    while not stop.is_set():
+        try:
+            refresh_snapshot()
+            counter[0] += 1
+        except Exception as e:
+            errors.append(repr(e))
+            return
+
+
+def report_loop(open_conn, stop, counter, errors):
+    conn = open_conn()
+    try:
+        while not stop.is_set():
+            conn.execute(REPORT_SQL).fetchall()
+            counter[0] += 1
+    except Exception as e:
+        errors.append(repr(e))
+    finally:
+        conn.close()
+
+
+def open_snapshot():
+    from exoticbill.config import SNAPSHOT_CACHE_KIB, SNAPSHOT_DB_PATH, SNAPSHOT_MMAP_BYTES
+    from exoticbill.core.db import get_conn
+
+    conn = get_conn(path=f"file:{SNAPSHOT_DB_PATH}?mode=ro", uri=True)
+    conn.execute("PRAGMA query_only = 1")
+    conn.execute(f"PRAGMA mmap_size = {SNAPSHOT_MMAP_BYTES}")
+    conn.execute(f"PRAGMA cache_size = -{SNAPSHOT_CACHE_KIB}")
+    return conn
+
+
+def summarize(name, lat, background, what):
+    lat = sorted(lat)
+    pct = lambda p: lat[min(len(lat) - 1, int(p / 100.0 * (len(lat) - 1)))]
+    print(f"{name:19s} saves={len(lat):5d}  p50={pct(50):7.2f}ms  p95={pct(95):7.2f}ms  "
+          f"p99={pct(99):7.2f}ms  max={lat[-1]:8.2f}ms  mean={statistics.mean(lat):6.2f}ms  {what}={background}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--bills", type=int, default=300000)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the app's DB paths are relative
+        from exoticbill.config import SNAPSHOT_BACKUP_PAGES
+        from exoticbill.core import snapshot
+        from exoticbill.core.db import get_conn, init_db
+
+        logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+        init_db()
+        conn = get_conn()
+        seed(conn, args.bills)
+        conn.close()
+        snapshot.refresh_snapshot()
+        print(f"{args.bills:,} bills, DB {os.path.getsize(snapshot.SNAPSHOT_DB_PATH) / 1e6:.1f} MB, "
+              f"paged copy = {SNAPSHOT_BACKUP_PAGES} pages/step\n")
+
+        errors = []
+        summarize("idle", measure_saves(args.seconds, errors), 0, "-")
+        phases = [
+            ("refresh, 1 step", refresh_loop, (), -1, "refreshes"),
+            ("refresh, paged", refresh_loop, (), SNAPSHOT_BACKUP_PAGES, "refreshes"),
+            ("report on live", report_loop, (get_conn,), SNAPSHOT_BACKUP_PAGES, "reports"),
+            ("report on snapshot", report_loop, (open_snapshot,), SNAPSHOT_BACKUP_PAGES, "reports"),
+        ]
+        paged_refreshes = 0
+        for name, loop, extra, pages, what in phases:
+            snapshot.SNAPSHOT_BACKUP_PAGES = pages
+            stop, counter = threading.Event(), [0]
+            t = threading.Thread(target=loop, args=extra + (stop, counter, errors))
+            t.start()
+            lat = measure_saves(args.seconds, errors)
+            stop.set()
+            t.join()
+            summarize(name, lat, counter[0], what)
+            if name == "refresh, paged":
+                paged_refreshes = counter[0]
+
+        snapshot.refresh_snapshot()
+        live = get_conn()
+        snap = open_snapshot()
+        counts = [c.execute("SELECT COUNT(*) FROM bill_rows").fetchone()[0] for c in (live, snap)]
+        live.close()
+        snap.close()
+        os.chdir("/")
+
+    failed = bool(errors) or not paged_refreshes or counts[0] != counts[1]
+    print(f"\nbills live={counts[0]:,} snapshot={counts[1]:,}; save/refresh errors: {len(errors)}"
+          + (f" (first: {errors[0]})" if errors else ""))
+    print("verification: " + ("OK" if not failed else "FAILED"))
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
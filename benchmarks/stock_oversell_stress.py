@@ -0,0 +1,202 @@
+"""
+Concurrent sellers on low-stock items: legacy check-then-decrement vs. atomic reservation.
+
+Runs against a scratch database created by the app's own init_db:
+
+    python benchmarks/stock_oversell_stress.py --sellers 16 --attempts 200 --runs 5
+
+Each seller is a separate process, on an open shift, repeatedly selling
+random baskets of a few scarce items to a handful of customers.
+  legacy  - the old flow: stock read when the form renders, save_bill
+            without items, then an unconditional `stock = stock - qty` per
+            item
+  atomic  - save_bill(..., items=basket) as the Billing page calls it: bill,
+            stock reservation (all-or-nothing), shift counters, customer
+            row and loyalty in one transaction; OutOfStock rolls it back
+Reports units sold vs. units that existed and the lowest final stock. For
+the atomic mode it also checks the final state: stock equals opening stock
+minus the inventory_movements ledger. Every sale movement points at a
+saved bill, and refused sales left no bill. Shift counters, customer rows
+and loyalty earnings match the bills. The atomic mode is repeated --runs
+times on fresh databases, since races only show up now and then. Exits
+non-zero if any run oversells, has a sale that raised, or shows a mismatch.
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+STOCK = {"Harness": 5, "NOS": 8, "Repair Kit": 12}
+PRICE = 1000.0
+CUSTOMERS = 5
+
+
+def setup(sellers):
+    from exoticbill.core.db import get_conn, init_db
+    from exoticbill.core.items import add_item
+    from exoticbill.core.shifts import start_shift
+
+    init_db()
+    conn = get_conn()
+    with conn:
+        conn.executemany("INSERT INTO employees (cid, name, rank, hood) VALUES (?, ?, 'Mechanic', 'No Hood')",
+                         [(f"E{i}", f"Seller {i}") for i in range(sellers)])
+    conn.close()
+    for item, stock in STOCK.items():
+        add_item(item, PRICE, stock)
+    for i in range(sellers):
+        start_shift(f"E{i}")
+
+
+def sell_legacy(seller, customer, basket):
+    from exoticbill.core.bills import save_bill
+    from exoticbill.core.db import get_conn
+
+    conn = get_conn()
+    try:
+        stock = dict(conn.execute("SELECT name, stock FROM items").fetchall())
+    finally:
+        conn.close()
+    if any(qty > stock[item] for item, qty in basket.items()):
+        return False
+    time.sleep(0.001)  # the gap between rendering the form and pressing Save
+    save_bill(seller, customer, "ITEMS", repr(basket), PRICE * sum(basket.values()))
+    conn = get_conn()
+    with conn:
+        for item, qty in basket.items():
+            conn.execute("UPDATE items SET stock = stock + ? WHERE name = ?", (-qty, item))
+    conn.close()
+    return True
+
+
+def sell_atomic(seller, customer, basket):
+    from exoticbill.core.bills import save_bill
+
+    ok, _ = save_bill(seller, customer, "ITEMS", repr(basket), PRICE * sum(basket.values()), items=basket)
+    return ok
+
+
+def seller_proc(mode, seller, attempts, start, out):
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    rnd = random.Random(seller)
+    sell = sell_atomic if mode == "atomic" else sell_legacy
+    sold = {item: 0 for item in STOCK}
+    ok = 0
+    errors = []
+    start.wait()
+    for _ in range(attempts):
+        basket = {item: rnd.randint(1, 2) for item in rnd.sample(list(STOCK), rnd.randint(1, 2))}
+        try:
+            if not sell(f"E{seller}", f"C{rnd.randrange(CUSTOMERS)}", basket):
+                continue
+        except Exception as e:  # e.g. "database is locked" past the busy timeout
+            errors.append(repr(e))
+            continue
+        ok += 1
+        for item, qty in basket.items():
+            sold[item] += qty
+    out.put((ok, sold, errors))
+
+
+def check_state(bills):
+    """Mismatches between the saved bills and everything save_bill keeps next to them."""
+    from exoticbill.config import LOYALTY_EARN_PER_RS
+    from exoticbill.core.db import get_conn
+
+    conn = get_conn()
+    try:
+        q = lambda sql: conn.execute(sql).fetchone()[0]
+        problems = {
+            "bills vs successful saves": q("SELECT COUNT(*) FROM bill_rows") - bills,
+            "stock vs ledger": q("""
+                SELECT COUNT(*) FROM items i
+                WHERE i.stock IS NOT (SELECT SUM(delta) FROM inventory_movements m WHERE m.item = i.name)
+            """),
+            "sale movements without a bill": q("""
+                SELECT COUNT(*) FROM inventory_movements m
+                WHERE m.kind = 'sale' AND NOT EXISTS (SELECT 1 FROM bill_rows b WHERE b.id = m.bill_id)
+            """),
+            "bills without sale movements": q("""
+                SELECT COUNT(*) FROM bill_rows b
+                WHERE NOT EXISTS (SELECT 1 FROM inventory_movements m WHERE m.bill_id = b.id)
+            """),
+            "shift bills_count": q("SELECT COALESCE(SUM(bills_count), 0) FROM shifts") - bills,
+            "shift revenue (paise)": q("""
+                SELECT CAST(round(COALESCE(SUM(revenue), 0) * 100) AS INTEGER)
+                       - (SELECT COALESCE(SUM(amount_paise), 0) FROM bill_rows) FROM shifts
+            """),
+            "customer bill_count": q("SELECT COALESCE(SUM(bill_count), 0) FROM customers") - bills,
+            "loyalty earnings": q(f"""
+                SELECT COALESCE(SUM(points), 0) - (SELECT COALESCE(SUM(amount_paise / {LOYALTY_EARN_PER_RS * 100}), 0)
+                                                   FROM bill_rows)
+                FROM loyalty_ledger WHERE kind = 'earn'
+            """),
+        }
+    finally:
+        conn.close()
+    return {k: v for k, v in problems.items() if v}
+
+
+def run(mode, sellers, attempts):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # the app's DB paths are relative; sellers inherit the directory
+        setup(sellers)
+        ctx = mp.get_context("spawn")  # no fork of the parent's audit/Streamlit threads and their locks
+        start, out = ctx.Event(), ctx.Queue()
+        procs = [ctx.Process(target=seller_proc, args=(mode, i, attempts, start, out)) for i in range(sellers)]
+        for p in procs:
+            p.start()
+        t0 = time.perf_counter()
+        start.set()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - t0
+
+        from exoticbill.core.db import get_conn
+        conn = get_conn()
+        final = dict(conn.execute("SELECT name, stock FROM items").fetchall())
+        conn.close()
+        bills = sum(ok for ok, _, _ in results)
+        errors = [e for _, _, errs in results for e in errs]
+        problems = check_state(bills) if mode == "atomic" else None
+        os.chdir("/")
+
+    sold = {item: sum(s[item] for _, s, _ in results) for item in STOCK}
+    oversold = sum(max(0, sold[item] - STOCK[item]) for item in STOCK)
+    print(f"{mode:7s} sellers={sellers} attempts={sellers * attempts} bills={bills} "
+          f"sold={sold} oversold_units={oversold} min_stock={min(final.values())} ({elapsed:.2f}s)")
+    if errors:
+        print(f"        {len(errors)} sales raised (first: {errors[0]})")
+    if problems is not None:
+        problems.update({"sales that raised": len(errors)} if errors else {})
+        print("        state: " + ("consistent" if not problems else
+                                   ", ".join(f"{k} off by {v}" for k, v in problems.items())))
+    return oversold, problems
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sellers", type=int, default=16)
+    ap.add_argument("--attempts", type=int, default=200)
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    run("legacy", args.sellers, args.attempts)
+    failed = 0
+    for _ in range(args.runs):
+        oversold, problems = run("atomic", args.sellers, args.attempts)
+        failed += bool(oversold or problems)
+    print(f"atomic runs failed: {failed}/{args.runs}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Conformance run of the app's helpers against every STORAGE_BACKEND.
+
+    python benchmarks/storage_conformance.py --bills 2000
+
+One scripted workload drives the helpers the pages call: staff and hoods,
+items, save_bill (with stock), bulk soft delete/restore, shifts,
+memberships, loyalty and the audit log. It includes the refusals:
+duplicate hood, item and employee, a second open shift, an overdrawn
+loyalty redemption and oversold stock. It runs on
+  file    - EXOTICBILL_STORAGE=file, scratch DB from init_db
+  memory  - EXOTICBILL_STORAGE=memory (shared-cache in-memory)
+each in its own process. Every call's result is recorded, with wall-clock
+timestamps masked. The run exits non-zero if the memory backend's results
+differ from the file backend's. Prints the wall time of the workload per
+backend.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+BACKENDS = ("file", "memory")
+TYPES = ["REPAIR", "CUSTOMIZATION", "UPGRADES", "ITEMS", "MEMBERSHIP"]
+TIMESTAMP = re.compile(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d")
+
+
+def masked(value):
+    """`value` as JSON-able data with timestamps (read from the clock by the helpers) masked."""
+    if isinstance(value, str):
+        return TIMESTAMP.sub("<ts>", value)
+    if isinstance(value, dict):
+        return {k: masked(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [masked(v) for v in value]
+    return value
+
+
+def workload(bills):
+    """Drive the helpers; returns the list of results in call order."""
+    from exoticbill.core import audit, bills as bill_helpers, items, loyalty, memberships, shifts, staff
+
+    rnd = random.Random(7)
+    out = []
+    rec = lambda value: out.append(masked(value))
+
+    for name, loc in [("North", "Paleto"), ("South", "Davis"), ("North", "dup")]:
+        staff.add_hood(name, loc)
+    rec(sorted(staff.get_all_hoods()))
+    for i in range(1, 21):
+        staff.add_employee(f"E{i}", f"Emp {i}", rnd.choice(["Trainee", "Mechanic", "Manager"]))
+        staff.update_employee(f"E{i}", hood=rnd.choice(["North", "South", "No Hood"]))
+    staff.add_employee("E3", "Duplicate")
+    staff.update_employee("E3", name="Renamed", rank="Manager", hood="South")
+    rec(staff.get_employee_details("E3"))
+    rec(staff.get_employee_details("nobody"))
+    for name, price, stock in [("Repair Kit", 400, 50), ("NOS", 1500, 5), ("Car Wax", 2000.5, 10), ("NOS", 1, 1)]:
+        items.add_item(name, price, stock)
+    rec(items.update_item_stock("Car Wax", -20))
+    rec(items.update_item_stock("Car Wax", 5, actor="bench"))
+
+    for i in range(1, 11):
+        rec(shifts.start_shift(f"E{i}"))
+    rec(shifts.start_shift("E1"))
+
+    for n in range(bills):
+        basket = {"Repair Kit": 1, "NOS": rnd.randint(0, 2)} if n % 50 == 0 else None
+        rec(bill_helpers.save_bill(f"E{rnd.randint(1, 20)}", f"C{rnd.randint(1, 300)}", rnd.choice(TYPES),
+                                   f"bill {n}", rnd.randint(10000, 2000000) / 100, items=basket))
+    rec(bill_helpers.soft_delete_bills(list(range(1, bills + 1, 7)), actor="bench"))
+    rec(bill_helpers.soft_delete_bills(employee_cid="E5", actor="bench"))
+    rec(bill_helpers.restore_bills(list(range(1, bills + 1, 14)), actor="bench"))
+    rec(bill_helpers.get_bill_by_id(1))
+    rec(bill_helpers.get_bill_by_id(10 ** 9))
+    rec(bill_helpers.get_bill_count())
+    rec(bill_helpers.get_total_billing())
+    rec(bill_helpers.get_total_commission_and_tax())
+    rec(bill_helpers.get_billing_summary_by_cid("E3"))
+    rec(sorted(bill_helpers.get_customer_bills("C7")))
+    rec(bill_helpers.get_bill_logs()[:50])
+    rec(len(bill_helpers.get_deleted_bills(limit=2000)))
+
+    for i in range(1, 6):
+        rec(shifts.end_shift(f"E{i}"))
+    rec(shifts.end_shift("E1"))
+
+    staff.delete_hood("North")
+    rec(sorted(staff.get_all_hoods()))
+    rec(sorted(staff.get_employees_by_hood("No Hood")))
+    staff.delete_employee("E20")
+    rec(sorted(staff.get_all_employee_cids()))
+    rec(sorted(items.get_all_items()))
+    rec(items.get_item("NOS"))
+    rec(items.get_item("Ghost"))
+    rec(len(items.get_inventory_movements(limit=1000)))
+
+    for i in range(60):
+        memberships.add_membership(f"C{i}", rnd.choice(["Silver", "Gold"]))
+    rec(memberships.get_membership("C1"))
+    rec(sorted(memberships.get_all_memberships()))
+
+    for i in range(400):
+        cid = f"C{rnd.randint(1, 30)}"
+        pts = rnd.choice([5, 20, 100, -50, -10])
+        rec(loyalty.add_loyalty_points(cid, pts, actor="bench") if pts > 0
+            else loyalty.redeem_loyalty_points(cid, -pts, actor="bench"))
+    rec(loyalty.get_loyalty_history("C7", limit=500))
+
+    audit.get_audit_writer().flush()
+    rows, _ = audit.query_audit_log(limit=1000)
+    rec(sorted(tuple(r[1:]) for r in rows))
+    return out
+
+
+def child(bills):
+    import logging
+
+    from exoticbill.core.db import init_db
+
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+    logging.getLogger("streamlit.runtime.state.session_state_proxy").setLevel(logging.ERROR)
+    init_db()
+    t0 = time.perf_counter()
+    results = workload(bills)
+    elapsed = time.perf_counter() - t0
+    json.dump({"results": results, "seconds": elapsed}, sys.stdout)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--bills", type=int, default=2000)
+    ap.add_argument("--child", action="store_true")
+    args = ap.parse_args()
+    if args.child:
+        return child(args.bills)
+
+    runs = {}
+    for backend in BACKENDS:
+        with tempfile.TemporaryDirectory() as tmp:  # the app's DB paths are relative
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", "--bills", str(args.bills)],
+                cwd=tmp, env=dict(os.environ, EXOTICBILL_STORAGE=backend),
+                stdout=subprocess.PIPE, text=True, check=True,
+            )
+        runs[backend] = json.loads(proc.stdout)
+
+    expected = runs["file"]["results"]
+    failed = False
+    for backend, run in runs.items():
+        mismatches = [i for i, (a, b) in enumerate(zip(run["results"], expected)) if a != b]
+        if len(run["results"]) != len(expected):
+            mismatches.append(min(len(run["results"]), len(expected)))
+        failed |= bool(mismatches)
+        status = "OK" if not mismatches else f"MISMATCH at calls {mismatches[:5]}"
+        print(f"{backend:7s} calls={len(run['results']):6d} workload={run['seconds'] * 1000:8.1f} ms  {status}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""ExoticBill: billing, payroll and analytics for the Streamlit app in app.py."""
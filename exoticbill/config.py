@@ -0,0 +1,120 @@
+"""Settings and business constants shared by the data layer and the pages."""
+import os
+from zoneinfo import ZoneInfo
+
+IST = ZoneInfo("Asia/Kolkata")
+
+# ---------- PRICING & DISCOUNTS -----------
+ITEM_PRICES = {
+    "Repair Kit": 400,
+    "Car Wax": 2000,
+    "NOS": 1500,
+    "Adv Lockpick": 400,
+    "Lockpick": 250,
+    "Wash Kit": 300,
+    "Harness": 12000,
+}
+PART_COST = 125
+LABOR = 450
+MEMBERSHIP_DISCOUNTS = {
+    "Tier1": {"REPAIR": 0.20, "CUSTOMIZATION": 0.10},
+    "Tier2": {"REPAIR": 0.33, "CUSTOMIZATION": 0.20},
+    "Tier3": {"REPAIR": 0.50, "CUSTOMIZATION": 0.30},
+    "Racer": {"REPAIR": 0.00, "CUSTOMIZATION": 0.00},
+}
+
+# ---------- MEMBERSHIP PRICES -----------
+MEMBERSHIP_PRICES = {"Tier1": 2000, "Tier2": 4000, "Tier3": 6000}
+
+# ---------- COMMISSION & TAX -----------
+COMMISSION_RATES = {
+    "Trainee": 0.10,
+    "Mechanic": 0.15,
+    "Senior Mechanic": 0.18,
+    "Lead Upgrade Specialist": 0.20,
+    "Stock Manager": 0.15,
+    "Manager": 0.25,
+    "CEO": 0.69,
+}
+TAX_RATE = 0.05  # 5% on the commission
+COMMISSION_EXEMPT_TYPES = {"UPGRADES", "MEMBERSHIP"}
+COMMISSION_EXEMPT_ITEMS = {"Harness", "NOS"}  # ITEMS bills with only these earn nothing
+RECOMPUTE_CHUNK_SIZE = 5000
+
+# ---------- LOYALTY ----------
+# Earn 1 point per ₹100 spent on non-membership bills (configurable)
+LOYALTY_EARN_PER_RS = 100  # 1 point per 100 INR
+LOYALTY_EXPIRY_DAYS = 365  # balances with no earn/redeem activity for this long expire
+LOYALTY_KINDS = ["earn", "adjust", "redeem", "expire"]
+
+# ---------- DATABASE ----------
+DB_PATH = "auto_exotic_billing.db"
+SLOW_QUERY_MS = 50  # statements slower than this go to the slow-query log
+# "file": the DB files named here. "memory": one shared-cache in-memory SQLite
+# DB per file name, alive for the life of the process (demos, tests, benchmarks).
+STORAGE_BACKEND = os.environ.get("EXOTICBILL_STORAGE", "file")
+STORAGE_BACKENDS = ("file", "memory")
+
+# ---------- AUDIT ----------
+AUDIT_FLUSH_INTERVAL_S = 0.5   # background writer flushes at least this often
+AUDIT_BATCH_SIZE = 200         # ...or as soon as this many entries are queued
+AUDIT_RETENTION_DAYS = 90      # older rows move to compressed archive files
+AUDIT_ARCHIVE_DIR = "audit_archive"
+AUDIT_ARCHIVE_INTERVAL_S = 3600
+
+# ---------- BILL TIERING ----------
+ARCHIVE_DB_PATH = "auto_exotic_billing_archive.db"
+BILLS_HOT_DAYS = 90        # bills older than this can be moved to the archive DB
+TIERING_BATCH_SIZE = 2000  # rows moved per (short) write transaction
+
+# ---------- ANALYTICS SNAPSHOT ----------
+SNAPSHOT_DB_PATH = "auto_exotic_billing_snapshot.db"
+SNAPSHOT_REFRESH_S = 300             # background refresh period
+SNAPSHOT_MMAP_BYTES = 256 * 1024 * 1024
+SNAPSHOT_CACHE_KIB = 64 * 1024       # PRAGMA cache_size is negative KiB
+SNAPSHOT_BACKUP_PAGES = 256          # pages copied per backup step (each step holds the read lock)
+SNAPSHOT_BACKUP_SLEEP_S = 0.005      # back-off when a writer holds the DB between steps
+SNAPSHOT_BACKUP_RESTARTS = 5         # writes restart the copy; after this many, finish in one step
+
+# ---------- PARQUET ANALYTICS STORE ----------
+PARQUET_DIR = "analytics_parquet"    # <table>/month=YYYY-MM/part-*.parquet
+PARQUET_EXPORT_INTERVAL_S = 600
+PARQUET_EXPORT_BATCH = 50000         # rows read per export step
+AUDIT_ACTIONS = ["UPDATE_EMP", "DELETE_BILL", "DELETE_BILLS", "RESTORE_BILLS", "SHIFT_START", "SHIFT_END",
+                 "TIER_BILLS", "RECOMPUTE_COMMISSION"]
+AUDIT_TABLES = ["employees", "bills", "shifts"]
+
+# ---------- CUSTOMER STATEMENTS ----------
+STATEMENTS_DIR = "statements"   # <YYYY-MM>/<shard>/<cid>-<hash>.html, manifest.jsonl, checkpoint.json
+STATEMENT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+STATEMENT_CHUNK = 500           # customers per worker task and per checkpoint
+
+# ---------- CONSISTENCY CHECKS ----------
+CONSISTENCY_CHUNK = 500          # keys compared per read transaction (and repaired per write transaction)
+CONSISTENCY_TOLERANCE = 0.005    # REAL money columns: smaller differences are rounding, not drift
+
+# ---------- TABLE CACHE ----------
+# Tables whose writes bump table_generations (via triggers), so every replica's
+# in-process caches of them can tell they are stale without re-reading them.
+GENERATION_TABLES = ["items", "employees", "hoods", "memberships", "bills", "bills_deleted", "shifts"]
+# Generations with no trigger behind them: bumped by the code that writes them
+# ("archive": the attached archive tier, which has no triggers).
+GENERATION_MARKERS = ["archive"]
+
+# ---------- QUERY CACHE ----------
+QUERY_CACHE_MAX_BYTES = 64 * 1024 * 1024  # LRU-evicted beyond this (approximate result sizes)
+QUERY_CACHE_TTL_S = 600                   # a cached result is reloaded at least this often
+QUERY_CACHE_TTL_OVERRIDES = {
+    "shifts_by_employee": 120,
+}
+
+# ---------- CHANGE FEED ----------
+# Row images (JSON) that triggers append to change_feed; the first column is the row key.
+FEED_COLUMNS = {
+    "bills": ["id", "employee_cid", "customer_cid", "billing_type", "total_amount", "timestamp", "commission"],
+    "shifts": ["id", "employee_cid", "start_ts", "end_ts", "bills_count", "revenue", "commission"],
+    "memberships": ["customer_cid", "tier", "dop"],
+}
+FEED_CONSUMER_TTL_S = 3600     # consumers not seen for this long stop holding the feed back
+FEED_TRUNCATE_INTERVAL_S = 60
+FEED_REBUILD_ROWS = 20000      # a consumer further behind than this rebuilds instead of replaying
@@ -0,0 +1 @@
+"""Data layer: everything that touches the database, no page rendering."""
@@ -0,0 +1,200 @@
+"""Batched audit log writer, archiving and queries."""
+import atexit
+import gzip
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from exoticbill.config import (
+    AUDIT_ARCHIVE_DIR, AUDIT_ARCHIVE_INTERVAL_S, AUDIT_BATCH_SIZE, AUDIT_FLUSH_INTERVAL_S,
+    AUDIT_RETENTION_DAYS, IST
+)
+from exoticbill.core.db import get_conn, get_query_stats
+
+
+class AuditWriter:
+    """
+    Buffers audit entries in memory and writes them from a background thread
+    in batches, so user actions never wait on an audit INSERT/commit. The same
+    thread periodically applies the retention policy (archive_audit_log).
+    """
+
+    def __init__(self, stats):
+        self.stats = stats
+        self._queue = queue.Queue()
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self._last_archive = 0.0
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def submit(self, entry):
+        with self._flushed:
+            self._pending += 1
+        self._queue.put(entry)
+
+    def flush(self, timeout=5.0):
+        """Block until everything submitted so far has been written."""
+        with self._flushed:
+            self._flushed.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def _drain(self):
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=AUDIT_FLUSH_INTERVAL_S))
+            while len(batch) < AUDIT_BATCH_SIZE:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, conn, batch):
+        rows = [
+            (action, table_name, str(row_id), actor, ts,
+             json.dumps(old_values, default=str) if old_values is not None else None,
+             json.dumps(new_values, default=str) if new_values is not None else None)
+            for action, table_name, row_id, actor, ts, old_values, new_values in batch
+        ]
+        try:
+            with conn:
+                conn.executemany("""
+                  INSERT INTO audit_log (action, table_name, row_id, actor, ts, old_values, new_values)
+                  VALUES (?,?,?,?,?,?,?)
+                """, rows)
+        except sqlite3.Error:
+            # Put the batch back; it is retried on the next cycle.
+            for entry in batch:
+                self._queue.put(entry)
+            time.sleep(AUDIT_FLUSH_INTERVAL_S)
+            return
+        with self._flushed:
+            self._pending -= len(batch)
+            self._flushed.notify_all()
+
+    def _run(self):
+        conn = get_conn(self.stats)
+        while True:
+            batch = self._drain()
+            if batch:
+                self._write(conn, batch)
+            if time.monotonic() - self._last_archive >= AUDIT_ARCHIVE_INTERVAL_S:
+                self._last_archive = time.monotonic()
+                try:
+                    archive_audit_log(conn)
+                except (sqlite3.Error, OSError):
+                    pass
+
+
+@st.cache_resource
+def get_audit_writer():
+    return AuditWriter(get_query_stats())
+
+
+def audit(action, table_name, row_id, actor, old_values=None, new_values=None):
+    get_audit_writer().submit((
+        action, table_name, row_id, actor,
+        datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"),
+        old_values, new_values
+    ))
+
+
+def archive_audit_log(conn=None, retention_days=AUDIT_RETENTION_DAYS, batch_size=5000):
+    """
+    Move audit rows older than retention_days into gzip-compressed JSONL
+    segments, one file per month (AUDIT_ARCHIVE_DIR/audit_YYYY-MM.jsonl.gz).
+    Works in batches: each batch is appended to its segment(s) before the
+    rows are deleted, so a crash can at worst duplicate a batch in the archive.
+    Returns the number of rows archived.
+    """
+    own = conn is None
+    if own:
+        conn = get_conn()
+    cutoff = (datetime.now(IST) - timedelta(days=retention_days)).strftime("%Y-%m-%d %H:%M:%S")
+    cols = ["id", "action", "table_name", "row_id", "actor", "ts", "old_values", "new_values"]
+    moved = 0
+    try:
+        os.makedirs(AUDIT_ARCHIVE_DIR, exist_ok=True)
+        while True:
+            rows = conn.execute(f"""
+                SELECT {", ".join(cols)} FROM audit_log
+                WHERE ts < ? ORDER BY ts, id LIMIT ?
+            """, (cutoff, batch_size)).fetchall()
+            if not rows:
+                break
+            segments = {}
+            for row in rows:
+                segments.setdefault((row[5] or "0000-00")[:7], []).append(dict(zip(cols, row)))
+            for month, entries in segments.items():
+                path = os.path.join(AUDIT_ARCHIVE_DIR, f"audit_{month}.jsonl.gz")
+                # gzip members concatenate, so appending keeps the file readable
+                with gzip.open(path, "at", encoding="utf-8") as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry) + "\n")
+            with conn:
+                conn.executemany("DELETE FROM audit_log WHERE id = ?", [(r[0],) for r in rows])
+            moved += len(rows)
+            if len(rows) < batch_size:
+                break
+    finally:
+        if own:
+            conn.close()
+    return moved
+
+
+def query_audit_log(table_name=None, row_id=None, actor=None, action=None,
+                    entity_cid=None, customer_cid=None, start_str=None, end_str=None,
+                    after=None, limit=100):
+    """
+    One page of audit rows, newest first, using keyset pagination on (ts, id).
+    Pass the returned cursor back as `after` to get the next page; it is None
+    on the last page. Every equality filter has a (col, ts) index.
+    """
+    where, params = [], []
+    for col, val in [("table_name", table_name), ("row_id", row_id), ("actor", actor),
+                     ("action", action), ("entity_cid", entity_cid), ("customer_cid", customer_cid)]:
+        if val:
+            where.append(f"{col} = ?")
+            params.append(val)
+    if start_str:
+        where.append("ts >= ?")
+        params.append(start_str)
+    if end_str:
+        where.append("ts <= ?")
+        params.append(end_str)
+    if after:
+        where.append("(ts, id) < (?, ?)")
+        params.extend(after)
+    sql = """
+        SELECT id, action, table_name, row_id, actor, ts, entity_cid, customer_cid, old_values, new_values
+        FROM audit_log
+    """
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+    params.append(limit + 1)
+    conn = get_conn()
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][5], rows[-1][0])
+    return rows, next_cursor
+
+
+def list_audit_archives():
+    if not os.path.isdir(AUDIT_ARCHIVE_DIR):
+        return []
+    return sorted(
+        (name, os.path.getsize(os.path.join(AUDIT_ARCHIVE_DIR, name)))
+        for name in os.listdir(AUDIT_ARCHIVE_DIR) if name.endswith(".jsonl.gz")
+    )
@@ -0,0 +1,554 @@
+"""Saving, querying, deleting and restoring bills."""
+from datetime import datetime
+
+from exoticbill.config import COMMISSION_RATES, IST, LOYALTY_EARN_PER_RS, TAX_RATE
+from exoticbill.core.audit import audit
+from exoticbill.core.cache import query_cached
+from exoticbill.core.commission import is_commission_exempt
+from exoticbill.core.customers import _customer_bill_added
+from exoticbill.core.db import bump_generation, feed_json, get_conn, insert_bill_row, _table_columns
+from exoticbill.core.loyalty import _post_loyalty
+from exoticbill.core.snapshot import get_analytics_conn, get_analytics_generations, get_snapshot_refresher
+from exoticbill.core.staff import get_employee_details
+from exoticbill.core.tiering import bill_rows_source, bills_source, get_history_conn, has_archive
+
+
+class OutOfStock(Exception):
+    """Raised inside a bill transaction to roll it back; carries {item: (have, need)}."""
+
+    def __init__(self, shortages):
+        super().__init__(", ".join(f"{i} (have {h}, need {n})" for i, (h, n) in shortages.items()))
+        self.shortages = shortages
+
+
+def _take_stock(conn, items, ts, bill_id=None, actor=None):
+    """
+    Decrement stock for {item: qty} on `conn` (caller owns the transaction).
+    Each decrement only applies if enough stock remains, so concurrent sales
+    can never oversell; any shortage raises OutOfStock for the whole set.
+    """
+    shortages = {}
+    for item, qty in items.items():
+        cur = conn.execute(
+            "UPDATE items SET stock = stock - ? WHERE name = ? AND stock >= ?", (qty, item, qty)
+        )
+        if cur.rowcount == 0:
+            row = conn.execute("SELECT stock FROM items WHERE name = ?", (item,)).fetchone()
+            shortages[item] = (row[0] if row else 0, qty)
+    if shortages:
+        raise OutOfStock(shortages)
+    conn.executemany(
+        "INSERT INTO inventory_movements (item, ts, kind, delta, bill_id, actor) VALUES (?, ?, 'sale', ?, ?, ?)",
+        [(item, ts, -qty, bill_id, actor) for item, qty in items.items()]
+    )
+
+
+def save_bill(emp, cust, btype, det, amt, items=None):
+    """
+    Record a bill with everything that depends on it in one transaction.
+    `items` ({name: qty}) is taken from stock all-or-nothing. Returns
+    (ok, message).
+    """
+    now_ist = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    items = {name: int(qty) for name, qty in (items or {}).items() if qty}
+
+    seller = get_employee_details(emp) or {}
+    hood = seller.get("hood") or "No Hood"
+    # bills store whole paise; the shift and customer counters get the same rounded amounts
+    amt = round(amt, 2)
+    if is_commission_exempt(btype, det):
+        commission = 0.0
+        tax = 0.0
+    else:
+        comm_rate = COMMISSION_RATES.get(seller.get("rank") or "Trainee", 0)
+        commission = round(amt * comm_rate, 2)
+        tax = round(commission * TAX_RATE, 2)
+
+    conn = get_conn()
+    try:
+        with conn:
+            bill_id = insert_bill_row(conn, emp, cust, btype, det, amt, now_ist, commission, tax, hood)
+            if items:
+                _take_stock(conn, items, now_ist, bill_id=bill_id, actor=emp)
+            # running counters of the seller's open shift, same transaction
+            conn.execute("""
+                UPDATE shifts
+                SET bills_count = COALESCE(bills_count, 0) + 1,
+                    revenue = COALESCE(revenue, 0) + ?,
+                    commission = COALESCE(commission, 0) + ?
+                WHERE employee_cid = ? AND end_ts IS NULL
+            """, (amt, commission, emp))
+            if cust:
+                _customer_bill_added(conn, cust, now_ist, amt)
+            # loyalty on non-membership bills, same transaction
+            points = int(amt // LOYALTY_EARN_PER_RS)
+            if btype != "MEMBERSHIP" and cust and points > 0:
+                _post_loyalty(conn, cust, "earn", points, now_ist, bill_id=bill_id, actor=emp)
+    except OutOfStock as e:
+        return False, f"Not enough stock: {e}"
+    finally:
+        conn.close()
+    return True, "Bill saved."
+
+
+def _key_of(conn, cid):
+    """
+    cid_keys id of a CID, or None if it has never billed. Readers bind it
+    rather than use a subquery: a bound value reaches each tier's index.
+    """
+    row = conn.execute("SELECT id FROM cid_keys WHERE cid = ?", (cid,)).fetchone()
+    return row and row[0]
+
+
+def get_billing_summary_by_cid(cid):
+    """Per-billing-type and overall sales of one employee in one grouped query."""
+    conn = get_history_conn()
+    summary = dict.fromkeys(["ITEMS", "UPGRADES", "REPAIR", "CUSTOMIZATION", "MEMBERSHIP"], 0.0)
+    total = 0
+    for bt, paise in conn.execute("""
+        SELECT t.name, SUM(amount_paise) FROM bill_rows_all LEFT JOIN billing_types t ON t.code = type_code
+        WHERE employee_key = ? GROUP BY type_code
+    """, (_key_of(conn, cid),)):
+        if bt in summary:
+            summary[bt] = (paise or 0) / 100
+        total += paise or 0
+    conn.close()
+    return summary, total / 100
+
+
+def get_employee_bills_page(cid, after=None, limit=50, newest_first=True):
+    """
+    One page of an employee's bills (both tiers) with keyset pagination on
+    (timestamp, id). Both tiers are read in idx_*_emp_ts order and merged,
+    so a page costs the same however long the history is. Returns
+    (rows, next_cursor); pass the cursor back as `after`.
+    """
+    op, order = ("<", "DESC") if newest_first else (">", "ASC")
+    page = "SELECT * FROM bill_rows_all WHERE employee_key = ?"
+    conn = get_history_conn()
+    try:
+        params = [_key_of(conn, cid)]
+        if after:
+            page += f" AND (timestamp, id) {op} (?, ?)"
+            params.extend(after)
+        page += f" ORDER BY timestamp {order}, id {order} LIMIT ?"
+        params.append(limit + 1)
+        # page on the raw rows first, then decode just the page
+        rows = conn.execute(f"""
+            SELECT b.id, c.cid, t.name, b.details, b.amount_paise / 100.0, b.timestamp,
+                   b.commission_paise / 100.0, b.tax_paise / 100.0
+            FROM ({page}) b
+            LEFT JOIN cid_keys c ON c.id = b.customer_key
+            LEFT JOIN billing_types t ON t.code = b.type_code
+            ORDER BY b.timestamp {order}, b.id {order}
+        """, params).fetchall()
+    finally:
+        conn.close()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = (rows[-1][5], rows[-1][0])
+    return rows, next_cursor
+
+
+def count_employee_bills(cid):
+    conn = get_history_conn()
+    n = conn.execute("SELECT COUNT(*) FROM bill_rows_all WHERE employee_key = ?", (_key_of(conn, cid),)).fetchone()[0]
+    conn.close()
+    return n
+
+
+def get_bill_by_id(bill_id):
+    conn = get_history_conn()
+    row = conn.execute("""
+        SELECT id, employee_cid, customer_cid, billing_type, details,
+               total_amount, timestamp, commission, tax
+        FROM bills_all WHERE id=?
+    """, (bill_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def _bill_filter_sql(ids=None, start_str=None, end_str=None, employee_cid=None,
+                     customer_cid=None, billing_types=None):
+    """WHERE clause + params for the bulk bill APIs; ids are read from temp.bulk_ids."""
+    where, params = [], []
+    if ids is not None:
+        where.append("id IN (SELECT id FROM temp.bulk_ids)")
+    if start_str:
+        where.append("timestamp >= ?")
+        params.append(start_str)
+    if end_str:
+        where.append("timestamp <= ?")
+        params.append(end_str)
+    if employee_cid:
+        where.append("employee_cid = ?")
+        params.append(employee_cid)
+    if customer_cid:
+        where.append("customer_cid = ?")
+        params.append(customer_cid)
+    if billing_types:
+        where.append(f"billing_type IN ({','.join('?' * len(billing_types))})")
+        params.extend(billing_types)
+    if not where:
+        raise ValueError("refusing a bulk bill operation without ids or a filter")
+    return " AND ".join(where), params
+
+
+def _stage_bulk_bills(conn, source, ids, filters):
+    """Copy the matching rows' key fields into temp.bulk_bills (one row per id)."""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_ids (id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.bulk_ids")
+    if ids is not None:
+        conn.executemany("INSERT OR IGNORE INTO temp.bulk_ids (id) VALUES (?)", [(int(i),) for i in ids])
+    where, params = _bill_filter_sql(ids, **filters)
+    conn.execute("DROP TABLE IF EXISTS temp.bulk_bills")
+    conn.execute(f"""
+        CREATE TEMP TABLE bulk_bills AS
+        SELECT id, employee_cid, customer_cid, billing_type, total_amount, timestamp, commission
+        FROM {source} WHERE {where} GROUP BY id
+    """, params)
+    return conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(total_amount), 0) FROM temp.bulk_bills"
+    ).fetchone()
+
+
+def _apply_bill_aggregates(conn, sign):
+    """
+    Add (sign=+1) or remove (sign=-1) every bill in temp.bulk_bills from the
+    aggregates derived from bills: the counters of the shift each bill falls
+    in (open or closed), customers, the payroll cache and the Parquet bills
+    and shifts months. Runs inside the caller's transaction.
+    """
+    in_shift = """b.employee_cid = s.employee_cid AND b.timestamp >= s.start_ts
+                  AND (s.end_ts IS NULL OR b.timestamp <= s.end_ts)"""
+    conn.execute(f"""
+        UPDATE main.shifts AS s SET (bills_count, revenue, commission) = (
+          SELECT COALESCE(s.bills_count, 0) + :s * COUNT(*),
+                 COALESCE(s.revenue, 0) + :s * COALESCE(SUM(b.total_amount), 0),
+                 COALESCE(s.commission, 0) + :s * COALESCE(SUM(b.commission), 0)
+          FROM temp.bulk_bills b WHERE {in_shift}
+        )
+        WHERE s.id IN (SELECT s.id FROM temp.bulk_bills b JOIN main.shifts s ON {in_shift})
+    """, {"s": sign})
+    now = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute(f"""
+        INSERT OR REPLACE INTO main.parquet_dirty (table_name, month, marked_at)
+        SELECT DISTINCT 'shifts', substr(s.start_ts, 1, 7), ? FROM temp.bulk_bills b JOIN main.shifts s ON {in_shift}
+    """, (now,))
+    # first/last seen are visit times: widened on restore, left alone on delete
+    conn.execute("""
+        INSERT INTO main.customers (customer_cid, first_seen, last_seen, bill_count, lifetime_spend)
+        SELECT customer_cid, MIN(timestamp), MAX(timestamp), :s * COUNT(*), :s * COALESCE(SUM(total_amount), 0)
+        FROM temp.bulk_bills WHERE customer_cid IS NOT NULL AND customer_cid != ''
+        GROUP BY customer_cid
+        ON CONFLICT(customer_cid) DO UPDATE SET
+          bill_count = bill_count + excluded.bill_count,
+          lifetime_spend = lifetime_spend + excluded.lifetime_spend,
+          first_seen = CASE WHEN :s > 0
+                            THEN MIN(COALESCE(first_seen, excluded.first_seen), excluded.first_seen)
+                            ELSE first_seen END,
+          last_seen = CASE WHEN :s > 0
+                           THEN MAX(COALESCE(last_seen, excluded.last_seen), excluded.last_seen)
+                           ELSE last_seen END
+    """, {"s": sign})
+    months = "SELECT DISTINCT substr(timestamp, 1, 7) FROM temp.bulk_bills"
+    conn.execute(f"DELETE FROM main.payroll_cache WHERE month IN ({months})")
+    conn.execute(f"DELETE FROM main.payroll_months WHERE month IN ({months})")
+    conn.execute("""
+        INSERT OR REPLACE INTO main.parquet_dirty (table_name, month, marked_at)
+        SELECT DISTINCT 'bills', substr(timestamp, 1, 7), ? FROM temp.bulk_bills
+    """, (now,))
+
+
+def _apply_bill_loyalty(conn, sign, ts, actor):
+    """
+    Take back (sign=-1) the points still outstanding on the staged bills, as
+    far as the balance allows, or re-credit (sign=+1) what earlier
+    deletions took back. Every posting references its bill.
+    """
+    if sign < 0:
+        rows = conn.execute("""
+            SELECT l.bill_id, l.customer_cid, SUM(l.points) FROM main.loyalty_ledger l
+            WHERE l.bill_id IN (SELECT id FROM temp.bulk_bills)
+            GROUP BY l.bill_id, l.customer_cid HAVING SUM(l.points) > 0
+        """).fetchall()
+    else:
+        rows = conn.execute("""
+            SELECT l.bill_id, l.customer_cid,
+                   SUM(CASE WHEN l.kind = 'earn' THEN l.points ELSE 0 END) - SUM(l.points)
+            FROM main.loyalty_ledger l
+            WHERE l.bill_id IN (SELECT id FROM temp.bulk_bills)
+            GROUP BY l.bill_id, l.customer_cid
+            HAVING SUM(CASE WHEN l.kind = 'earn' THEN l.points ELSE 0 END) - SUM(l.points) > 0
+        """).fetchall()
+    for bill_id, cust, pts in rows:
+        if sign < 0:
+            balance = conn.execute(
+                "SELECT points FROM main.loyalty WHERE customer_cid = ?", (cust,)
+            ).fetchone()
+            pts = min(pts, balance[0] if balance else 0)
+            if pts <= 0:
+                continue
+        note = "bill deleted" if sign < 0 else "bill restored"
+        _post_loyalty(conn, cust, "adjust", sign * pts, ts, bill_id=bill_id, actor=actor, note=note)
+
+
+def soft_delete_bills(ids=None, actor="?", start_str=None, end_str=None, employee_cid=None,
+                      customer_cid=None, billing_types=None):
+    """
+    Soft-delete every bill (either tier) matching `ids` and/or the filter,
+    in one transaction: rows are copied to bills_deleted with INSERT ... SELECT,
+    dependent aggregates are reversed and a single audit entry is written.
+    Returns the number of bills deleted.
+    """
+    filters = {"start_str": start_str, "end_str": end_str, "employee_cid": employee_cid,
+               "customer_cid": customer_cid, "billing_types": billing_types}
+    now = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    conn = get_history_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            count, total = _stage_bulk_bills(conn, "bills_all", ids, filters)
+            if count:
+                cols = ", ".join(name for name, _ in _table_columns(conn, "main", "bills"))
+                conn.execute(f"""
+                    INSERT INTO main.bills_deleted ({cols}, deleted_by, deleted_at)
+                    SELECT {cols}, ?, ? FROM bills_all WHERE id IN (SELECT id FROM temp.bulk_bills)
+                """, (actor, now))
+                _apply_bill_aggregates(conn, -1)
+                _apply_bill_loyalty(conn, -1, now, actor)
+                staged = [r[0] for r in conn.execute("SELECT id FROM temp.bulk_bills ORDER BY id")]
+                single = conn.execute("""
+                    SELECT id, employee_cid, customer_cid, billing_type, details, total_amount, timestamp,
+                           commission, tax
+                    FROM bills_all WHERE id = ?
+                """, (staged[0],)).fetchone() if count == 1 else None
+                conn.execute("DELETE FROM main.bill_rows WHERE id IN (SELECT id FROM temp.bulk_bills)")
+                if has_archive(conn):
+                    # no triggers on the archive: feed its deletes by hand
+                    conn.execute(f"""
+                        INSERT INTO main.change_feed (table_name, op, row_key, old)
+                        SELECT 'bills', 'D', id, {feed_json("bills", "b")} FROM archive.bills b
+                        WHERE id IN (SELECT id FROM temp.bulk_bills)
+                    """)
+                    conn.execute("DELETE FROM archive.bill_rows WHERE id IN (SELECT id FROM temp.bulk_bills)")
+                    bump_generation(conn, "archive")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+
+    if not count:
+        return 0
+    if single:
+        keys = ["id", "employee_cid", "customer_cid", "billing_type", "details", "total_amount",
+                "timestamp", "commission", "tax"]
+        audit("DELETE_BILL", "bills", single[0], actor, old_values=dict(zip(keys, single)), new_values=None)
+    else:
+        audit("DELETE_BILLS", "bills", "-", actor,
+              old_values={"ids": staged, "total_amount": total},
+              new_values={"count": count, "filter": {k: v for k, v in filters.items() if v}})
+    get_snapshot_refresher().request_refresh()
+    return count
+
+
+def restore_bills(ids=None, actor="?", start_str=None, end_str=None, employee_cid=None,
+                  customer_cid=None, billing_types=None):
+    """
+    Inverse of soft_delete_bills: move matching rows from bills_deleted (either
+    tier) back into main.bills and re-apply the aggregates. Bills whose id is
+    live again are skipped. Returns the number restored.
+    """
+    filters = {"start_str": start_str, "end_str": end_str, "employee_cid": employee_cid,
+               "customer_cid": customer_cid, "billing_types": billing_types}
+    now = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    conn = get_history_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _stage_bulk_bills(conn, "bills_deleted_all", ids, filters)
+            conn.execute("DELETE FROM temp.bulk_bills WHERE id IN (SELECT id FROM bills_all)")
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(total_amount), 0) FROM temp.bulk_bills"
+            ).fetchone()
+            if count:
+                cols = ", ".join(name for name, _ in _table_columns(conn, "main", "bills"))
+                conn.execute(f"""
+                    INSERT INTO main.bills ({cols})
+                    SELECT {cols} FROM bills_deleted_all
+                    WHERE id IN (SELECT id FROM temp.bulk_bills) GROUP BY id
+                """)
+                _apply_bill_aggregates(conn, 1)
+                _apply_bill_loyalty(conn, 1, now, actor)
+                staged = [r[0] for r in conn.execute("SELECT id FROM temp.bulk_bills ORDER BY id")]
+                conn.execute("DELETE FROM main.bills_deleted WHERE id IN (SELECT id FROM temp.bulk_bills)")
+                if has_archive(conn):
+                    conn.execute("DELETE FROM archive.bills_deleted WHERE id IN (SELECT id FROM temp.bulk_bills)")
+                    bump_generation(conn, "archive")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+
+    if not count:
+        return 0
+    audit("RESTORE_BILLS", "bills", staged[0] if count == 1 else "-", actor,
+          old_values=None,
+          new_values={"ids": staged, "count": count, "total_amount": total,
+                      "filter": {k: v for k, v in filters.items() if v}})
+    get_snapshot_refresher().request_refresh()
+    return count
+
+
+def soft_delete_bill(bill_id, actor):
+    return soft_delete_bills([bill_id], actor) > 0
+
+
+@query_cached("deleted_bills", ("bills_deleted", "archive"))
+def get_deleted_bills(start_str=None, end_str=None, employee_cid=None, limit=500):
+    conn = get_history_conn()
+    sql = """
+        SELECT id, employee_cid, customer_cid, billing_type, details, total_amount, timestamp,
+               deleted_by, deleted_at
+        FROM bills_deleted_all WHERE 1=1
+    """
+    params = []
+    if start_str and end_str:
+        sql += " AND timestamp >= ? AND timestamp <= ?"
+        params += [start_str, end_str]
+    if employee_cid:
+        sql += " AND employee_cid = ?"
+        params.append(employee_cid)
+    sql += " ORDER BY deleted_at DESC LIMIT ?"
+    params.append(limit)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def get_all_customers():
+    conn = get_conn()
+    rows = conn.execute("SELECT customer_cid FROM customers WHERE bill_count > 0 ORDER BY customer_cid").fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+def get_customer_bills(cid):
+    conn = get_history_conn()
+    try:
+        rows = conn.execute("""
+            SELECT e.cid, t.name, b.details, b.amount_paise / 100.0, b.timestamp,
+                   b.commission_paise / 100.0, b.tax_paise / 100.0
+            FROM (SELECT * FROM bill_rows_all WHERE customer_key = ?) b
+            LEFT JOIN cid_keys e ON e.id = b.employee_key
+            LEFT JOIN billing_types t ON t.code = b.type_code
+            ORDER BY b.timestamp DESC
+        """, (_key_of(conn, cid),)).fetchall()
+        return rows
+    finally:
+        conn.close()
+
+
+def get_total_billing():
+    conn = get_history_conn()
+    total = (conn.execute("SELECT SUM(amount_paise) FROM bill_rows_all").fetchone()[0] or 0) / 100
+    conn.close()
+    return total
+
+
+def get_bill_count():
+    conn = get_history_conn()
+    cnt = conn.execute("SELECT COUNT(*) FROM bill_rows_all").fetchone()[0] or 0
+    conn.close()
+    return cnt
+
+
+def get_total_commission_and_tax():
+    conn = get_history_conn()
+    row = conn.execute("SELECT SUM(commission_paise), SUM(tax_paise) FROM bill_rows_all").fetchone()
+    conn.close()
+    return ((row[0] or 0) / 100, (row[1] or 0) / 100)
+
+
+# ---------- HOOD WAR ----------
+def get_hood_leaderboard(conn, source, start_str, end_str):
+    """
+    Revenue per hood from the hood frozen on each bill, so moving an
+    employee does not move their past revenue. Served by idx_bills_hood_ts
+    without touching employees; hoods with no sales are listed at zero.
+    """
+    revenue = {hood: paise / 100 for hood, paise in conn.execute(f"""
+      SELECT COALESCE(hood, 'No Hood'), COALESCE(SUM(amount_paise), 0)
+      FROM {bill_rows_source(source)}
+      WHERE timestamp >= ? AND timestamp <= ?
+      GROUP BY hood
+    """, (start_str, end_str))}
+    for (name,) in conn.execute("SELECT name FROM hoods").fetchall():
+        revenue.setdefault(name, 0.0)
+    return sorted(revenue.items(), key=lambda kv: kv[1], reverse=True)
+
+
+@query_cached("hood_war", ("bills", "hoods", "archive"), generations=get_analytics_generations)
+def get_hood_war(start_str, end_str):
+    """Hood War leaderboard for a range, from the analytics snapshot."""
+    source = bills_source(start_str)
+    conn = get_analytics_conn(history=source == "bills_all")
+    try:
+        return get_hood_leaderboard(conn, source, start_str, end_str)
+    finally:
+        conn.close()
+
+
+# ---------- BILL LOGS HELPER ----------
+@query_cached("bill_logs", ("bills", "employees", "archive"), generations=get_analytics_generations)
+def _analytics_bill_logs(start_str, end_str):
+    return _query_bill_logs(start_str, end_str, analytics=True)
+
+
+def get_bill_logs(start_str=None, end_str=None, analytics=False):
+    """
+    Bill Logs rows, newest first. Analytics reads are cached: the range is
+    widened to whole hours, so a rolling window ("Last 7 days") reuses one
+    entry across reruns, then cut back to [start_str, end_str].
+    """
+    if analytics and start_str and end_str:
+        rows = _analytics_bill_logs(start_str[:13] + ":00:00", end_str[:13] + ":59:59")
+        return [r for r in rows if start_str <= r[1] <= end_str]
+    return _query_bill_logs(start_str, end_str, analytics)
+
+
+def _query_bill_logs(start_str, end_str, analytics):
+    source = bills_source(start_str)
+    if analytics:
+        conn = get_analytics_conn(history=source == "bills_all")
+    else:
+        conn = get_history_conn() if source == "bills_all" else get_conn()
+    c = conn.cursor()
+    rows_sql = f"SELECT * FROM {bill_rows_source(source)}"
+    params = ()
+    if start_str and end_str:
+        rows_sql += " WHERE timestamp >= ? AND timestamp <= ?"
+        params = (start_str, end_str)
+    base_sql = f"""
+        SELECT
+            b.id, b.timestamp,
+            COALESCE(e.name, 'Unknown') AS emp_name,
+            ek.cid,
+            COALESCE(b.hood, 'No Hood') AS hood,
+            ck.cid, t.name, b.details,
+            b.amount_paise / 100.0, b.commission_paise / 100.0, b.tax_paise / 100.0
+        FROM ({rows_sql}) b
+        LEFT JOIN cid_keys ek ON ek.id = b.employee_key
+        LEFT JOIN cid_keys ck ON ck.id = b.customer_key
+        LEFT JOIN billing_types t ON t.code = b.type_code
+        LEFT JOIN employees e ON e.cid = ek.cid
+        ORDER BY b.timestamp DESC, b.id DESC
+    """
+    rows = c.execute(base_sql, params).fetchall()
+    conn.close()
+    return rows
@@ -0,0 +1,236 @@
+"""In-process caches that stay correct when other processes write the same DB."""
+import functools
+import inspect
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from exoticbill.config import (
+    GENERATION_MARKERS, GENERATION_TABLES, QUERY_CACHE_MAX_BYTES, QUERY_CACHE_TTL_OVERRIDES, QUERY_CACHE_TTL_S
+)
+from exoticbill.core.db import db_location
+
+
+# ---------- TABLE CACHE ----------
+class TableCache:
+    """
+    Values keyed by call, each tagged with the generations of the tables it
+    was read from. A lookup first asks `PRAGMA data_version` on a private
+    connection, which changes only when some other connection (in any
+    process) has committed; only then is the tiny table_generations table
+    re-read (and entries it made stale are dropped). An entry is served while
+    its tables' generations still match. Cached values are shared between
+    sessions: treat them as read-only.
+    """
+
+    def __init__(self, path=None):
+        self._lock = threading.Lock()
+        database, uri = (path, False) if path else db_location()
+        self._conn = sqlite3.connect(database, uri=uri, check_same_thread=False)
+        self._data_version = None
+        self._generations = {}
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def generations(self):
+        """Current {table: generation}; costs one PRAGMA unless something committed."""
+        with self._lock:
+            return self._current_generations()
+
+    def _current_generations(self):
+        """generations() with self._lock already held."""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            gens = dict(self._conn.execute(
+                "SELECT table_name, generation FROM table_generations"
+            ).fetchall())
+            self.entries = {key: e for key, e in self.entries.items()
+                            if e[1] == tuple(gens.get(t) for t in e[0])}
+            self._generations, self._data_version = gens, version
+        return self._generations
+
+    def get(self, key, tables, load):
+        # tag with the generations seen *before* loading: a write racing the
+        # load leaves an older tag behind, so the next lookup reloads.
+        # The lock is released only while `load` runs.
+        with self._lock:
+            gens = self._current_generations()
+            tag = tuple(gens.get(t) for t in tables)
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] == tag:
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+        value = load()
+        with self._lock:
+            self.entries[key] = (tables, tag, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+@st.cache_resource
+def get_table_cache():
+    return TableCache()
+
+
+def table_cached(*tables):
+    """Cache a read helper per argument tuple until one of `tables` is written (by any process)."""
+    unknown = set(tables) - set(GENERATION_TABLES)
+    if unknown:
+        raise ValueError(f"no generation triggers on {sorted(unknown)}; add them to GENERATION_TABLES")
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+            return get_table_cache().get(key, tables, lambda: fn(*args, **kwargs))
+        wrapper.uncached = fn
+        return wrapper
+    return decorate
+
+
+# ---------- QUERY RESULT CACHE ----------
+def result_bytes(value, sample=64):
+    """
+    Approximate in-memory size of a query result (rows of tuples/dicts of
+    scalars). Long lists are sized from `sample` evenly spaced rows.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(result_bytes(k) + result_bytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        if len(value) > sample:
+            step = len(value) / sample
+            picked = [value[int(i * step)] for i in range(sample)]
+            return size + int(sum(result_bytes(v) for v in picked) * len(value) / sample)
+        return size + sum(result_bytes(v) for v in value)
+    return size
+
+
+class QueryCache:
+    """
+    Results of read queries keyed by (query name, normalized arguments), each
+    tagged with the generations of the tables it read: an entry is served
+    while the tags match and its TTL has not passed. Least recently used
+    entries are evicted once the results' total size passes `max_bytes`.
+    Per-query counters feed the Performance page.
+    """
+
+    def __init__(self, max_bytes=QUERY_CACHE_MAX_BYTES):
+        self._lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # (name, params) -> (tag, value, size, expires_at)
+        self.bytes = 0
+        self.stats = {}
+
+    def _stats(self, name):
+        entry = self.stats.get(name)
+        if entry is None:
+            entry = {"hits": 0, "misses": 0, "stale": 0, "expired": 0, "evictions": 0, "load_ms": 0.0}
+            self.stats[name] = entry
+        return entry
+
+    def _drop(self, key):
+        self.bytes -= self.entries.pop(key)[2]
+
+    def get(self, name, params, tag, load, ttl):
+        key = (name, params)
+        with self._lock:
+            stats = self._stats(name)
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] == tag and entry[3] > time.monotonic():
+                    self.entries.move_to_end(key)
+                    stats["hits"] += 1
+                    return entry[1]
+                stats["stale" if entry[0] != tag else "expired"] += 1
+                self._drop(key)
+            stats["misses"] += 1
+        t0 = time.perf_counter()
+        value = load()
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        size = result_bytes(value)
+        with self._lock:
+            stats["load_ms"] += elapsed_ms
+            if size > self.max_bytes:
+                return value
+            if key in self.entries:  # another session loaded it meanwhile
+                self._drop(key)
+            self.entries[key] = (tag, value, size, time.monotonic() + ttl)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                old_key = next(iter(self.entries))
+                self._drop(old_key)
+                self._stats(old_key[0])["evictions"] += 1
+        return value
+
+    def snapshot(self):
+        """One summary dict per query name, most lookups first."""
+        with self._lock:
+            held = {}
+            for (name, _), entry in self.entries.items():
+                count, size = held.get(name, (0, 0))
+                held[name] = (count + 1, size + entry[2])
+            out = []
+            for name, s in self.stats.items():
+                lookups = s["hits"] + s["misses"]
+                out.append(dict(
+                    s, query=name, lookups=lookups,
+                    hit_rate=s["hits"] / lookups if lookups else 0.0,
+                    avg_load_ms=s["load_ms"] / s["misses"] if s["misses"] else 0.0,
+                    entries=held.get(name, (0, 0))[0], bytes=held.get(name, (0, 0))[1],
+                    ttl_s=QUERY_CACHE_TTL_OVERRIDES.get(name, QUERY_CACHE_TTL_S),
+                ))
+        out.sort(key=lambda r: r["lookups"], reverse=True)
+        return out
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+
+
+@st.cache_resource
+def get_query_cache():
+    return QueryCache()
+
+
+def query_cached(name, tables, generations=None):
+    """
+    Cache a read query's result per argument values (defaults filled in, so
+    f(a) and f(a, limit=500) share an entry) until one of `tables` changes
+    generation, its TTL (QUERY_CACHE_TTL_OVERRIDES, else QUERY_CACHE_TTL_S)
+    passes or it is evicted. `generations` returns the {table: generation}
+    of the data the query reads; default: the live DB's.
+    """
+    unknown = set(tables) - set(GENERATION_TABLES) - set(GENERATION_MARKERS)
+    if unknown:
+        raise ValueError(f"no generations for {sorted(unknown)}; add them to GENERATION_TABLES")
+    ttl = QUERY_CACHE_TTL_OVERRIDES.get(name, QUERY_CACHE_TTL_S)
+
+    def decorate(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            gens = (generations or get_table_cache().generations)()
+            tag = tuple(gens.get(t) for t in tables)
+            return get_query_cache().get(name, tuple(bound.arguments.items()), tag,
+                                         lambda: fn(*args, **kwargs), ttl)
+        wrapper.uncached = fn
+        return wrapper
+    return decorate
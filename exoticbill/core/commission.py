@@ -0,0 +1,166 @@
+"""Commission rules and recomputation."""
+from exoticbill.config import COMMISSION_EXEMPT_ITEMS, COMMISSION_EXEMPT_TYPES, RECOMPUTE_CHUNK_SIZE
+from exoticbill.core.audit import audit
+from exoticbill.core.db import paise_sql, to_paise
+from exoticbill.core.parquet import mark_parquet_dirty
+from exoticbill.core.payroll import invalidate_payroll_cache
+from exoticbill.core.tiering import get_history_conn, has_archive
+
+
+def is_commission_exempt(btype, det):
+    # Commission rules:
+    # - No commission/tax on UPGRADES and MEMBERSHIP
+    # - No commission/tax on ITEMS if ONLY Harness and/or NOS are present
+    if btype in COMMISSION_EXEMPT_TYPES:
+        return True
+    if btype == "ITEMS":
+        item_names = []
+        if det:
+            try:
+                item_names = [i.strip().split("×")[0] for i in det.split(",") if i.strip()]
+            except Exception:
+                item_names = []
+        if item_names and all(name in COMMISSION_EXEMPT_ITEMS for name in item_names):
+            return True
+    return False
+
+
+def commission_exempt_mask(df):
+    """Vectorized is_commission_exempt over a frame with billing_type/details columns."""
+    exempt = df["billing_type"].isin(COMMISSION_EXEMPT_TYPES)
+    is_items = df["billing_type"].eq("ITEMS")
+    if is_items.any():
+        names = df.loc[is_items, "details"].fillna("").str.split(",").explode().str.strip()
+        names = names[names != ""].str.split("×").str[0]
+        only_exempt = names.isin(COMMISSION_EXEMPT_ITEMS).groupby(level=0).all()
+        exempt = exempt | only_exempt.reindex(df.index, fill_value=False)
+    return exempt
+
+
+# ---------- COMMISSION RECOMPUTATION ----------
+def plan_commission_recompute(conn, start_str, end_str, rates, tax_rate,
+                              employee_cids=None, chunk_size=RECOMPUTE_CHUNK_SIZE):
+    """
+    Recalculate commission/tax for bills in [start_str, end_str] (optionally
+    only `employee_cids`) from `rates` (rank -> rate) and `tax_rate`, using
+    each employee's current rank and the save_bill exemption rules. Bills are
+    read in id-keyed chunks and computed vectorized. `conn` must come from
+    get_history_conn() so archived bills are included. Returns only the bills
+    whose values change, as a DataFrame with a `tier` column (main/archive).
+    """
+    import pandas as pd
+    ranks = dict(conn.execute("SELECT cid, rank FROM employees").fetchall())
+    tiers = ["main"] + (["archive"] if has_archive(conn) else [])
+    emp_filter, emp_params = "", []
+    if employee_cids:
+        emp_filter = f" AND employee_cid IN ({','.join('?' * len(employee_cids))})"
+        emp_params = list(employee_cids)
+    cols = ["id", "employee_cid", "billing_type", "details", "total_amount", "timestamp", "commission", "tax"]
+    changes = []
+    for tier in tiers:
+        last_id = 0
+        while True:
+            rows = conn.execute(f"""
+                SELECT {', '.join(cols)} FROM {tier}.bills
+                WHERE timestamp >= ? AND timestamp <= ?{emp_filter} AND id > ?
+                ORDER BY id LIMIT ?
+            """, [start_str, end_str, *emp_params, last_id, chunk_size]).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            df = pd.DataFrame(rows, columns=cols)
+            rate = df["employee_cid"].map(lambda c: ranks.get(c) or "Trainee").map(rates).fillna(0.0)
+            # to the paisa, as save_bill stores them
+            new_comm = (df["total_amount"].fillna(0.0) * rate).where(~commission_exempt_mask(df), 0.0).round(2)
+            df["new_commission"] = new_comm
+            df["new_tax"] = (new_comm * tax_rate).round(2)
+            diff = ((df["new_commission"] - df["commission"].fillna(0.0)).abs() > 1e-6) | \
+                   ((df["new_tax"] - df["tax"].fillna(0.0)).abs() > 1e-6)
+            if diff.any():
+                changes.append(df[diff].assign(tier=tier))
+            if len(rows) < chunk_size:
+                break
+    if not changes:
+        return pd.DataFrame(columns=cols + ["new_commission", "new_tax", "tier"])
+    return pd.concat(changes, ignore_index=True)
+
+
+def _apply_shift_commission(conn, changes):
+    """
+    Add each changed bill's commission delta to the employee's shift whose
+    start_ts..end_ts holds the bill (open or closed), as bulk delete/restore
+    do. Runs inside the caller's transaction; returns the start months of
+    the shifts it changed.
+    """
+    conn.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS recompute_bills (employee_cid TEXT, timestamp TEXT, delta_paise INTEGER)
+    """)
+    conn.execute("DELETE FROM temp.recompute_bills")
+    bills = changes.assign(old=changes["commission"].fillna(0.0))
+    conn.executemany("INSERT INTO temp.recompute_bills VALUES (?, ?, ?)", [
+        (emp, ts, to_paise(new) - to_paise(old)) for emp, ts, old, new
+        in bills[["employee_cid", "timestamp", "old", "new_commission"]].itertuples(index=False, name=None)
+    ])
+    in_shift = """b.employee_cid = s.employee_cid AND b.timestamp >= s.start_ts
+                  AND (s.end_ts IS NULL OR b.timestamp <= s.end_ts)"""
+    touched = f"SELECT s.id FROM temp.recompute_bills b JOIN main.shifts s ON {in_shift}"
+    months = [r[0] for r in conn.execute(
+        f"SELECT DISTINCT substr(start_ts, 1, 7) FROM main.shifts WHERE id IN ({touched}) ORDER BY 1")]
+    conn.execute(f"""
+        UPDATE main.shifts AS s SET commission = COALESCE(s.commission, 0) + (
+          SELECT SUM(b.delta_paise) / 100.0 FROM temp.recompute_bills b WHERE {in_shift}
+        )
+        WHERE s.id IN ({touched})
+    """)
+    return months
+
+
+def recompute_commissions(start_str, end_str, rates, tax_rate, employee_cids=None,
+                          dry_run=True, actor="system"):
+    """
+    Dry run: return the diff. Otherwise re-plan and apply it inside one
+    BEGIN IMMEDIATE transaction (so the diff cannot go stale), move each
+    changed bill's commission delta onto the shift it falls in (open or
+    closed), write one audit summary and drop cached payroll and Parquet
+    months for the touched bills and shifts.
+    """
+    conn = get_history_conn()
+    try:
+        if dry_run:
+            return plan_commission_recompute(conn, start_str, end_str, rates, tax_rate, employee_cids)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            changes = plan_commission_recompute(conn, start_str, end_str, rates, tax_rate, employee_cids)
+            for tier, part in changes.groupby("tier"):
+                conn.executemany(
+                    f"UPDATE {tier}.bill_rows SET commission_paise = {paise_sql('?')}, tax_paise = {paise_sql('?')} "
+                    "WHERE id = ?",
+                    part[["new_commission", "new_tax", "id"]].itertuples(index=False, name=None)
+                )
+            shift_months = _apply_shift_commission(conn, changes)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+
+    if not changes.empty:
+        for month in sorted(changes["timestamp"].str[:7].unique()):
+            invalidate_payroll_cache(month)
+            mark_parquet_dirty("bills", month)
+        for month in shift_months:
+            mark_parquet_dirty("shifts", month)
+        audit("RECOMPUTE_COMMISSION", "bills", "-", actor, old_values={
+            "commission": round(float(changes["commission"].fillna(0).sum()), 2),
+            "tax": round(float(changes["tax"].fillna(0).sum()), 2),
+        }, new_values={
+            "period": [start_str, end_str],
+            "employees": employee_cids or "ALL",
+            "rates": rates,
+            "tax_rate": tax_rate,
+            "bills": int(len(changes)),
+            "commission": round(float(changes["new_commission"].sum()), 2),
+            "tax": round(float(changes["new_tax"].sum()), 2),
+        })
+    return changes
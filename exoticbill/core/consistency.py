@@ -0,0 +1,471 @@
+"""Consistency checks: derived tables recomputed from their sources, chunk by chunk."""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from exoticbill.config import CONSISTENCY_CHUNK, CONSISTENCY_TOLERANCE, IST
+from exoticbill.core.db import get_conn, get_meta, set_meta
+from exoticbill.core.feed import last_feed_seq
+from exoticbill.core.tiering import get_history_conn, has_archive
+
+
+# ---------- SOURCES ----------
+def _bill_tiers(conn):
+    """
+    (table, condition) per bills tier, as bills_all reads them (`:hot` =
+    bills_hot_since). The encoded bill_rows: both tiers share main's keys.
+    """
+    tiers = [("main.bill_rows", "1")]
+    if has_archive(conn):
+        tiers.append(("archive.bill_rows", "b.timestamp < :hot"))
+    return tiers
+
+
+def _billed_customers(tier):
+    """Key-space source: the CIDs with a bill in `tier`, in cid order."""
+    return (f"(SELECT k.cid AS customer_cid FROM main.cid_keys k "
+            f"WHERE EXISTS (SELECT 1 FROM {tier}.bill_rows b WHERE b.customer_key = k.id))")
+
+
+def _marks(conn):
+    """High-water marks of the append-only sources that record what changed."""
+    return {
+        "feed": last_feed_seq(conn),
+        "loyalty_ledger": conn.execute("SELECT COALESCE(MAX(id), 0) FROM main.loyalty_ledger").fetchone()[0],
+        "inventory_movements": conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM main.inventory_movements").fetchone()[0],
+        "membership_history": conn.execute(
+            "SELECT COALESCE(MAX(rowid), 0) FROM main.membership_history").fetchone()[0],
+    }
+
+
+def _feed(conn, table, old, new):
+    """(row_key, [row images]) for `table`'s change_feed rows between two marks."""
+    for row_key, before, after in conn.execute(
+        "SELECT row_key, old, new FROM main.change_feed WHERE seq > ? AND seq <= ? AND table_name = ?",
+        (old["feed"], new["feed"], table)
+    ):
+        yield row_key, [json.loads(image) for image in (before, after) if image]
+
+
+# ---------- CHANGED KEYS ----------
+def _changed_loyalty(conn, old, new, params):
+    return {r[0] for r in conn.execute(
+        "SELECT DISTINCT customer_cid FROM main.loyalty_ledger WHERE id > ? AND id <= ?",
+        (old["loyalty_ledger"], new["loyalty_ledger"])
+    )}
+
+
+def _changed_customers(conn, old, new, params):
+    keys = _changed_loyalty(conn, old, new, params)
+    for _, images in _feed(conn, "bills", old, new):
+        keys.update(image["customer_cid"] for image in images if image["customer_cid"])
+    keys.update(key for key, _ in _feed(conn, "memberships", old, new))
+    return keys
+
+
+def _changed_shifts(conn, old, new, params):
+    """Shifts written since `old`, plus the shifts whose window holds a bill written since."""
+    keys = {int(key) for key, _ in _feed(conn, "shifts", old, new)}
+    spans = {}
+    for _, images in _feed(conn, "bills", old, new):
+        for image in images:
+            emp, ts = image["employee_cid"], image["timestamp"]
+            if emp and ts:
+                lo, hi = spans.get(emp, (ts, ts))
+                spans[emp] = (min(lo, ts), max(hi, ts))
+    for emp, (lo, hi) in spans.items():
+        keys.update(r[0] for r in conn.execute(
+            "SELECT id FROM main.shifts WHERE employee_cid = ? AND start_ts <= ? AND (end_ts IS NULL OR end_ts >= ?)",
+            (emp, hi, lo)
+        ))
+    return keys
+
+
+def _changed_inventory(conn, old, new, params):
+    return {r[0] for r in conn.execute(
+        "SELECT DISTINCT item FROM main.inventory_movements WHERE id > ? AND id <= ?",
+        (old["inventory_movements"], new["inventory_movements"])
+    )}
+
+
+def _changed_memberships(conn, old, new, params):
+    """Memberships written or archived since `old`, plus every one past its 7 days."""
+    keys = {key for key, _ in _feed(conn, "memberships", old, new)}
+    keys.update(r[0] for r in conn.execute(
+        "SELECT customer_cid FROM main.membership_history WHERE rowid > ? AND rowid <= ?",
+        (old["membership_history"], new["membership_history"])
+    ))
+    keys.update(r[0] for r in conn.execute(
+        "SELECT customer_cid FROM main.memberships WHERE dop <= ?", (params["cutoff"],)
+    ))
+    return keys
+
+
+# ---------- COMPARISONS ----------
+# Each returns: key, the derived fields, then the same fields recomputed from source, for the keys in :keys.
+LOYALTY_SQL = """
+    SELECT k.value, COALESCE(l.points, 0),
+           (SELECT COALESCE(SUM(g.points), 0) FROM main.loyalty_ledger g WHERE g.customer_cid = k.value)
+    FROM json_each(:keys) k
+    LEFT JOIN main.loyalty l ON l.customer_cid = k.value
+"""
+
+INVENTORY_SQL = """
+    SELECT k.value, COALESCE(i.stock, 0),
+           (SELECT COALESCE(SUM(m.delta), 0) FROM main.inventory_movements m WHERE m.item = k.value)
+    FROM json_each(:keys) k
+    LEFT JOIN main.items i ON i.name = k.value
+"""
+
+# NULL source tier: the membership is past its 7 days, or already in membership_history
+MEMBERSHIPS_SQL = """
+    SELECT m.customer_cid, m.tier,
+           CASE WHEN m.dop <= :cutoff OR EXISTS (
+                  SELECT 1 FROM main.membership_history h
+                  WHERE h.expired_at = datetime(m.dop, '+7 days') AND h.customer_cid = m.customer_cid
+                    AND h.dop = m.dop)
+                THEN NULL ELSE m.tier END
+    FROM main.memberships m
+    WHERE m.customer_cid IN (SELECT value FROM json_each(:keys))
+"""
+
+
+def _customers_sql(conn):
+    # per-tier arms (not bills_all) so the key filter reaches each tier's index
+    bills = " UNION ALL ".join(f"""
+        SELECT k.cid AS customer_cid, b.amount_paise FROM main.cid_keys k
+        JOIN {table} b ON b.customer_key = k.id
+        WHERE k.cid IN (SELECT value FROM json_each(:keys)) AND {cond}
+    """ for table, cond in _bill_tiers(conn))
+    return f"""
+        SELECT k.value, COALESCE(c.bill_count, 0), COALESCE(c.lifetime_spend, 0), c.membership_tier,
+               COALESCE(c.loyalty_points, 0),
+               COALESCE(b.n, 0), COALESCE(b.spend, 0), m.tier,
+               (SELECT COALESCE(SUM(g.points), 0) FROM main.loyalty_ledger g WHERE g.customer_cid = k.value)
+        FROM json_each(:keys) k
+        LEFT JOIN main.customers c ON c.customer_cid = k.value
+        LEFT JOIN main.memberships m ON m.customer_cid = k.value
+        LEFT JOIN (
+          SELECT customer_cid, COUNT(*) AS n, SUM(amount_paise) / 100.0 AS spend FROM ({bills}) GROUP BY customer_cid
+        ) b ON b.customer_cid = k.value
+    """
+
+
+def _shifts_sql(conn):
+    """A shift's counters cover its employee's bills from start_ts to end_ts (to now while open)."""
+    per_tier = " UNION ALL ".join(f"""
+        SELECT s.id, COUNT(*) AS n, SUM(b.amount_paise) / 100.0 AS revenue,
+               SUM(b.commission_paise) / 100.0 AS commission
+        FROM main.shifts s
+        JOIN main.cid_keys k ON k.cid = s.employee_cid
+        JOIN {table} b ON b.employee_key = k.id AND b.timestamp >= s.start_ts
+                      AND b.timestamp <= COALESCE(s.end_ts, '9999-12-31') AND {cond}
+        WHERE s.id IN (SELECT value FROM json_each(:keys))
+        GROUP BY s.id
+    """ for table, cond in _bill_tiers(conn))
+    return f"""
+        SELECT s.id, COALESCE(s.bills_count, 0), COALESCE(s.revenue, 0), COALESCE(s.commission, 0),
+               COALESCE(t.n, 0), COALESCE(t.revenue, 0), COALESCE(t.commission, 0)
+        FROM main.shifts s
+        LEFT JOIN (
+          SELECT id, SUM(n) AS n, SUM(revenue) AS revenue, SUM(commission) AS commission
+          FROM ({per_tier}) GROUP BY id
+        ) t ON t.id = s.id
+        WHERE s.id IN (SELECT value FROM json_each(:keys))
+    """
+
+
+# ---------- REPAIRS ----------
+def _repair_memberships(conn, rows):
+    """Finish the expiry purge_expired_memberships would have done for these customers."""
+    keys = json.dumps([r["key"] for r in rows])
+    conn.execute("""
+        INSERT INTO main.membership_history (customer_cid, tier, dop, expired_at)
+        SELECT m.customer_cid, m.tier, m.dop, datetime(m.dop, '+7 days') FROM main.memberships m
+        WHERE m.customer_cid IN (SELECT value FROM json_each(?))
+          AND NOT EXISTS (SELECT 1 FROM main.membership_history h
+                          WHERE h.expired_at = datetime(m.dop, '+7 days') AND h.customer_cid = m.customer_cid
+                            AND h.dop = m.dop)
+    """, (keys,))
+    conn.execute("DELETE FROM main.memberships WHERE customer_cid IN (SELECT value FROM json_each(?))", (keys,))
+    conn.execute("UPDATE main.customers SET membership_tier = NULL "
+                 "WHERE customer_cid IN (SELECT value FROM json_each(?))", (keys,))
+
+
+class Check:
+    """
+    One derived table: the tables its keys come from, the comparison with
+    its sources, what changed since a set of marks, and the repair (SQL run
+    per drifted key with :key and the recomputed fields, or a callable).
+    """
+
+    def __init__(self, name, label, fields, keys, compare, changed, repair=None, feed=False, first=""):
+        self.name = name
+        self.label = label
+        self.fields = fields
+        self.keys = keys          # [(table, column)]; their union is the key space of a full pass
+        self.compare = compare    # SQL, or callable(conn) -> SQL
+        self.changed = changed    # callable(conn, old_marks, new_marks, params) -> set of keys
+        self.repair = repair
+        self.feed = feed          # reads change_feed, so a truncated feed forces a full pass
+        self.first = first        # keyset scans start after this key
+
+
+CHECKS = {check.name: check for check in [
+    Check("loyalty", "Loyalty balances vs. ledger", ["points"],
+          [("main.loyalty", "customer_cid"), ("main.loyalty_ledger", "customer_cid")],
+          LOYALTY_SQL, _changed_loyalty,
+          repair="""
+              INSERT INTO main.loyalty (customer_cid, points) VALUES (:key, :points)
+              ON CONFLICT(customer_cid) DO UPDATE SET points = excluded.points
+          """),
+    Check("customers", "Customers vs. bills, memberships and ledger",
+          ["bill_count", "lifetime_spend", "membership_tier", "loyalty_points"],
+          [("main.customers", "customer_cid"), (_billed_customers("main"), "customer_cid"),
+           (_billed_customers("archive"), "customer_cid"),
+           ("main.memberships", "customer_cid"), ("main.loyalty_ledger", "customer_cid")],
+          _customers_sql, _changed_customers, feed=True,
+          repair="""
+              INSERT INTO main.customers (customer_cid, bill_count, lifetime_spend, membership_tier, loyalty_points)
+              VALUES (:key, :bill_count, :lifetime_spend, :membership_tier, :loyalty_points)
+              ON CONFLICT(customer_cid) DO UPDATE SET
+                bill_count = excluded.bill_count, lifetime_spend = excluded.lifetime_spend,
+                membership_tier = excluded.membership_tier, loyalty_points = excluded.loyalty_points
+          """),
+    Check("shifts", "Shift counters vs. bills in the shift", ["bills_count", "revenue", "commission"],
+          [("main.shifts", "id")], _shifts_sql, _changed_shifts, feed=True, first=0,
+          repair="""
+              UPDATE main.shifts SET bills_count = :bills_count, revenue = :revenue, commission = :commission
+              WHERE id = :key
+          """),
+    Check("inventory", "Item stock vs. inventory movements", ["stock"],
+          [("main.items", "name"), ("main.inventory_movements", "item")],
+          INVENTORY_SQL, _changed_inventory,
+          repair="UPDATE main.items SET stock = :stock WHERE name = :key"),
+    Check("memberships", "Active memberships vs. expiry and history", ["tier"],
+          [("main.memberships", "customer_cid")], MEMBERSHIPS_SQL, _changed_memberships, feed=True,
+          repair=_repair_memberships),
+]}
+
+
+# ---------- CHECK RUNS ----------
+def _differs(derived, source):
+    if isinstance(derived, (int, float)) and isinstance(source, (int, float)):
+        return abs(derived - source) > CONSISTENCY_TOLERANCE
+    return derived != source
+
+
+def _compare(conn, check, sql, keys, params):
+    """{key: ([(field, derived, source)], {field: source})} for the drifted keys among `keys`."""
+    n = len(check.fields)
+    drift = {}
+    for row in conn.execute(sql, dict(params, keys=json.dumps(keys))).fetchall():
+        key, derived, source = row[0], row[1:1 + n], row[1 + n:]
+        bad = [(f, d, s) for f, d, s in zip(check.fields, derived, source) if _differs(d, s)]
+        if bad:
+            drift[key] = (bad, dict(zip(check.fields, source)))
+    return drift
+
+
+def _key_space_sql(conn, check):
+    """Next :n keys after :after across the check's key tables (each arm is itself an index range)."""
+    arms = [(table, col) for table, col in check.keys if "archive." not in table or has_archive(conn)]
+    return " UNION ".join(
+        f"SELECT key FROM (SELECT DISTINCT {col} AS key FROM {table} WHERE {col} > :after ORDER BY 1 LIMIT :n)"
+        for table, col in arms
+    ) + " ORDER BY 1 LIMIT :n"
+
+
+def _feed_lost(conn, check, marks):
+    """True if feed rows past `marks` were truncated or include a reset, so changes can't be listed."""
+    if not check.feed:
+        return False
+    if marks["feed"] < int(get_meta(conn, "feed_truncated_through", 0)):
+        return True
+    return conn.execute(
+        "SELECT 1 FROM main.change_feed WHERE seq > ? AND op = 'R' LIMIT 1", (marks["feed"],)
+    ).fetchone() is not None
+
+
+def _open_drift(conn, check):
+    """Keys with unrepaired drift on record; every incremental run checks them again."""
+    cast = type(check.first)
+    return {cast(r[0]) for r in conn.execute(
+        "SELECT DISTINCT row_key FROM main.consistency_drift WHERE check_name = ? AND repaired_at IS NULL",
+        (check.name,)
+    )}
+
+
+def _settle(conn, check, sql, keys, drift, params, repair, state):
+    """
+    One short write transaction per chunk: re-compare the drifted keys under
+    the write lock and repair them (if asked), replace the chunk's rows in
+    consistency_drift and save the checkpoint. Returns (drifted, repaired).
+    """
+    now = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    repaired = set()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if drift and repair and check.repair:
+            drift = _compare(conn, check, sql, list(drift), params)
+            rows = [dict(source, key=key) for key, (_, source) in drift.items()]
+            if callable(check.repair):
+                check.repair(conn, rows)
+            else:
+                conn.executemany(check.repair, rows)
+            repaired = set(drift)
+        if keys:
+            conn.execute(
+                "DELETE FROM main.consistency_drift "
+                "WHERE check_name = ? AND row_key IN (SELECT CAST(value AS TEXT) FROM json_each(?))",
+                (check.name, json.dumps(keys))
+            )
+        conn.executemany(
+            "INSERT INTO main.consistency_drift (check_name, row_key, field, derived, source, found_at, repaired_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(check.name, str(key), field, d, s, now, now if key in repaired else None)
+             for key, (bad, _) in drift.items() for field, d, s in bad]
+        )
+        set_meta(conn, f"consistency:{check.name}", json.dumps(state))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(drift), len(repaired)
+
+
+def run_check(name, repair=False, full=False, chunk=CONSISTENCY_CHUNK, progress=None):
+    """
+    Compare one derived table with its sources, `chunk` keys per short read
+    transaction, reporting drift to consistency_drift and (repair=True)
+    fixing it. The first run, full=True, or a feed that lost the changes
+    since the last run does a full pass over every key, checkpointed after
+    each chunk so an interrupted pass resumes; otherwise only the keys
+    changed since the last run (and those with open drift) are checked.
+    `progress(name, checked)` is called after every chunk. Returns the
+    run's summary.
+    """
+    check = CHECKS[name]
+    t0 = time.perf_counter()
+    cutoff = (datetime.now(IST) - timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = get_history_conn()
+    try:
+        conn.execute("BEGIN")  # marks and changed keys from one read snapshot
+        state = json.loads(get_meta(conn, f"consistency:{name}", "{}"))
+        params = {"hot": get_meta(conn, "bills_hot_since") or "", "cutoff": cutoff}
+        if full or not state.get("full") and (not state.get("marks") or _feed_lost(conn, check, state["marks"])):
+            state["full"] = {"after": check.first, "marks": _marks(conn)}
+        mode = "full" if state.get("full") else "incremental"
+        if mode == "incremental":
+            marks = _marks(conn)
+            pending = sorted(check.changed(conn, state["marks"], marks, params) | _open_drift(conn, check))
+        conn.commit()
+
+        sql = check.compare(conn) if callable(check.compare) else check.compare
+        key_space = _key_space_sql(conn, check)
+        checked = drifted = fixed = 0
+        longest = 0.0  # slowest read or write step of the run, lock waits included
+        while True:
+            t1 = time.perf_counter()
+            conn.execute("BEGIN")
+            if mode == "full":
+                keys = [r[0] for r in conn.execute(key_space, {"after": state["full"]["after"], "n": chunk})]
+                done = len(keys) < chunk
+            else:
+                keys, pending = pending[:chunk], pending[chunk:]
+                done = not pending
+            drift = _compare(conn, check, sql, keys, params) if keys else {}
+            conn.commit()
+            t2 = time.perf_counter()
+            if mode == "full" and keys:
+                state["full"]["after"] = keys[-1]
+            if done:
+                state["marks"] = state["full"]["marks"] if mode == "full" else marks
+                state["full"] = None
+            found, repaired = _settle(conn, check, sql, keys, drift, params, repair, state)
+            longest = max(longest, t2 - t1, time.perf_counter() - t2)
+            checked += len(keys)
+            drifted += found
+            fixed += repaired
+            if progress:
+                progress(name, checked)
+            if done:
+                break
+            time.sleep(0.01)  # let waiting writers in between chunks
+
+        state["last_run"] = {
+            "at": datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"), "mode": mode, "checked": checked,
+            "drift": drifted, "repaired": fixed, "ms": round((time.perf_counter() - t0) * 1000, 1),
+            "max_step_ms": round(longest * 1000, 1),
+        }
+        with conn:
+            set_meta(conn, f"consistency:{name}", json.dumps(state))
+        return dict(state["last_run"], check=name)
+    finally:
+        conn.close()
+
+
+def run_consistency(names=None, repair=False, full=False, chunk=CONSISTENCY_CHUNK):
+    """
+    Run the checks in `names` (default all) in parallel, one thread and
+    connection each. Afterwards the checker's oldest feed mark is saved as
+    the "consistency" feed consumer, so the feed keeps what the next
+    incremental run needs. Returns one summary per check.
+    """
+    names = list(names or CHECKS)
+    with ThreadPoolExecutor(len(names), thread_name_prefix="consistency") as pool:
+        results = list(pool.map(lambda n: run_check(n, repair=repair, full=full, chunk=chunk), names))
+
+    conn = get_conn()
+    try:
+        positions = []
+        for name, check in CHECKS.items():
+            state = json.loads(get_meta(conn, f"consistency:{name}", "{}"))
+            if check.feed:
+                positions += [m["feed"] for m in (state.get("marks"), (state.get("full") or {}).get("marks")) if m]
+        if positions:
+            with conn:
+                conn.execute("""
+                    INSERT INTO feed_consumers (name, position, seen_at) VALUES ('consistency', ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET position = excluded.position, seen_at = excluded.seen_at
+                """, (min(positions), datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")))
+    finally:
+        conn.close()
+    return results
+
+
+def get_consistency_status():
+    """Per check: last run summary, full-pass progress and drift currently on record."""
+    conn = get_conn()
+    try:
+        open_drift = dict(conn.execute("""
+            SELECT check_name, COUNT(DISTINCT row_key) FROM consistency_drift
+            WHERE repaired_at IS NULL GROUP BY check_name
+        """).fetchall())
+        out = []
+        for name, check in CHECKS.items():
+            state = json.loads(get_meta(conn, f"consistency:{name}", "{}"))
+            out.append({
+                "check": name, "label": check.label, "last_run": state.get("last_run"),
+                "full_pass_after": (state.get("full") or {}).get("after"),
+                "open_drift": open_drift.get(name, 0),
+            })
+        return out
+    finally:
+        conn.close()
+
+
+def get_drift(check=None, limit=500):
+    conn = get_conn()
+    sql = "SELECT check_name, row_key, field, derived, source, found_at, repaired_at FROM consistency_drift"
+    params = []
+    if check:
+        sql += " WHERE check_name = ?"
+        params.append(check)
+    sql += " ORDER BY found_at DESC, check_name, row_key LIMIT ?"
+    params.append(limit)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
@@ -0,0 +1,104 @@
+"""The customers table: one row per customer CID, maintained with every bill."""
+from datetime import datetime
+
+from exoticbill.config import IST
+from exoticbill.core.db import get_conn, set_meta
+from exoticbill.core.tiering import get_history_conn
+
+
+# ---------- CUSTOMERS ----------
+def _customer_bill_added(conn, customer_cid, ts, amount):
+    """Fold one new bill into the customer's row (caller owns the transaction)."""
+    conn.execute("""
+        INSERT INTO customers (customer_cid, first_seen, last_seen, bill_count, lifetime_spend)
+        VALUES (?, ?, ?, 1, ?)
+        ON CONFLICT(customer_cid) DO UPDATE SET
+          first_seen = MIN(COALESCE(first_seen, excluded.first_seen), excluded.first_seen),
+          last_seen = MAX(COALESCE(last_seen, excluded.last_seen), excluded.last_seen),
+          bill_count = bill_count + 1,
+          lifetime_spend = lifetime_spend + excluded.lifetime_spend
+    """, (customer_cid, ts, ts, amount or 0.0))
+
+
+def _set_customer_field(conn, customer_cid, column, value):
+    conn.execute(f"""
+        INSERT INTO customers (customer_cid, {column}) VALUES (?, ?)
+        ON CONFLICT(customer_cid) DO UPDATE SET {column} = excluded.{column}
+    """, (customer_cid, value))
+
+
+def rebuild_customers(conn=None):
+    """Recompute every customers row from bills (both tiers), memberships and loyalty."""
+    own = conn is None
+    if own:
+        conn = get_history_conn()
+    try:
+        with conn:
+            conn.execute("DELETE FROM main.customers")
+            conn.execute("""
+                INSERT INTO main.customers (customer_cid, first_seen, last_seen, bill_count, lifetime_spend)
+                SELECT k.cid, b.first_seen, b.last_seen, b.n, b.paise / 100.0
+                FROM (SELECT customer_key, MIN(timestamp) AS first_seen, MAX(timestamp) AS last_seen,
+                             COUNT(*) AS n, COALESCE(SUM(amount_paise), 0) AS paise
+                      FROM bill_rows_all WHERE customer_key IS NOT NULL GROUP BY customer_key) b
+                JOIN main.cid_keys k ON k.id = b.customer_key
+                WHERE k.cid != ''
+            """)
+            # WHERE true: an upsert's SELECT needs a clause to parse unambiguously
+            conn.execute("""
+                INSERT INTO main.customers (customer_cid, membership_tier)
+                SELECT customer_cid, tier FROM main.memberships WHERE true
+                ON CONFLICT(customer_cid) DO UPDATE SET membership_tier = excluded.membership_tier
+            """)
+            conn.execute("""
+                INSERT INTO main.customers (customer_cid, loyalty_points)
+                SELECT customer_cid, points FROM main.loyalty WHERE true
+                ON CONFLICT(customer_cid) DO UPDATE SET loyalty_points = excluded.loyalty_points
+            """)
+            set_meta(conn, "customers_built_at", datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"))
+    finally:
+        if own:
+            conn.close()
+
+
+def search_customers(prefix, limit=25):
+    """
+    CIDs starting with `prefix`, as a range scan on the primary key
+    (LIKE would not use the index under the default case-insensitive rules).
+    """
+    prefix = (prefix or "").strip()
+    if not prefix:
+        return []
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT customer_cid FROM customers WHERE customer_cid >= ? AND customer_cid < ? "
+        "ORDER BY customer_cid LIMIT ?",
+        (prefix, upper, limit)
+    ).fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+def get_recent_customers(limit=25):
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT customer_cid FROM customers WHERE last_seen IS NOT NULL ORDER BY last_seen DESC LIMIT ?",
+        (limit,)
+    ).fetchall()
+    conn.close()
+    return [r[0] for r in rows]
+
+
+def get_customer(cid):
+    conn = get_conn()
+    row = conn.execute("""
+        SELECT customer_cid, first_seen, last_seen, bill_count, lifetime_spend, membership_tier, loyalty_points
+        FROM customers WHERE customer_cid = ?
+    """, (cid,)).fetchone()
+    conn.close()
+    if not row:
+        return None
+    keys = ["customer_cid", "first_seen", "last_seen", "bill_count", "lifetime_spend",
+            "membership_tier", "loyalty_points"]
+    return dict(zip(keys, row))
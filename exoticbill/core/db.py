@@ -0,0 +1,968 @@
+"""Connections, query instrumentation, app_meta and the schema (init_db)."""
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import streamlit as st
+
+from exoticbill.config import (
+    DB_PATH, FEED_COLUMNS, GENERATION_MARKERS, GENERATION_TABLES, IST, SLOW_QUERY_MS, SNAPSHOT_DB_PATH,
+    STORAGE_BACKEND, STORAGE_BACKENDS
+)
+
+
+# ========== QUERY INSTRUMENTATION ==========
+class QueryStats:
+    """
+    Process-wide per-statement counters (calls, latency samples, rows) plus a
+    bounded slow-query log. Shared across reruns via st.cache_resource.
+    """
+
+    def __init__(self, sample_size=512, slow_log_size=200):
+        self._lock = threading.Lock()
+        self.sample_size = sample_size
+        self.slow_ms = SLOW_QUERY_MS
+        self.statements = {}
+        self.slow_log = deque(maxlen=slow_log_size)
+
+    @staticmethod
+    def normalize(sql):
+        return re.sub(r"\s+", " ", sql).strip()
+
+    def _entry(self, sql):
+        entry = self.statements.get(sql)
+        if entry is None:
+            entry = {
+                "calls": 0, "total_ms": 0.0, "rows": 0, "plan": None,
+                "samples": deque(maxlen=self.sample_size),
+            }
+            self.statements[sql] = entry
+        return entry
+
+    def needs_plan(self, sql):
+        entry = self.statements.get(sql)
+        return entry is None or entry["plan"] is None
+
+    def record(self, sql, elapsed_ms, plan=None):
+        with self._lock:
+            entry = self._entry(sql)
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["samples"].append(elapsed_ms)
+            if plan is not None:
+                entry["plan"] = plan
+
+    def add_rows(self, sql, rows, elapsed_ms):
+        with self._lock:
+            entry = self._entry(sql)
+            entry["rows"] += rows
+            entry["total_ms"] += elapsed_ms
+            if entry["samples"]:
+                entry["samples"][-1] += elapsed_ms
+
+    def log_slow(self, sql, params, elapsed_ms, plan):
+        with self._lock:
+            self.slow_log.append({
+                "ts": datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"),
+                "sql": sql,
+                "params": repr(params)[:200],
+                "ms": round(elapsed_ms, 2),
+                "plan": plan or [],
+            })
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.slow_log.clear()
+
+    @staticmethod
+    def _percentile(sorted_samples, pct):
+        if not sorted_samples:
+            return 0.0
+        k = min(len(sorted_samples) - 1, int(round(pct / 100.0 * (len(sorted_samples) - 1))))
+        return sorted_samples[k]
+
+    def snapshot(self):
+        """Return one summary dict per statement, heaviest total time first."""
+        with self._lock:
+            items = [(sql, dict(e, samples=sorted(e["samples"]))) for sql, e in self.statements.items()]
+        out = []
+        for sql, e in items:
+            samples = e["samples"]
+            out.append({
+                "sql": sql,
+                "calls": e["calls"],
+                "total_ms": e["total_ms"],
+                "avg_ms": e["total_ms"] / e["calls"] if e["calls"] else 0.0,
+                "p50_ms": self._percentile(samples, 50),
+                "p95_ms": self._percentile(samples, 95),
+                "p99_ms": self._percentile(samples, 99),
+                "rows": e["rows"],
+                "plan": e["plan"] or [],
+                "full_scan": plan_has_full_scan(e["plan"] or []),
+            })
+        out.sort(key=lambda r: r["total_ms"], reverse=True)
+        return out
+
+
+def plan_has_full_scan(plan):
+    """True if an EXPLAIN QUERY PLAN detail list contains a table scan without an index."""
+    for detail in plan:
+        if detail.startswith("SCAN ") and "USING" not in detail and "CONSTANT ROW" not in detail:
+            return True
+    return False
+
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+@st.cache_resource
+def get_query_stats():
+    return QueryStats()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times every statement and counts the rows fetched from it."""
+
+    _stmt = None
+
+    def _explain(self, sql, params):
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        try:
+            cur = sqlite3.Cursor(self.connection)
+            rows = cur.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            return [r[3] for r in rows]
+        except sqlite3.Error:
+            return None
+
+    def execute(self, sql, params=()):
+        stats = self.connection.stats
+        t0 = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            elapsed_ms = (time.perf_counter() - t0) * 1000.0
+            key = QueryStats.normalize(sql)
+            self._stmt = key
+            plan = None
+            slow = elapsed_ms >= stats.slow_ms
+            if slow or stats.needs_plan(key):
+                plan = self._explain(sql, params)
+            stats.record(key, elapsed_ms, plan)
+            if slow:
+                stats.log_slow(key, params, elapsed_ms, plan)
+
+    def executemany(self, sql, seq_of_params):
+        stats = self.connection.stats
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            key = QueryStats.normalize(sql)
+            self._stmt = key
+            stats.record(key, (time.perf_counter() - t0) * 1000.0)
+
+    def executescript(self, script):
+        stats = self.connection.stats
+        t0 = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            self._stmt = None
+            stats.record(QueryStats.normalize(script), (time.perf_counter() - t0) * 1000.0)
+
+    def _fetched(self, rows, t0):
+        if self._stmt is not None:
+            self.connection.stats.add_rows(self._stmt, rows, (time.perf_counter() - t0) * 1000.0)
+
+    def fetchone(self):
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(0 if row is None else 1, t0)
+        return row
+
+    def fetchmany(self, size=None):
+        t0 = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(len(rows), t0)
+        return rows
+
+    def fetchall(self):
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(len(rows), t0)
+        return rows
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements all go through InstrumentedCursor."""
+
+    stats = None
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def executescript(self, script):
+        return self.cursor().executescript(script)
+
+
+# ========== STORAGE BACKEND ==========
+_memory_keepers = {}
+_memory_lock = threading.Lock()
+
+
+def _memory_uri(path):
+    return f"file:{os.path.splitext(os.path.basename(path))[0]}?mode=memory&cache=shared"
+
+
+def db_location(path=DB_PATH):
+    """
+    (database, uri) for sqlite3.connect to open `path` (DB_PATH,
+    ARCHIVE_DB_PATH, ...) on STORAGE_BACKEND. "memory" maps each file name
+    to a shared-cache in-memory DB that a keeper connection holds open for
+    the life of the process.
+    """
+    if STORAGE_BACKEND not in STORAGE_BACKENDS:
+        raise ValueError(f"STORAGE_BACKEND must be one of {STORAGE_BACKENDS}, got {STORAGE_BACKEND!r}")
+    if STORAGE_BACKEND == "file":
+        return path, False
+    database = _memory_uri(path)
+    with _memory_lock:
+        if database not in _memory_keepers:
+            _memory_keepers[database] = sqlite3.connect(database, uri=True, check_same_thread=False)
+    return database, True
+
+
+def db_exists(path):
+    """Whether `path` has been created on STORAGE_BACKEND (file on disk / in-memory DB opened)."""
+    if STORAGE_BACKEND == "memory":
+        return _memory_uri(path) in _memory_keepers
+    return os.path.exists(path)
+
+
+def get_conn(stats=None, path=None, uri=False):
+    if path is None:
+        path, uri = db_location()
+    conn = sqlite3.connect(path, factory=InstrumentedConnection, uri=uri)
+    conn.stats = stats or get_query_stats()
+    return conn
+
+
+def get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM main.app_meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO main.app_meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def _table_columns(conn, schema, table):
+    return [(row[1], row[2]) for row in conn.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+
+
+def bump_generation(conn, name):
+    """Invalidate cached reads of `name` (a GENERATION_MARKERS entry) inside the caller's transaction."""
+    conn.execute("UPDATE main.table_generations SET generation = generation + 1 WHERE table_name = ?", (name,))
+
+
+def feed_json(table, alias, raw=False):
+    """
+    SQL json_object(...) of FEED_COLUMNS[table] for row `alias` (NEW, OLD or a
+    table alias). raw=True: `alias` is a row of the physical table (bill_rows
+    for bills), whose encoded columns are decoded.
+    """
+    decode = BILL_DECODE if raw else {}
+    return "json_object(" + ", ".join(
+        f"'{col}', " + decode.get(col, "{a}.{col}").format(a=alias, col=col) for col in FEED_COLUMNS[table]
+    ) + ")"
+
+
+# ========== COMPACT BILL ROWS ==========
+# Bills are stored in bill_rows: money in integer paise, the billing type and
+# the employee/customer CIDs as small integer keys into billing_types and
+# cid_keys. `bills` is a view with the original columns and INSTEAD OF
+# triggers, so existing reads and occasional writes keep working; the write
+# paths and money sums use bill_rows (a SUM of paise is exact). The archive
+# tier has its own copy of both dictionaries (see sync_bill_keys).
+PHYSICAL_TABLES = {"bills": "bill_rows"}
+# bills view column -> its bill_rows column, and the SQL decoding a row `a`
+BILL_ENCODING = {
+    "employee_cid": "employee_key",
+    "customer_cid": "customer_key",
+    "billing_type": "type_code",
+    "total_amount": "amount_paise",
+    "commission": "commission_paise",
+    "tax": "tax_paise",
+}
+BILL_DECODE = {
+    "employee_cid": "(SELECT cid FROM cid_keys WHERE id = {a}.employee_key)",
+    "customer_cid": "(SELECT cid FROM cid_keys WHERE id = {a}.customer_key)",
+    "billing_type": "(SELECT name FROM billing_types WHERE code = {a}.type_code)",
+    "total_amount": "{a}.amount_paise / 100.0",
+    "commission": "{a}.commission_paise / 100.0",
+    "tax": "{a}.tax_paise / 100.0",
+}
+BILL_VIEW_COLUMNS = ["id", "employee_cid", "customer_cid", "billing_type", "details", "total_amount",
+                     "timestamp", "commission", "tax", "hood"]
+
+
+def paise_sql(expr):
+    """SQL rounding a rupee amount to integer paise (NULL stays NULL)."""
+    return f"CAST(round(({expr}) * 100) AS INTEGER)"
+
+
+def cid_key(conn, cid):
+    """Integer key of an employee/customer CID, added to cid_keys on first use (None for None)."""
+    if cid is None:
+        return None
+    row = conn.execute("SELECT id FROM main.cid_keys WHERE cid = ?", (cid,)).fetchone()
+    if row is None:
+        # the SELECT above ran before the write transaction: another counter
+        # may have added the same CID since, so add it only if still missing
+        conn.execute("INSERT OR IGNORE INTO main.cid_keys (cid) VALUES (?)", (cid,))
+        row = conn.execute("SELECT id FROM main.cid_keys WHERE cid = ?", (cid,)).fetchone()
+    return row[0]
+
+
+def billing_type_code(conn, name):
+    """Integer code of a billing type, added to billing_types on first use (None for None)."""
+    if name is None:
+        return None
+    row = conn.execute("SELECT code FROM main.billing_types WHERE name = ?", (name,)).fetchone()
+    if row is None:  # see cid_key
+        conn.execute("INSERT OR IGNORE INTO main.billing_types (name) VALUES (?)", (name,))
+        row = conn.execute("SELECT code FROM main.billing_types WHERE name = ?", (name,)).fetchone()
+    return row[0]
+
+
+def insert_bill_row(conn, employee_cid, customer_cid, billing_type, details, total_amount, timestamp,
+                    commission=0, tax=0, hood=None):
+    """Insert one bill into bill_rows on `conn` (caller owns the transaction); returns its id."""
+    return conn.execute("""
+        INSERT INTO main.bill_rows
+          (employee_key, customer_key, type_code, details, amount_paise, timestamp, commission_paise, tax_paise, hood)
+        VALUES (?,?,?,?,?,?,?,?,?)
+    """, (cid_key(conn, employee_cid), cid_key(conn, customer_cid), billing_type_code(conn, billing_type), details,
+          to_paise(total_amount), timestamp, to_paise(commission or 0), to_paise(tax or 0), hood)).lastrowid
+
+
+def to_paise(amount):
+    """Rupees -> integer paise; the same float steps as SQLite's round(), so it agrees with paise_sql."""
+    if amount is None:
+        return None
+    x = float(amount) * 100
+    return int(x + 0.5) if x >= 0 else -int(-x + 0.5)
+
+
+def sync_bill_keys(conn):
+    """Copy dictionary entries main has and the attached archive lacks (keys only ever grow)."""
+    conn.execute("""
+        INSERT INTO archive.cid_keys (id, cid) SELECT id, cid FROM main.cid_keys
+        WHERE id > (SELECT COALESCE(MAX(id), 0) FROM archive.cid_keys)
+    """)
+    conn.execute("""
+        INSERT INTO archive.billing_types (code, name) SELECT code, name FROM main.billing_types
+        WHERE code > (SELECT COALESCE(MAX(code), 0) FROM archive.billing_types)
+    """)
+
+
+def _convert_legacy_bills(conn, schema):
+    """Replace `schema`.bills (REAL money, TEXT keys) by bill_rows, keeping ids and the id sequence."""
+    cols = {name for name, _ in _table_columns(conn, schema, "bills")}
+    pick = {col: (f"b.{col}" if col in cols else "NULL") for col in BILL_VIEW_COLUMNS}
+    # keys are only ever assigned by main, so both tiers agree on them
+    conn.execute(f"""
+        INSERT INTO main.cid_keys (cid)
+        SELECT cid FROM (SELECT b.employee_cid AS cid FROM {schema}.bills b
+                         UNION SELECT b.customer_cid FROM {schema}.bills b)
+        WHERE cid IS NOT NULL AND cid NOT IN (SELECT cid FROM main.cid_keys)
+    """)
+    conn.execute(f"""
+        INSERT INTO main.billing_types (name)
+        SELECT DISTINCT b.billing_type FROM {schema}.bills b
+        WHERE b.billing_type IS NOT NULL AND b.billing_type NOT IN (SELECT name FROM main.billing_types)
+    """)
+    if schema != "main":
+        sync_bill_keys(conn)
+    conn.execute(f"""
+        INSERT INTO {schema}.bill_rows
+          (id, employee_key, customer_key, type_code, details, amount_paise, timestamp,
+           commission_paise, tax_paise, hood)
+        SELECT b.id, e.id, c.id, t.code, {pick["details"]}, {paise_sql(pick["total_amount"])}, {pick["timestamp"]},
+               {paise_sql(pick["commission"])}, {paise_sql(pick["tax"])}, {pick["hood"]}
+        FROM {schema}.bills b
+        LEFT JOIN {schema}.cid_keys e ON e.cid = b.employee_cid
+        LEFT JOIN {schema}.cid_keys c ON c.cid = b.customer_cid
+        LEFT JOIN {schema}.billing_types t ON t.name = b.billing_type
+    """)
+    if schema == "main":  # AUTOINCREMENT: never reuse an id, e.g. of a soft-deleted bill
+        seq = conn.execute("SELECT seq FROM main.sqlite_sequence WHERE name = 'bills'").fetchone()
+        if seq:
+            conn.execute("DELETE FROM main.sqlite_sequence WHERE name = 'bill_rows'")
+            conn.execute("""
+                INSERT INTO main.sqlite_sequence (name, seq)
+                SELECT 'bill_rows', MAX(?, COALESCE((SELECT MAX(id) FROM main.bill_rows), 0))
+            """, (seq[0],))
+    conn.execute(f"DROP TABLE {schema}.bills")
+
+
+def ensure_bill_rows(conn, schema="main"):
+    """
+    bill_rows, its dictionaries and the `bills` view in `schema`, converting
+    a legacy bills table on the way. In main the view's INSERT/UPDATE
+    triggers add unseen CIDs and billing types to the dictionaries; in the
+    archive (a copy of main's) they refuse keys main has not assigned.
+    """
+    conn.execute(f"""
+      CREATE TABLE IF NOT EXISTS {schema}.billing_types (
+        code INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+      )
+    """)
+    conn.execute(f"""
+      CREATE TABLE IF NOT EXISTS {schema}.cid_keys (
+        id INTEGER PRIMARY KEY,
+        cid TEXT NOT NULL UNIQUE
+      )
+    """)
+    conn.execute(f"""
+      CREATE TABLE IF NOT EXISTS {schema}.bill_rows (
+        id INTEGER PRIMARY KEY{" AUTOINCREMENT" if schema == "main" else ""},
+        employee_key INTEGER,
+        customer_key INTEGER,
+        type_code INTEGER,
+        details TEXT,
+        amount_paise INTEGER,
+        timestamp TEXT,
+        commission_paise INTEGER DEFAULT 0,
+        tax_paise INTEGER DEFAULT 0,
+        hood TEXT
+      )
+    """)
+    legacy = conn.execute(f"SELECT type FROM {schema}.sqlite_master WHERE name = 'bills'").fetchone()
+    if legacy and legacy[0] == "table":
+        _convert_legacy_bills(conn, schema)
+        if schema == "main" and os.path.exists(SNAPSHOT_DB_PATH):
+            os.remove(SNAPSHOT_DB_PATH)  # still the old layout; rebuilt on first analytics read
+    conn.execute(f"""
+      CREATE VIEW IF NOT EXISTS {schema}.bills AS
+      SELECT b.id, e.cid AS employee_cid, c.cid AS customer_cid, t.name AS billing_type, b.details,
+             b.amount_paise / 100.0 AS total_amount, b.timestamp,
+             b.commission_paise / 100.0 AS commission, b.tax_paise / 100.0 AS tax, b.hood
+      FROM bill_rows b
+      LEFT JOIN cid_keys e ON e.id = b.employee_key
+      LEFT JOIN cid_keys c ON c.id = b.customer_key
+      LEFT JOIN billing_types t ON t.code = b.type_code
+    """)
+    if schema == "main":
+        add_keys = """
+          INSERT INTO cid_keys (cid)
+          SELECT DISTINCT v FROM (SELECT NEW.employee_cid AS v UNION ALL SELECT NEW.customer_cid)
+          WHERE v IS NOT NULL AND v NOT IN (SELECT cid FROM cid_keys);
+          INSERT INTO billing_types (name) SELECT NEW.billing_type
+          WHERE NEW.billing_type IS NOT NULL AND NEW.billing_type NOT IN (SELECT name FROM billing_types);
+        """
+    else:
+        add_keys = """
+          SELECT RAISE(ABORT, 'CID or billing type not in the archive dictionaries')
+          WHERE (NEW.employee_cid IS NOT NULL AND NEW.employee_cid NOT IN (SELECT cid FROM cid_keys))
+             OR (NEW.customer_cid IS NOT NULL AND NEW.customer_cid NOT IN (SELECT cid FROM cid_keys))
+             OR (NEW.billing_type IS NOT NULL AND NEW.billing_type NOT IN (SELECT name FROM billing_types));
+        """
+    encoded = {
+        "id": "NEW.id",
+        "employee_key": "(SELECT id FROM cid_keys WHERE cid = NEW.employee_cid)",
+        "customer_key": "(SELECT id FROM cid_keys WHERE cid = NEW.customer_cid)",
+        "type_code": "(SELECT code FROM billing_types WHERE name = NEW.billing_type)",
+        "details": "NEW.details",
+        "amount_paise": paise_sql("NEW.total_amount"),
+        "timestamp": "NEW.timestamp",
+        "commission_paise": paise_sql("COALESCE(NEW.commission, 0)"),
+        "tax_paise": paise_sql("COALESCE(NEW.tax, 0)"),
+        "hood": "NEW.hood",
+    }
+    conn.execute(f"""
+      CREATE TRIGGER IF NOT EXISTS {schema}.trg_bills_view_insert INSTEAD OF INSERT ON bills
+      BEGIN
+        {add_keys}
+        INSERT INTO bill_rows ({", ".join(encoded)}) VALUES ({", ".join(encoded.values())});
+      END
+    """)
+    conn.execute(f"""
+      CREATE TRIGGER IF NOT EXISTS {schema}.trg_bills_view_update INSTEAD OF UPDATE ON bills
+      BEGIN
+        {add_keys}
+        UPDATE bill_rows SET {", ".join(f"{col} = {expr}" for col, expr in encoded.items())} WHERE id = OLD.id;
+      END
+    """)
+    conn.execute(f"""
+      CREATE TRIGGER IF NOT EXISTS {schema}.trg_bills_view_delete INSTEAD OF DELETE ON bills
+      BEGIN
+        DELETE FROM bill_rows WHERE id = OLD.id;
+      END
+    """)
+
+
+# ========== INDEXES ==========
+# The deliberate index set: name -> "table(columns) [WHERE ...]", each with
+# the page query it serves. init_db syncs it on every start (a changed
+# definition is rebuilt under the same name) and benchmarks/index_plans.py
+# checks that every page query plans through the index listed for it.
+# idx_shifts_one_open (unique, partial) is created with its migration.
+INDEXES = {
+    # bills (stored in bill_rows); tiering.ARCHIVE_INDEXES mirrors these on the archive tier
+    # Bill Logs, Live Stats, tiering; covers Payroll's per-employee sums over a date range,
+    # so that plan is a range seek whatever the table size (no stats-dependent skip-scan)
+    "idx_bills_ts": "bill_rows(timestamp, employee_key, amount_paise, commission_paise, tax_paise)",
+    # employee pages; covers Custom Filter
+    "idx_bills_emp_ts": "bill_rows(employee_key, timestamp, amount_paise)",
+    "idx_bills_emp_type": "bill_rows(employee_key, type_code, amount_paise)",  # Rankings by type, summary; covers sums
+    "idx_bills_cust_ts": "bill_rows(customer_key, timestamp)",  # customer bills, statements
+    "idx_bills_hood_ts": "bill_rows(hood, timestamp, amount_paise)",  # covers Hood War (skip-scan per hood)
+    "idx_bills_deleted_id": "bills_deleted(id)",  # restore
+    "idx_bills_deleted_at": "bills_deleted(deleted_at)",  # Deleted Bills, newest first
+    # shifts
+    "idx_shifts_emp_start": "shifts(employee_cid, start_ts)",  # Shifts by employee; skip-scanned by Payroll
+    # people
+    "idx_employees_name": "employees(name)",  # user panel login lookup
+    "idx_employees_hood": "employees(hood)",  # Hood roster
+    "idx_customers_last_seen": "customers(last_seen)",  # recent customers
+    "idx_customers_billed": "customers(customer_cid, bill_count) WHERE bill_count > 0",  # covers the customer list
+    # memberships
+    "idx_memberships_dop": "memberships(dop, customer_cid)",  # expiry, active list keyset pages
+    "idx_membership_hist_exp": "membership_history(expired_at)",  # Past memberships
+    "idx_membership_hist_cust": "membership_history(customer_cid, expired_at)",  # Past memberships of a customer
+    # loyalty; zero balances never expire, so they stay out of the expiry index
+    "idx_loyalty_points": "loyalty(points)",  # Loyalty top 100
+    "idx_loyalty_activity": "loyalty(last_activity) WHERE points > 0",  # expire_loyalty_points
+    "idx_loyalty_ledger_cust_ts": "loyalty_ledger(customer_cid, ts)",  # customer ledger, statements
+    "idx_loyalty_ledger_bill": "loyalty_ledger(bill_id) WHERE bill_id IS NOT NULL",  # bill delete/restore
+    # inventory
+    "idx_inventory_item_ts": "inventory_movements(item, ts)",  # one item's movements
+    "idx_inventory_ts": "inventory_movements(ts)",  # all movements, newest first
+    # audit log: newest first, optionally filtered by one column
+    "idx_audit_ts": "audit_log(ts)",
+    "idx_audit_table_row_ts": "audit_log(table_name, row_id, ts)",
+    "idx_audit_actor_ts": "audit_log(actor, ts)",
+    "idx_audit_action_ts": "audit_log(action, ts)",
+    "idx_audit_entity_ts": "audit_log(entity_cid, ts)",
+    "idx_audit_customer_ts": "audit_log(customer_cid, ts)",
+}
+# superseded: idx_shifts_emp_start / idx_shifts_one_open serve their queries
+RETIRED_INDEXES = ["idx_shifts_emp_active", "idx_shifts_end_ts"]
+
+
+def sync_indexes(conn, indexes, retired=(), schema="main"):
+    """
+    Bring `schema`'s indexes in line with `indexes`: drop the retired ones
+    and any whose definition changed, then create the missing ones. Every
+    index without planner stats (new, or built while its table was empty)
+    is ANALYZEd once its table has rows; an empty table has nothing to
+    measure. Returns the names created.
+    """
+    have = {name: " ".join(sql.split()) for name, sql in conn.execute(
+        f"SELECT name, sql FROM {schema}.sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+    analyzed = set()
+    if conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        analyzed = {r[0] for r in conn.execute(f"SELECT idx FROM {schema}.sqlite_stat1")}
+    for name in retired:
+        conn.execute(f"DROP INDEX IF EXISTS {schema}.{name}")
+    created = []
+    for name, definition in indexes.items():
+        if have.get(name) != f"CREATE INDEX {name} ON {definition}":
+            if name in have:
+                conn.execute(f"DROP INDEX {schema}.{name}")
+            conn.execute(f"CREATE INDEX {schema}.{name} ON {definition}")
+            created.append(name)
+        elif name in analyzed:
+            continue
+        table = definition.split("(")[0]
+        if conn.execute(f"SELECT 1 FROM {schema}.{table} LIMIT 1").fetchone():
+            conn.execute(f"ANALYZE {schema}.{name}")
+    return created
+
+
+# ========== DATABASE INIT & MIGRATION ==========
+def init_db():
+    conn = get_conn()
+    c = conn.cursor()
+
+    def has_column(table, col):
+        info = c.execute(f"PRAGMA table_info({table})").fetchall()
+        return any(row[1] == col for row in info)
+
+    # bills (base)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS bills (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_cid TEXT,
+        customer_cid TEXT,
+        billing_type TEXT,
+        details TEXT,
+        total_amount REAL,
+        timestamp TEXT
+      )
+    """)
+    # migrations
+    if not has_column("bills", "commission"):
+        c.execute("ALTER TABLE bills ADD COLUMN commission REAL DEFAULT 0")
+    if not has_column("bills", "tax"):
+        c.execute("ALTER TABLE bills ADD COLUMN tax REAL DEFAULT 0")
+
+    # employees (base)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS employees (
+        cid TEXT PRIMARY KEY,
+        name TEXT,
+        rank TEXT
+      )
+    """)
+    if not has_column("employees", "rank"):
+        c.execute("ALTER TABLE employees ADD COLUMN rank TEXT DEFAULT 'Trainee'")
+    if not has_column("employees", "hood"):
+        c.execute("ALTER TABLE employees ADD COLUMN hood TEXT DEFAULT 'No Hood'")
+
+    # seller's hood frozen at bill time (Hood War attribution); history is
+    # backfilled from the seller's hood as of this migration
+    if not has_column("bills", "hood"):
+        c.execute("ALTER TABLE bills ADD COLUMN hood TEXT")
+        c.execute("""
+          UPDATE bills SET hood = COALESCE(
+            (SELECT e.hood FROM employees e WHERE e.cid = bills.employee_cid), 'No Hood')
+        """)
+
+    # compact encoding: bills becomes a view over bill_rows (see COMPACT BILL ROWS)
+    ensure_bill_rows(conn)
+
+    # memberships (active)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS memberships (
+        customer_cid TEXT PRIMARY KEY,
+        tier TEXT,
+        dop TEXT
+      )
+    """)
+
+    # membership history (archived/expired)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS membership_history (
+        customer_cid TEXT,
+        tier TEXT,
+        dop TEXT,
+        expired_at TEXT
+      )
+    """)
+
+    # hoods
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS hoods (
+        name TEXT PRIMARY KEY,
+        location TEXT
+      )
+    """)
+
+    # soft-deletes for bills
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS bills_deleted (
+        id INTEGER,
+        employee_cid TEXT,
+        customer_cid TEXT,
+        billing_type TEXT,
+        details TEXT,
+        total_amount REAL,
+        timestamp TEXT,
+        commission REAL,
+        tax REAL,
+        deleted_by TEXT,
+        deleted_at TEXT
+      )
+    """)
+    if not has_column("bills_deleted", "hood"):
+        c.execute("ALTER TABLE bills_deleted ADD COLUMN hood TEXT")
+
+    # audit log
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS audit_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        action TEXT,
+        table_name TEXT,
+        row_id TEXT,
+        actor TEXT,
+        ts TEXT,
+        old_values TEXT,
+        new_values TEXT
+      )
+    """)
+
+    # JSON1-derived audit columns (virtual, so existing rows need no rewrite)
+    audit_cols = {row[1] for row in c.execute("PRAGMA table_xinfo(audit_log)").fetchall()}
+    if "entity_cid" not in audit_cols:
+        c.execute("""
+          ALTER TABLE audit_log ADD COLUMN entity_cid TEXT GENERATED ALWAYS AS (
+            CASE
+              WHEN table_name = 'employees' THEN row_id
+              ELSE COALESCE(
+                CASE WHEN json_valid(new_values) THEN json_extract(new_values, '$.employee_cid') END,
+                CASE WHEN json_valid(old_values) THEN json_extract(old_values, '$.employee_cid') END
+              )
+            END
+          ) VIRTUAL
+        """)
+    if "customer_cid" not in audit_cols:
+        c.execute("""
+          ALTER TABLE audit_log ADD COLUMN customer_cid TEXT GENERATED ALWAYS AS (
+            COALESCE(
+              CASE WHEN json_valid(new_values) THEN json_extract(new_values, '$.customer_cid') END,
+              CASE WHEN json_valid(old_values) THEN json_extract(old_values, '$.customer_cid') END
+            )
+          ) VIRTUAL
+        """)
+
+    # items (for stock management)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS items (
+        name TEXT PRIMARY KEY,
+        price REAL,
+        stock INTEGER
+      )
+    """)
+
+    # inventory movements: every stock change, signed (see ITEMS HELPERS)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS inventory_movements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        item TEXT NOT NULL,
+        ts TEXT NOT NULL,
+        kind TEXT NOT NULL CHECK (kind IN ('opening', 'sale', 'restock', 'adjust')),
+        delta INTEGER NOT NULL,
+        bill_id INTEGER,
+        actor TEXT,
+        note TEXT
+      )
+    """)
+    # stock that predates the ledger gets an opening movement so it reconciles
+    if c.execute("SELECT 1 FROM inventory_movements LIMIT 1").fetchone() is None:
+        c.execute("""
+          INSERT INTO inventory_movements (item, ts, kind, delta, actor)
+          SELECT name, ?, 'opening', COALESCE(stock, 0), 'system' FROM items
+        """, (datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"),))
+
+    # shifts
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS shifts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        employee_cid TEXT,
+        start_ts TEXT,
+        end_ts TEXT,
+        duration_minutes INTEGER,
+        bills_count INTEGER,
+        revenue REAL,
+        commission REAL DEFAULT 0
+      )
+    """)
+    # shifts tables from before the running counters (commission: below, with its backfill)
+    for col, ctype in [("employee_cid", "TEXT"), ("start_ts", "TEXT"), ("end_ts", "TEXT"),
+                       ("duration_minutes", "INTEGER"), ("bills_count", "INTEGER"), ("revenue", "REAL")]:
+        if not has_column("shifts", col):
+            c.execute(f"ALTER TABLE shifts ADD COLUMN {col} {ctype}")
+    # at most one open shift per employee; close stale duplicates from the
+    # old read-then-insert race before the partial unique index goes in
+    if not c.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_shifts_one_open'").fetchone():
+        c.execute("""
+          UPDATE shifts SET end_ts = start_ts, duration_minutes = 0
+          WHERE end_ts IS NULL
+            AND id NOT IN (SELECT MAX(id) FROM shifts WHERE end_ts IS NULL GROUP BY employee_cid)
+        """)
+        c.execute("CREATE UNIQUE INDEX idx_shifts_one_open ON shifts(employee_cid) WHERE end_ts IS NULL")
+
+    # running per-shift counters: bills_count/revenue/commission are kept up
+    # to date by save_bill while the shift is open
+    if not has_column("shifts", "commission"):
+        c.execute("ALTER TABLE shifts ADD COLUMN commission REAL DEFAULT 0")
+        c.execute("""
+          UPDATE shifts SET (bills_count, revenue, commission) = (
+            SELECT COUNT(*), COALESCE(SUM(b.amount_paise), 0) / 100.0, COALESCE(SUM(b.commission_paise), 0) / 100.0
+            FROM bill_rows b
+            WHERE b.employee_key = (SELECT id FROM cid_keys WHERE cid = shifts.employee_cid)
+              AND b.timestamp >= shifts.start_ts
+          )
+          WHERE end_ts IS NULL
+        """)
+
+    # loyalty: balance per customer, maintained alongside the ledger below
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS loyalty (
+        customer_cid TEXT PRIMARY KEY,
+        points INTEGER DEFAULT 0
+      )
+    """)
+    if not has_column("loyalty", "last_activity"):
+        c.execute("ALTER TABLE loyalty ADD COLUMN last_activity TEXT")
+
+    # append-only loyalty ledger; every balance change writes one row here
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS loyalty_ledger (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_cid TEXT NOT NULL,
+        ts TEXT NOT NULL,
+        kind TEXT NOT NULL CHECK (kind IN ('earn', 'adjust', 'redeem', 'expire')),
+        points INTEGER NOT NULL,
+        bill_id INTEGER,
+        actor TEXT,
+        note TEXT
+      )
+    """)
+    # balances that predate the ledger get an opening entry so sums reconcile
+    if c.execute("SELECT 1 FROM loyalty_ledger LIMIT 1").fetchone() is None:
+        opened = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+        c.execute("""
+          INSERT INTO loyalty_ledger (customer_cid, ts, kind, points, actor, note)
+          SELECT customer_cid, ?, 'adjust', points, 'system', 'opening balance'
+          FROM loyalty WHERE points != 0
+        """, (opened,))
+        c.execute("UPDATE loyalty SET last_activity = ? WHERE last_activity IS NULL", (opened,))
+
+    # one row per customer, kept current by the write paths (see CUSTOMERS)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS customers (
+        customer_cid TEXT PRIMARY KEY,
+        first_seen TEXT,
+        last_seen TEXT,
+        bill_count INTEGER DEFAULT 0,
+        lifetime_spend REAL DEFAULT 0,
+        membership_tier TEXT,
+        loyalty_points INTEGER DEFAULT 0
+      )
+    """)
+
+    # payroll cache for closed months (see get_month_payroll)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS payroll_months (
+        month TEXT PRIMARY KEY,
+        computed_at TEXT
+      )
+    """)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS payroll_cache (
+        month TEXT,
+        employee_cid TEXT,
+        name TEXT,
+        rank TEXT,
+        hood TEXT,
+        shifts INTEGER,
+        minutes REAL,
+        bills INTEGER,
+        revenue REAL,
+        commission REAL,
+        tax REAL,
+        PRIMARY KEY (month, employee_cid)
+      )
+    """)
+
+    # months whose Parquet partition must be rewritten, not appended to
+    # (updates/deletes after export); month '*' means the whole table
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS parquet_dirty (
+        table_name TEXT,
+        month TEXT,
+        marked_at TEXT,
+        PRIMARY KEY (table_name, month)
+      )
+    """)
+
+    # drift found by the consistency checks (see CONSISTENCY CHECKS); a key's
+    # rows are replaced every time it is checked again
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS consistency_drift (
+        check_name TEXT,
+        row_key TEXT,
+        field TEXT,
+        derived,
+        source,
+        found_at TEXT,
+        repaired_at TEXT,
+        PRIMARY KEY (check_name, row_key, field)
+      )
+    """)
+
+    # small key/value store for subsystem state (e.g. tiering watermark)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS app_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+      )
+    """)
+
+    # per-table write counters for cross-process cache invalidation (see TABLE CACHE)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS table_generations (
+        table_name TEXT PRIMARY KEY,
+        generation INTEGER NOT NULL DEFAULT 0
+      )
+    """)
+    for marker in GENERATION_MARKERS:
+        c.execute("INSERT OR IGNORE INTO table_generations (table_name) VALUES (?)", (marker,))
+    for table in GENERATION_TABLES:
+        c.execute("INSERT OR IGNORE INTO table_generations (table_name) VALUES (?)", (table,))
+        physical = PHYSICAL_TABLES.get(table, table)
+        for op in ("INSERT", "UPDATE", "DELETE"):
+            c.execute(f"""
+              CREATE TRIGGER IF NOT EXISTS trg_gen_{table}_{op.lower()} AFTER {op} ON {physical}
+              BEGIN
+                UPDATE table_generations SET generation = generation + 1 WHERE table_name = '{table}';
+              END
+            """)
+
+    # append-only change feed for the live dashboards (see CHANGE FEED):
+    # I/U/D rows come from triggers; A (moved into the archive tier), archive
+    # deletes and R (reset: rebuild) are written by the code doing them
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS change_feed (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        op TEXT NOT NULL,
+        row_key TEXT,
+        old TEXT,
+        new TEXT
+      )
+    """)
+    c.execute("""
+      CREATE TABLE IF NOT EXISTS feed_consumers (
+        name TEXT PRIMARY KEY,
+        position INTEGER NOT NULL,
+        seen_at TEXT NOT NULL
+      )
+    """)
+    for table, cols in FEED_COLUMNS.items():
+        # bills: triggers on bill_rows, comparing its encoded columns and decoding them into the feed
+        physical, raw = PHYSICAL_TABLES.get(table, table), table in PHYSICAL_TABLES
+        encoding = BILL_ENCODING if raw else {}
+        changed = " OR ".join(f"OLD.{encoding.get(col, col)} IS NOT NEW.{encoding.get(col, col)}" for col in cols)
+        for op, old, new, when in (("INSERT", None, "NEW", ""), ("UPDATE", "OLD", "NEW", f"WHEN {changed}"),
+                                   ("DELETE", "OLD", None, "")):
+            c.execute(f"""
+              CREATE TRIGGER IF NOT EXISTS trg_feed_{table}_{op.lower()} AFTER {op} ON {physical} {when}
+              BEGIN
+                INSERT INTO change_feed (table_name, op, row_key, old, new)
+                VALUES ('{table}', '{op[0]}', {new or old}.{cols[0]},
+                        {feed_json(table, old, raw) if old else "NULL"},
+                        {feed_json(table, new, raw) if new else "NULL"});
+              END
+            """)
+
+    sync_indexes(conn, INDEXES, RETIRED_INDEXES)
+
+    conn.commit()
+    conn.close()
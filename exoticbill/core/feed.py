@@ -0,0 +1,197 @@
+"""The change feed and the live dashboard aggregates it keeps current."""
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from exoticbill.config import FEED_CONSUMER_TTL_S, FEED_REBUILD_ROWS, FEED_TRUNCATE_INTERVAL_S, IST
+from exoticbill.core.db import get_conn, get_meta, set_meta
+from exoticbill.core.tiering import bill_rows_source, bills_source, get_history_conn
+
+
+# ---------- CHANGE FEED ----------
+def last_feed_seq(conn):
+    """Highest seq ever assigned (AUTOINCREMENT never reuses one, even after truncation)."""
+    row = conn.execute("SELECT seq FROM main.sqlite_sequence WHERE name = 'change_feed'").fetchone()
+    return row[0] if row else 0
+
+
+def truncate_change_feed(ttl_s=FEED_CONSUMER_TTL_S):
+    """
+    Forget consumers not seen for `ttl_s`, then delete feed rows every
+    remaining consumer has moved past (all of them when none remain).
+    Returns the number of rows deleted.
+    """
+    cutoff = (datetime.now(IST) - timedelta(seconds=ttl_s)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = get_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM feed_consumers WHERE seen_at < ?", (cutoff,))
+        low = conn.execute("SELECT MIN(position) FROM feed_consumers").fetchone()[0]
+        if low is None:
+            low = last_feed_seq(conn)
+        deleted = conn.execute("DELETE FROM change_feed WHERE seq <= ?", (low,)).rowcount
+        if low > int(get_meta(conn, "feed_truncated_through", 0)):
+            set_meta(conn, "feed_truncated_through", low)
+        conn.commit()
+        return deleted
+    finally:
+        conn.close()
+
+
+class LiveAggregates:
+    """
+    In-memory aggregates behind Live Stats, Live Shifts and the admin revenue
+    header: all-time revenue, today's bills per second and billing type, open
+    shifts and active memberships. refresh() replays only the change_feed rows
+    past this process's cursor, so its cost follows new activity, not table
+    size. A consumer that fell behind the truncation point, got a reset (R)
+    or has more than FEED_REBUILD_ROWS pending rebuilds from the tables.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.name = f"live@{socket.gethostname()}:{os.getpid()}"
+        self.position = None
+        self.day = None
+        self._saved = (None, 0.0)  # (position, monotonic time) last written to feed_consumers
+        self._truncated_at = 0.0
+
+    # -- state --
+    def _rebuild(self, conn, day):
+        self.position = last_feed_seq(conn)
+        self.day, self.day_start = day, f"{day} 00:00:00"
+        self.revenue = conn.execute("SELECT COALESCE(SUM(amount_paise), 0) / 100.0 FROM bill_rows_all").fetchone()[0]
+        self.today = [0, 0.0]
+        self.types = {}
+        self.minutes = {}  # 'YYYY-MM-DD HH:MM' -> {timestamp: [count, amount]}
+        for ts, btype, count, amount in conn.execute(f"""
+            SELECT b.timestamp, t.name, b.n, b.paise / 100.0
+            FROM (SELECT timestamp, type_code, COUNT(*) AS n, COALESCE(SUM(amount_paise), 0) AS paise
+                  FROM {bill_rows_source(bills_source(self.day_start))} WHERE timestamp >= ?
+                  GROUP BY timestamp, type_code) b
+            LEFT JOIN billing_types t ON t.code = b.type_code
+        """, (self.day_start,)):
+            self._add_today(ts, btype, count, amount)
+        self.shifts = {r[0]: dict(zip(["id", "employee_cid", "start_ts", "bills_count", "revenue", "commission"], r))
+                       for r in conn.execute("""
+                           SELECT id, employee_cid, start_ts, bills_count, revenue, commission
+                           FROM shifts WHERE end_ts IS NULL
+                       """)}
+        self.memberships = dict(conn.execute("SELECT customer_cid, tier FROM memberships"))
+
+    def _add_today(self, ts, btype, count, amount):
+        self.today[0] += count
+        self.today[1] += amount
+        for bucket in (self.types.setdefault(btype, [0, 0.0]),
+                       self.minutes.setdefault(ts[:16], {}).setdefault(ts, [0, 0.0])):
+            bucket[0] += count
+            bucket[1] += amount
+        if not self.types[btype][0]:
+            del self.types[btype]
+        if not self.minutes[ts[:16]][ts][0]:
+            del self.minutes[ts[:16]][ts]
+
+    def _apply_bills(self, row, sign):
+        amount = row["total_amount"] or 0.0
+        self.revenue += sign * amount
+        if row["timestamp"] and row["timestamp"] >= self.day_start:
+            self._add_today(row["timestamp"], row["billing_type"], sign, sign * amount)
+
+    def _apply_shifts(self, row, sign):
+        if sign < 0:
+            self.shifts.pop(row["id"], None)
+        elif row["end_ts"] is None:
+            self.shifts[row["id"]] = {k: row[k] for k in
+                                      ("id", "employee_cid", "start_ts", "bills_count", "revenue", "commission")}
+
+    def _apply_memberships(self, row, sign):
+        if sign < 0:
+            self.memberships.pop(row["customer_cid"], None)
+        else:
+            self.memberships[row["customer_cid"]] = row["tier"]
+
+    def _replay(self, conn):
+        for seq, table, old, new in conn.execute(
+            "SELECT seq, table_name, old, new FROM change_feed WHERE seq > ? ORDER BY seq", (self.position,)
+        ):
+            apply = getattr(self, f"_apply_{table}")
+            if old:
+                apply(json.loads(old), -1)
+            if new:
+                apply(json.loads(new), 1)
+            self.position = seq
+
+    def _needs_rebuild(self, conn, day):
+        if self.position is None or day != self.day:
+            return True
+        if self.position < int(get_meta(conn, "feed_truncated_through", 0)):
+            return True
+        pending, reset = conn.execute(
+            "SELECT COUNT(*), COALESCE(MAX(op = 'R'), 0) FROM change_feed WHERE seq > ?", (self.position,)
+        ).fetchone()
+        return bool(reset) or pending > FEED_REBUILD_ROWS
+
+    # -- public --
+    def refresh(self):
+        """Catch up with the feed and return the current dashboard numbers."""
+        with self._lock:
+            now = datetime.now(IST)
+            day = now.strftime("%Y-%m-%d")
+            conn = get_history_conn()
+            try:
+                conn.execute("BEGIN")  # one read snapshot for the cursor and the rows
+                if self._needs_rebuild(conn, day):
+                    self._rebuild(conn, day)
+                else:
+                    self._replay(conn)
+                conn.commit()
+            finally:
+                conn.close()
+            self._save_cursor()
+            hour_ago = (now - timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+            hour = [0, 0.0]
+            for minute, seconds in self.minutes.items():
+                if minute >= hour_ago[:16]:
+                    for ts, (count, amount) in seconds.items():
+                        if ts >= hour_ago:
+                            hour[0] += count
+                            hour[1] += amount
+            return {
+                "revenue": self.revenue,
+                "today_count": self.today[0],
+                "today_amount": self.today[1],
+                "hour_count": hour[0],
+                "hour_amount": hour[1],
+                "types": sorted(((t, c, a) for t, (c, a) in self.types.items()), key=lambda r: r[2], reverse=True),
+                "shifts": sorted((dict(s) for s in self.shifts.values()), key=lambda s: s["start_ts"] or ""),
+                "memberships": len(self.memberships),
+            }
+
+    def _save_cursor(self):
+        saved_pos, saved_at = self._saved
+        now = time.monotonic()
+        if saved_pos == self.position and now - saved_at < FEED_TRUNCATE_INTERVAL_S:
+            return
+        conn = get_conn()
+        try:
+            conn.execute("""
+                INSERT INTO feed_consumers (name, position, seen_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET position = excluded.position, seen_at = excluded.seen_at
+            """, (self.name, self.position, datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")))
+            conn.commit()
+        finally:
+            conn.close()
+        self._saved = (self.position, now)
+        if now - self._truncated_at >= FEED_TRUNCATE_INTERVAL_S:
+            self._truncated_at = now
+            truncate_change_feed()
+
+
+@st.cache_resource
+def get_live_aggregates():
+    return LiveAggregates()
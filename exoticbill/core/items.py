@@ -0,0 +1,112 @@
+"""Item catalogue and the inventory movement ledger."""
+import sqlite3
+from datetime import datetime
+
+import streamlit as st
+
+from exoticbill.config import IST
+from exoticbill.core.cache import table_cached
+from exoticbill.core.db import get_conn
+
+
+# ---------- ITEMS HELPERS ----------
+def add_item(name, price, stock):
+    conn = get_conn()
+    try:
+        with conn:
+            conn.execute("INSERT INTO items (name, price, stock) VALUES (?,?,?)", (name, price, stock))
+            conn.execute(
+                "INSERT INTO inventory_movements (item, ts, kind, delta, actor) VALUES (?, ?, 'opening', ?, ?)",
+                (name, datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"), int(stock),
+                 st.session_state.get("username", "?"))
+            )
+    except sqlite3.IntegrityError:
+        st.warning("Item already exists.")
+    conn.close()
+    
+
+def delete_item(name, actor=None):
+    """Remove an item; its ledger is kept, closed by an 'adjust' movement taking the stock to zero."""
+    conn = get_conn()
+    with conn:
+        row = conn.execute("SELECT stock FROM items WHERE name=?", (name,)).fetchone()
+        conn.execute("DELETE FROM items WHERE name=?", (name,))
+        if row and row[0]:
+            conn.execute(
+                "INSERT INTO inventory_movements (item, ts, kind, delta, actor, note) "
+                "VALUES (?, ?, 'adjust', ?, ?, 'item deleted')",
+                (name, datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"), -int(row[0]),
+                 actor or st.session_state.get("username", "?"))
+            )
+    conn.close()
+
+
+def update_item_stock(name, delta, kind=None, actor=None, note=None):
+    """Manual restock/adjustment; a decrease never takes stock below zero. Returns bool."""
+    delta = int(delta)
+    kind = kind or ("restock" if delta > 0 else "adjust")
+    conn = get_conn()
+    try:
+        with conn:
+            cur = conn.execute(
+                "UPDATE items SET stock = stock + ? WHERE name = ? AND stock + ? >= 0", (delta, name, delta)
+            )
+            if cur.rowcount == 0:
+                return False
+            conn.execute(
+                "INSERT INTO inventory_movements (item, ts, kind, delta, actor, note) VALUES (?, ?, ?, ?, ?, ?)",
+                (name, datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"), kind, delta, actor, note)
+            )
+        return True
+    finally:
+        conn.close()
+
+
+def reconcile_inventory():
+    """Stock per item next to the sum of its movements; `diff` != 0 means drift."""
+    import pandas as pd
+    conn = get_conn()
+    rows = conn.execute("""
+        SELECT i.name, i.stock, COALESCE(m.total, 0), COALESCE(m.sold, 0), m.last_ts
+        FROM items i
+        LEFT JOIN (
+          SELECT item, SUM(delta) AS total, -SUM(CASE WHEN kind = 'sale' THEN delta ELSE 0 END) AS sold,
+                 MAX(ts) AS last_ts
+          FROM inventory_movements GROUP BY item
+        ) m ON m.item = i.name
+        ORDER BY i.name
+    """).fetchall()
+    conn.close()
+    df = pd.DataFrame(rows, columns=["item", "stock", "ledger", "sold", "last_movement"])
+    df["diff"] = df["stock"] - df["ledger"]
+    return df
+
+
+def get_inventory_movements(item=None, limit=200):
+    conn = get_conn()
+    sql = "SELECT ts, item, kind, delta, bill_id, actor, note FROM inventory_movements"
+    params = []
+    if item:
+        sql += " WHERE item = ?"
+        params.append(item)
+    sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+    params.append(limit)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+@table_cached("items")
+def get_all_items():
+    conn = get_conn()
+    rows = conn.execute("SELECT name, price, stock FROM items").fetchall()
+    conn.close()
+    return rows
+
+
+@table_cached("items")
+def get_item(name):
+    conn = get_conn()
+    row = conn.execute("SELECT price, stock FROM items WHERE name=?", (name,)).fetchone()
+    conn.close()
+    return row
@@ -0,0 +1,113 @@
+"""Loyalty balances and their ledger."""
+from datetime import datetime, timedelta
+
+from exoticbill.config import IST, LOYALTY_EXPIRY_DAYS, TIERING_BATCH_SIZE
+from exoticbill.core.db import get_conn
+
+
+def _post_loyalty(conn, customer_cid, kind, points, ts, bill_id=None, actor=None, note=None):
+    """
+    Append one ledger row and apply it to the balance on `conn`; the caller
+    owns the transaction. Debits only apply if the balance covers them
+    (returns False otherwise, nothing written).
+    """
+    if points < 0:
+        cur = conn.execute(
+            "UPDATE loyalty SET points = points + ?, last_activity = ? "
+            "WHERE customer_cid = ? AND points >= ?",
+            (points, ts, customer_cid, -points)
+        )
+        if cur.rowcount == 0:
+            return False
+    else:
+        conn.execute("""
+            INSERT INTO loyalty (customer_cid, points, last_activity) VALUES (?, ?, ?)
+            ON CONFLICT(customer_cid) DO UPDATE
+              SET points = points + excluded.points, last_activity = excluded.last_activity
+        """, (customer_cid, points, ts))
+    conn.execute(
+        "INSERT INTO loyalty_ledger (customer_cid, ts, kind, points, bill_id, actor, note) "
+        "VALUES (?,?,?,?,?,?,?)",
+        (customer_cid, ts, kind, points, bill_id, actor, note)
+    )
+    conn.execute("""
+        INSERT INTO customers (customer_cid, loyalty_points) VALUES (?, ?)
+        ON CONFLICT(customer_cid) DO UPDATE SET loyalty_points = loyalty_points + excluded.loyalty_points
+    """, (customer_cid, points))
+    return True
+
+
+def add_loyalty_points(customer_cid, points, kind="earn", bill_id=None, actor=None, note=None):
+    """Post a signed points change; False if it is zero or would overdraw."""
+    if not customer_cid or points == 0:
+        return False
+    now = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    conn = get_conn()
+    try:
+        with conn:
+            return _post_loyalty(conn, customer_cid, kind, int(points), now, bill_id, actor, note)
+    finally:
+        conn.close()
+
+
+def redeem_loyalty_points(customer_cid, points, actor=None, note=None):
+    if points <= 0:
+        return False
+    return add_loyalty_points(customer_cid, -int(points), kind="redeem", actor=actor, note=note)
+
+
+def expire_loyalty_points(days=LOYALTY_EXPIRY_DAYS, batch_size=TIERING_BATCH_SIZE, actor=None):
+    """
+    Zero out balances with no ledger activity in `days`, writing an 'expire'
+    entry for each. Runs in short batches; returns (customers, points) expired.
+    """
+    now = datetime.now(IST)
+    now_str = now.strftime("%Y-%m-%d %H:%M:%S")
+    cutoff = (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    customers = points = 0
+    conn = get_conn()
+    try:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT customer_cid, points FROM loyalty "
+                    "WHERE last_activity < ? AND points > 0 LIMIT ?",
+                    (cutoff, batch_size)
+                ).fetchall()
+                conn.executemany(
+                    "INSERT INTO loyalty_ledger (customer_cid, ts, kind, points, actor, note) "
+                    "VALUES (?, ?, 'expire', ?, ?, ?)",
+                    [(cid, now_str, -pts, actor, f"inactive {days}d") for cid, pts in rows]
+                )
+                # last_activity is left alone so an expiry does not count as activity
+                conn.executemany(
+                    "UPDATE loyalty SET points = 0 WHERE customer_cid = ?",
+                    [(cid,) for cid, _ in rows]
+                )
+                conn.executemany(
+                    "UPDATE customers SET loyalty_points = 0 WHERE customer_cid = ?",
+                    [(cid,) for cid, _ in rows]
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            customers += len(rows)
+            points += sum(pts for _, pts in rows)
+            if len(rows) < batch_size:
+                break
+    finally:
+        conn.close()
+    return customers, points
+
+
+def get_loyalty_history(customer_cid, limit=50):
+    conn = get_conn()
+    rows = conn.execute(
+        "SELECT ts, kind, points, bill_id, actor, note FROM loyalty_ledger "
+        "WHERE customer_cid = ? ORDER BY ts DESC, id DESC LIMIT ?",
+        (customer_cid, limit)
+    ).fetchall()
+    conn.close()
+    return rows
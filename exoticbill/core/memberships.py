@@ -0,0 +1,76 @@
+"""Membership purchase, lookup and expiry."""
+from datetime import datetime, timedelta
+
+from exoticbill.config import IST
+from exoticbill.core.cache import table_cached
+from exoticbill.core.customers import _set_customer_field
+from exoticbill.core.db import get_conn
+
+
+# ---------- EXPIRE MEMBERSHIPS ----------
+def purge_expired_memberships():
+    conn = get_conn()
+    c = conn.cursor()
+    cutoff_dt = datetime.now(IST) - timedelta(days=7)
+    cutoff_str = cutoff_dt.strftime("%Y-%m-%d %H:%M:%S")
+    expired = c.execute(
+        "SELECT customer_cid, tier, dop FROM memberships WHERE dop <= ?",
+        (cutoff_str,)
+    ).fetchall()
+    for cid, tier, dop_str in expired:
+        try:
+            dop = datetime.strptime(dop_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=IST)
+        except Exception:
+            dop = cutoff_dt
+        expired_at = (dop + timedelta(days=7)).strftime("%Y-%m-%d %H:%M:%S")
+        c.execute(
+            "INSERT INTO membership_history (customer_cid, tier, dop, expired_at) VALUES (?,?,?,?)",
+            (cid, tier, dop_str, expired_at)
+        )
+        c.execute("UPDATE customers SET membership_tier = NULL WHERE customer_cid = ?", (cid,))
+    c.execute("DELETE FROM memberships WHERE dop <= ?", (cutoff_str,))
+    conn.commit()
+    conn.close()
+
+
+def add_membership(cust, tier):
+    dop_ist = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    conn = get_conn()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO memberships (customer_cid, tier, dop) VALUES (?,?,?)",
+            (cust, tier, dop_ist)
+        )
+        _set_customer_field(conn, cust, "membership_tier", tier)
+    conn.close()
+
+
+@table_cached("memberships")
+def get_membership(cust):
+    conn = get_conn()
+    row = conn.execute(
+        "SELECT tier, dop FROM memberships WHERE customer_cid = ?", (cust,)
+    ).fetchone()
+    conn.close()
+    return {"tier": row[0], "dop": row[1]} if row else None
+
+
+@table_cached("memberships")
+def get_all_memberships():
+    conn = get_conn()
+    rows = conn.execute("SELECT customer_cid, tier, dop FROM memberships").fetchall()
+    conn.close()
+    return rows
+
+
+def get_past_memberships(customer_cid=None):
+    """Expired memberships, latest first; optionally only one customer's."""
+    conn = get_conn()
+    sql = "SELECT customer_cid, tier, dop, expired_at FROM membership_history"
+    params = []
+    if customer_cid:
+        sql += " WHERE customer_cid = ?"
+        params.append(customer_cid)
+    rows = conn.execute(sql + " ORDER BY expired_at DESC", params).fetchall()
+    conn.close()
+    return rows
@@ -0,0 +1,310 @@
+"""Month-partitioned Parquet copies of bills, shifts and memberships for reports."""
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+
+import streamlit as st
+
+from exoticbill.config import (
+    IST, MEMBERSHIP_PRICES, PARQUET_DIR, PARQUET_EXPORT_BATCH, PARQUET_EXPORT_INTERVAL_S
+)
+from exoticbill.core.db import get_conn, get_meta, set_meta
+from exoticbill.core.tiering import get_history_conn
+
+
+# ---------- PARQUET ANALYTICS STORE ----------
+# Incremental, month-partitioned Parquet copies of bills, closed shifts and
+# membership purchases for long-range reports. Each table is appended to in
+# keyset order past a watermark kept in app_meta; months changed after export
+# (soft delete/restore, commission recompute, hood rename, reset) are marked
+# in parquet_dirty and rewritten whole. pyarrow is imported lazily.
+PARQUET_TABLES = {
+    "bills": {
+        "source": "bills_all",
+        "key": ["id"],
+        "month_col": "timestamp",
+        "columns": {
+            "id": "int64", "employee_cid": "string", "customer_cid": "string", "billing_type": "string",
+            "details": "string", "total_amount": "double", "timestamp": "timestamp[s]",
+            "commission": "double", "tax": "double", "hood": "string",
+        },
+    },
+    "shifts": {
+        "source": "shifts",
+        "where": "end_ts IS NOT NULL",  # open shifts still change
+        "key": ["end_ts", "id"],
+        "month_col": "start_ts",
+        "columns": {
+            "id": "int64", "employee_cid": "string", "start_ts": "timestamp[s]", "end_ts": "timestamp[s]",
+            "duration_minutes": "double", "bills_count": "double", "revenue": "double", "commission": "double",
+        },
+    },
+    "memberships": {
+        "source": "memberships",
+        "key": ["dop", "customer_cid"],
+        "month_col": "dop",
+        "columns": {"customer_cid": "string", "tier": "string", "dop": "timestamp[s]"},
+    },
+}
+
+
+def parquet_available():
+    import importlib.util
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def mark_parquet_dirty(table, month=None, conn=None):
+    """Have the next export rewrite `month` ('YYYY-MM') of `table`, or all of it."""
+    own = conn is None
+    if own:
+        conn = get_conn()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO main.parquet_dirty (table_name, month, marked_at) VALUES (?, ?, ?)",
+            (table, month or "*", datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"))
+        )
+        if own:
+            conn.commit()
+    finally:
+        if own:
+            conn.close()
+
+
+def _parquet_frame(df, spec):
+    """Typed pyarrow table for a chunk of `spec` rows (TEXT timestamps parsed once, here)."""
+    import pandas as pd
+    import pyarrow as pa
+    for col, typ in spec["columns"].items():
+        if typ.startswith("timestamp"):
+            df[col] = pd.to_datetime(df[col], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    schema = pa.schema([(col, pa.type_for_alias(typ)) for col, typ in spec["columns"].items()])
+    return pa.Table.from_pandas(df[list(spec["columns"])], schema=schema, preserve_index=False)
+
+
+def _write_parquet_parts(table, df, part_name):
+    """Write one file per month of `df`; names are deterministic, so a rerun overwrites."""
+    import pyarrow.parquet as pq
+    spec = PARQUET_TABLES[table]
+    months = df[spec["month_col"]].str[:7]
+    for month, part in df.groupby(months):
+        folder = os.path.join(PARQUET_DIR, table, f"month={month}")
+        os.makedirs(folder, exist_ok=True)
+        pq.write_table(_parquet_frame(part.copy(), spec), os.path.join(folder, f"part-{part_name}.parquet"))
+
+
+def _rewrite_parquet_month(conn, table, month, upto):
+    """Replace one month partition with a fresh read of everything up to watermark `upto`."""
+    import pandas as pd
+    import pyarrow.parquet as pq
+    spec = PARQUET_TABLES[table]
+    key_cols = ", ".join(spec["key"])
+    where = [f"{spec['month_col']} >= ? AND {spec['month_col']} < ?",
+             f"({key_cols}) <= ({', '.join('?' * len(spec['key']))})"]
+    if spec.get("where"):
+        where.append(spec["where"])
+    y, m = int(month[:4]), int(month[5:7])
+    nxt = f"{y + m // 12:04d}-{m % 12 + 1:02d}"
+    df = pd.read_sql_query(
+        f"SELECT {', '.join(spec['columns'])} FROM {spec['source']} WHERE {' AND '.join(where)}",
+        conn, params=[f"{month}-01", f"{nxt}-01", *upto]
+    )
+    final = os.path.join(PARQUET_DIR, table, f"month={month}")
+    staging = os.path.join(PARQUET_DIR, "_staging", table, f"month={month}")
+    shutil.rmtree(staging, ignore_errors=True)
+    if not df.empty:
+        os.makedirs(staging)
+        pq.write_table(_parquet_frame(df, spec), os.path.join(staging, "part-rebuilt.parquet"))
+    shutil.rmtree(final, ignore_errors=True)
+    if not df.empty:
+        os.makedirs(os.path.dirname(final), exist_ok=True)
+        os.replace(staging, final)
+
+
+def export_parquet(tables=None, batch_size=PARQUET_EXPORT_BATCH):
+    """
+    Bring the Parquet store up to date. Per table: append rows past the
+    watermark in key order, batch by batch, then rewrite dirty months up to
+    the new watermark. Returns {table: rows appended}.
+    """
+    import pandas as pd
+    appended = {}
+    conn = get_history_conn()
+    try:
+        for table in tables or PARQUET_TABLES:
+            spec = PARQUET_TABLES[table]
+            key_cols = ", ".join(spec["key"])
+            dirty = conn.execute(
+                "SELECT month, marked_at FROM main.parquet_dirty WHERE table_name = ?", (table,)
+            ).fetchall()
+            full = any(month == "*" for month, _ in dirty)
+            if full:
+                # start over: the append pass below re-exports everything
+                shutil.rmtree(os.path.join(PARQUET_DIR, table), ignore_errors=True)
+                with conn:
+                    conn.execute("DELETE FROM main.app_meta WHERE key = ?", (f"parquet_wm_{table}",))
+
+            wm = get_meta(conn, f"parquet_wm_{table}")
+            wm = json.loads(wm) if wm else None
+            appended[table] = 0
+            while True:
+                where = [spec["where"]] if spec.get("where") else []
+                params = []
+                if wm:
+                    where.append(f"({key_cols}) > ({', '.join('?' * len(wm))})")
+                    params.extend(wm)
+                sql = f"SELECT {', '.join(spec['columns'])} FROM {spec['source']}"
+                if where:
+                    sql += " WHERE " + " AND ".join(where)
+                sql += f" ORDER BY {key_cols} LIMIT ?"
+                df = pd.read_sql_query(sql, conn, params=params + [batch_size])
+                if df.empty:
+                    break
+                part_name = re.sub(r"[^0-9A-Za-z]+", "", "-".join(map(str, wm))) if wm else "0"
+                _write_parquet_parts(table, df, part_name)
+                wm = [v.item() if hasattr(v, "item") else v for v in df.iloc[-1][spec["key"]]]
+                with conn:
+                    set_meta(conn, f"parquet_wm_{table}", json.dumps(wm))
+                appended[table] += len(df)
+                if len(df) < batch_size:
+                    break
+
+            for month, marked_at in dirty:
+                if not full and wm:
+                    _rewrite_parquet_month(conn, table, month, wm)
+                with conn:
+                    conn.execute(
+                        "DELETE FROM main.parquet_dirty WHERE table_name = ? AND month = ? AND marked_at <= ?",
+                        (table, month, marked_at)
+                    )
+        with conn:
+            set_meta(conn, "parquet_exported_at", datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"))
+    finally:
+        conn.close()
+    return appended
+
+
+class ParquetExporter:
+    """Background thread running export_parquet every PARQUET_EXPORT_INTERVAL_S."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self.last_error = None
+        self._thread = threading.Thread(target=self._run, name="parquet-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self):
+        with self._lock:
+            return export_parquet()
+
+    def request_export(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            if parquet_available():
+                try:
+                    self.export()
+                    self.last_error = None
+                except (sqlite3.Error, OSError, ValueError) as e:
+                    self.last_error = str(e)
+            self._wake.wait(PARQUET_EXPORT_INTERVAL_S)
+            self._wake.clear()
+
+
+@st.cache_resource
+def get_parquet_exporter():
+    return ParquetExporter()
+
+
+def get_parquet_status():
+    conn = get_conn()
+    try:
+        exported_at = get_meta(conn, "parquet_exported_at")
+        marks = {t: get_meta(conn, f"parquet_wm_{t}") for t in PARQUET_TABLES}
+        dirty = conn.execute("SELECT COUNT(*) FROM parquet_dirty").fetchone()[0]
+    finally:
+        conn.close()
+    files = size = 0
+    for root, _, names in os.walk(PARQUET_DIR):
+        for name in names:
+            if name.endswith(".parquet"):
+                files += 1
+                size += os.path.getsize(os.path.join(root, name))
+    return {"exported_at": exported_at, "watermarks": marks, "dirty": dirty, "files": files, "bytes": size}
+
+
+def read_parquet_table(table, start_month=None, end_month=None, columns=None):
+    """
+    Load `table` from the Parquet store as a DataFrame, reading only the
+    month partitions in [start_month, end_month] ('YYYY-MM') and `columns`.
+    The partition key is available as a 'month' column.
+    """
+    import pandas as pd
+    import pyarrow.dataset as ds
+    path = os.path.join(PARQUET_DIR, table)
+    columns = columns or list(PARQUET_TABLES[table]["columns"]) + ["month"]
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=columns)
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    flt = None
+    if start_month:
+        flt = ds.field("month") >= start_month
+    if end_month:
+        upper = ds.field("month") <= end_month
+        flt = upper if flt is None else flt & upper
+    return dataset.to_table(columns=columns, filter=flt).to_pandas()
+
+
+def report_revenue(by, start_month=None, end_month=None):
+    """Revenue, commission and bill count grouped by any of month/hood/billing_type/hour/weekday."""
+    import pandas as pd
+    columns = ["id", "month", "total_amount", "commission"]
+    columns += [col for col in ("hood", "billing_type") if col in by]
+    if {"hour", "weekday"} & set(by):
+        columns.append("timestamp")
+    df = read_parquet_table("bills", start_month, end_month, columns)
+    if df.empty:
+        return pd.DataFrame(columns=list(by) + ["revenue", "commission", "bills"])
+    # derived keys stay vectorized (dt.strftime would be per-row)
+    derived = {
+        "hour": lambda: df["timestamp"].dt.hour,
+        "weekday": lambda: df["timestamp"].dt.day_name(),
+    }
+    for col in by:
+        if col in derived:
+            df[col] = derived[col]()
+    out = df.groupby(list(by), dropna=False).agg(
+        revenue=("total_amount", "sum"), commission=("commission", "sum"), bills=("id", "count")
+    )
+    return out.reset_index()
+
+
+def report_item_velocity(start_month=None, end_month=None):
+    """Units sold per item per month from ITEMS bill details ('Name×qty, ...')."""
+    import pandas as pd
+    df = read_parquet_table("bills", start_month, end_month, ["month", "billing_type", "details"])
+    df = df[df["billing_type"] == "ITEMS"]
+    if df.empty:
+        return pd.DataFrame(columns=["month", "item", "units", "units_per_day"])
+    lines = df.assign(line=df["details"].str.split(",")).explode("line")
+    parts = lines["line"].str.strip().str.extract(r"^(?P<item>.+?)×(?P<qty>\d+)$")
+    lines = lines.assign(item=parts["item"], units=pd.to_numeric(parts["qty"])).dropna(subset=["item"])
+    out = lines.groupby(["month", "item"])["units"].sum().reset_index()
+    days = pd.to_datetime(out["month"] + "-01").dt.days_in_month
+    out["units_per_day"] = (out["units"] / days).round(2)
+    return out.sort_values(["month", "units"], ascending=[False, False])
+
+
+def report_membership_sales(start_month=None, end_month=None):
+    import pandas as pd
+    df = read_parquet_table("memberships", start_month, end_month, ["month", "customer_cid", "tier"])
+    if df.empty:
+        return pd.DataFrame(columns=["month", "tier", "sold", "revenue"])
+    out = df.groupby(["month", "tier"]).size().rename("sold").reset_index()
+    out["revenue"] = out["tier"].map(MEMBERSHIP_PRICES).fillna(0) * out["sold"]
+    return out
@@ -0,0 +1,138 @@
+"""Payroll computation and the monthly payroll cache."""
+from datetime import datetime, timedelta
+
+from exoticbill.config import IST
+from exoticbill.core.db import get_conn
+from exoticbill.core.tiering import bills_source, get_history_conn, get_hot_since, has_archive
+
+
+# ---------- PAYROLL ----------
+PAYROLL_COLUMNS = ["employee_cid", "name", "rank", "hood", "shifts", "minutes",
+                   "bills", "revenue", "commission", "tax"]
+
+
+def compute_payroll(start_str, end_str):
+    """
+    Payroll for every employee over [start_str, end_str] in three grouped
+    queries (employees, shifts, bills) joined with pandas. Open shifts count
+    up to min(now, end_str). Returns a DataFrame with PAYROLL_COLUMNS plus
+    hours and net_payout (commission - tax).
+    """
+    import pandas as pd
+    now_str = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    open_until = min(now_str, end_str)
+    source = bills_source(start_str)
+    conn = get_history_conn() if source == "bills_all" else get_conn()
+    try:
+        emps = pd.DataFrame(
+            conn.execute("SELECT cid, name, rank, hood FROM employees").fetchall(),
+            columns=["employee_cid", "name", "rank", "hood"]
+        )
+        shifts = pd.DataFrame(conn.execute("""
+            SELECT employee_cid, COUNT(*),
+                   SUM(CASE WHEN end_ts IS NULL
+                            THEN MAX(0, (julianday(?) - julianday(start_ts)) * 1440)
+                            ELSE COALESCE(duration_minutes, 0) END)
+            FROM shifts
+            WHERE start_ts >= ? AND start_ts <= ?
+            GROUP BY employee_cid
+        """, (open_until, start_str, end_str)).fetchall(), columns=["employee_cid", "shifts", "minutes"])
+        # each tier pinned to its covering timestamp index: left to the planner,
+        # the choice between it and a skip-scan of idx_bills_emp_ts flips with table size
+        arms = ["""SELECT employee_key, amount_paise, commission_paise, tax_paise
+                   FROM main.bill_rows INDEXED BY idx_bills_ts WHERE timestamp >= ? AND timestamp <= ?"""]
+        params = [start_str, end_str]
+        if source == "bills_all" and has_archive(conn):  # the archive arm of bill_rows_all, same bound
+            arms.append("""SELECT employee_key, amount_paise, commission_paise, tax_paise
+                           FROM archive.bill_rows INDEXED BY idx_arch_bills_ts
+                           WHERE timestamp >= ? AND timestamp <= ? AND timestamp < ?""")
+            params += [start_str, end_str, get_hot_since(conn)]
+        bills = pd.DataFrame(conn.execute(f"""
+            SELECT k.cid, COUNT(*), COALESCE(SUM(b.amount_paise), 0) / 100.0,
+                   COALESCE(SUM(b.commission_paise), 0) / 100.0, COALESCE(SUM(b.tax_paise), 0) / 100.0
+            FROM ({" UNION ALL ".join(arms)}) b LEFT JOIN main.cid_keys k ON k.id = b.employee_key
+            GROUP BY b.employee_key
+        """, params).fetchall(), columns=["employee_cid", "bills", "revenue", "commission", "tax"])
+    finally:
+        conn.close()
+
+    df = emps.merge(shifts, on="employee_cid", how="outer").merge(bills, on="employee_cid", how="outer")
+    df = df[(df["shifts"].fillna(0) > 0) | (df["bills"].fillna(0) > 0)]
+    df[["name", "rank", "hood"]] = df[["name", "rank", "hood"]].fillna("Unknown")
+    num = ["shifts", "minutes", "bills", "revenue", "commission", "tax"]
+    df[num] = df[num].fillna(0)
+    df[["shifts", "bills"]] = df[["shifts", "bills"]].astype(int)
+    return _with_payroll_totals(df[PAYROLL_COLUMNS])
+
+
+def _with_payroll_totals(df):
+    df = df.copy()
+    df["hours"] = (df["minutes"] / 60.0).round(2)
+    df["net_payout"] = df["commission"] - df["tax"]
+    return df.sort_values("net_payout", ascending=False).reset_index(drop=True)
+
+
+def month_bounds(year, month):
+    start = datetime(year, month, 1)
+    nxt = datetime(year + (month == 12), month % 12 + 1, 1)
+    return (start.strftime("%Y-%m-%d %H:%M:%S"),
+            (nxt - timedelta(seconds=1)).strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def get_month_payroll(year, month, refresh=False):
+    """
+    Payroll for a calendar month. Closed months are computed once and then
+    served from payroll_cache; the running month is always computed live.
+    """
+    import pandas as pd
+    key = f"{year:04d}-{month:02d}"
+    start_str, end_str = month_bounds(year, month)
+    closed = end_str < datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    conn = get_conn()
+    try:
+        if refresh:
+            invalidate_payroll_cache(key, conn)
+        if closed and conn.execute("SELECT 1 FROM payroll_months WHERE month = ?", (key,)).fetchone():
+            rows = conn.execute(
+                f"SELECT {', '.join(PAYROLL_COLUMNS)} FROM payroll_cache WHERE month = ?", (key,)
+            ).fetchall()
+            return _with_payroll_totals(pd.DataFrame(rows, columns=PAYROLL_COLUMNS)), True
+    finally:
+        conn.close()
+
+    df = compute_payroll(start_str, end_str)
+    if closed:
+        conn = get_conn()
+        try:
+            with conn:
+                conn.execute("DELETE FROM payroll_cache WHERE month = ?", (key,))
+                conn.executemany(
+                    f"INSERT INTO payroll_cache (month, {', '.join(PAYROLL_COLUMNS)}) "
+                    f"VALUES (?{', ?' * len(PAYROLL_COLUMNS)})",
+                    [(key, *row) for row in df[PAYROLL_COLUMNS].itertuples(index=False, name=None)]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO payroll_months (month, computed_at) VALUES (?, ?)",
+                    (key, datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"))
+                )
+        finally:
+            conn.close()
+    return df, False
+
+
+def invalidate_payroll_cache(month=None, conn=None):
+    """Drop cached payroll for one 'YYYY-MM' month (or all months)."""
+    own = conn is None
+    if own:
+        conn = get_conn()
+    try:
+        with conn:
+            if month is None:
+                conn.execute("DELETE FROM payroll_cache")
+                conn.execute("DELETE FROM payroll_months")
+            else:
+                conn.execute("DELETE FROM payroll_cache WHERE month = ?", (month,))
+                conn.execute("DELETE FROM payroll_months WHERE month = ?", (month,))
+    finally:
+        if own:
+            conn.close()
@@ -0,0 +1,168 @@
+"""Per-rerun render timing and cProfile capture for the Performance page."""
+import cProfile
+import io
+import marshal
+import pstats
+import threading
+import time
+from datetime import datetime
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from exoticbill.config import IST
+
+
+# ========== RENDER PROFILING ==========
+class RenderStats:
+    """
+    In-memory wall-time histograms per page and per page/tab, shared across
+    reruns via st.cache_resource.
+    """
+
+    BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sections = {}
+
+    def record(self, key, elapsed_ms):
+        with self._lock:
+            entry = self.sections.get(key)
+            if entry is None:
+                entry = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                         "hist": [0] * (len(self.BUCKETS_MS) + 1)}
+                self.sections[key] = entry
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            idx = len(self.BUCKETS_MS)
+            for i, edge in enumerate(self.BUCKETS_MS):
+                if elapsed_ms <= edge:
+                    idx = i
+                    break
+            entry["hist"][idx] += 1
+
+    def bucket_labels(self):
+        labels = [f"≤{edge}ms" for edge in self.BUCKETS_MS]
+        labels.append(f">{self.BUCKETS_MS[-1]}ms")
+        return labels
+
+    def snapshot(self):
+        with self._lock:
+            return {k: dict(v, hist=list(v["hist"])) for k, v in self.sections.items()}
+
+    def reset(self):
+        with self._lock:
+            self.sections.clear()
+
+
+@st.cache_resource
+def get_render_stats():
+    return RenderStats()
+
+
+class FinishedProfiles:
+    """
+    Profiles captured in a rerun, per session, until that session's next
+    rerun moves them into its session_state. A rerun ended by st.stop()
+    can no longer write session_state, so the hand-off goes through here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_session = {}
+
+    def put(self, session_id, payload):
+        with self._lock:
+            self._by_session[session_id] = payload
+
+    def pop(self, session_id):
+        with self._lock:
+            return self._by_session.pop(session_id, None)
+
+
+@st.cache_resource
+def get_finished_profiles():
+    return FinishedProfiles()
+
+
+def _session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
+
+
+class RenderTimer:
+    """
+    Splits one rerun into page and tab sections and records them on finish().
+    Reruns cut short by st.rerun()/st.stop() are not recorded, but a
+    requested profile of one is still kept (see store_profile). The
+    one-shot profile_next_rerun request is cleared only once its profile
+    has reached session_state.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.page_name = None
+        self.page_t0 = None
+        self.tab_name = None
+        self.tab_t0 = None
+        self.timings = []
+        self.profiler = None
+        payload = get_finished_profiles().pop(_session_id())
+        if payload is not None:
+            st.session_state.last_profile = payload
+            st.session_state.profile_next_rerun = False
+        if st.session_state.get("profile_next_rerun"):
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def _close_tab(self, now):
+        if self.tab_name is not None:
+            self.timings.append((f"{self.page_name} / {self.tab_name}", (now - self.tab_t0) * 1000.0))
+            self.tab_name = None
+
+    def _close_page(self, now):
+        self._close_tab(now)
+        if self.page_name is not None:
+            self.timings.append((self.page_name, (now - self.page_t0) * 1000.0))
+
+    def page(self, name):
+        now = time.perf_counter()
+        self._close_page(now)
+        self.page_name, self.page_t0 = name, now
+
+    def tab(self, name):
+        now = time.perf_counter()
+        self._close_tab(now)
+        self.tab_name, self.tab_t0 = name, now
+
+    def finish(self):
+        now = time.perf_counter()
+        self._close_page(now)
+        stats = get_render_stats()
+        stats.record("(rerun)", (now - self.t0) * 1000.0)
+        for key, elapsed_ms in self.timings:
+            stats.record(key, elapsed_ms)
+        self.store_profile()
+
+    def store_profile(self):
+        """Stop a requested profile and hand it to the session's next rerun (no session_state writes)."""
+        if self.profiler is not None:
+            self.profiler.disable()
+            get_finished_profiles().put(_session_id(), profile_payload(self.profiler, self.page_name))
+            self.profiler = None
+
+
+def profile_payload(profiler, page_name):
+    """Serialize a finished cProfile run as a .prof (pstats) dump plus a text report."""
+    profiler.create_stats()
+    dump = marshal.dumps(profiler.stats)  # same bytes as Profile.dump_stats()
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(60)
+    return {
+        "ts": datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"),
+        "page": page_name or "?",
+        "prof": dump,
+        "report": report.getvalue(),
+    }
@@ -0,0 +1,99 @@
+"""Start/end of shifts and per-employee shift history (schema: db.init_db)."""
+import sqlite3
+from datetime import datetime
+
+import streamlit as st
+
+from exoticbill.config import IST
+from exoticbill.core.audit import audit
+from exoticbill.core.cache import query_cached
+from exoticbill.core.db import get_conn
+
+
+# ---------- SHIFT HELPERS ----------
+def start_shift(employee_cid):
+    if not (employee_cid and str(employee_cid).strip()):
+        return False, "Please enter your CID first."
+
+    conn = get_conn()
+    try:
+        # idx_shifts_one_open makes this insert the "already active" check,
+        # so two tabs starting the same shift cannot both succeed
+        try:
+            with conn:
+                cur = conn.execute(
+                    "INSERT INTO shifts (employee_cid, start_ts, bills_count, revenue, commission) VALUES (?,?,0,0,0)",
+                    (employee_cid, datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"))
+                )
+        except sqlite3.IntegrityError:
+            return False, "Shift already active."
+        sid = cur.lastrowid
+    finally:
+        conn.close()
+
+    audit("SHIFT_START", "shifts", sid, st.session_state.get("username", "?"),
+          new_values={"employee_cid": employee_cid})
+    return True, "Shift started."
+
+
+def end_shift(employee_cid):
+    if not (employee_cid and str(employee_cid).strip()):
+        return False, "Please enter your CID first."
+
+    conn = get_conn()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, start_ts, COALESCE(bills_count,0), COALESCE(revenue,0), COALESCE(commission,0) "
+                "FROM shifts WHERE employee_cid=? AND end_ts IS NULL",
+                (employee_cid,)
+            ).fetchone()
+            if not row:
+                conn.rollback()
+                return False, "No active shift."
+
+            # counters are already running totals; closing is a single-row update
+            sid, start_ts, bcount, revenue, commission = row
+            now = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+            dt_start = datetime.strptime(start_ts, "%Y-%m-%d %H:%M:%S")
+            dt_end = datetime.strptime(now, "%Y-%m-%d %H:%M:%S")
+            duration = int((dt_end - dt_start).total_seconds() // 60)
+
+            conn.execute(
+                "UPDATE shifts SET end_ts=?, duration_minutes=? WHERE id=?",
+                (now, duration, sid)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+
+    audit("SHIFT_END", "shifts", sid, st.session_state.get("username", "?"),
+          old_values={"start_ts": start_ts},
+          new_values={"end_ts": now, "bills": bcount, "revenue": revenue, "commission": commission})
+    return True, "Shift ended."
+
+
+@query_cached("shifts_by_employee", ("shifts", "employees"))
+def get_employee_shifts(employee_cid, start_str, end_str):
+    """One employee's shifts started in [start_str, end_str], latest first."""
+    conn = get_conn()
+    try:
+        return conn.execute("""
+            SELECT s.id,
+                   s.employee_cid,
+                   COALESCE(e.name, 'Unknown') AS employee_name,
+                   s.start_ts, s.end_ts,
+                   s.duration_minutes, s.bills_count, s.revenue
+            FROM shifts s
+            LEFT JOIN employees e ON e.cid = s.employee_cid
+            WHERE s.employee_cid = ?
+              AND s.start_ts >= ?
+              AND s.start_ts <= ?
+            ORDER BY COALESCE(s.end_ts, s.start_ts) DESC
+        """, (employee_cid, start_str, end_str)).fetchall()
+    finally:
+        conn.close()
@@ -0,0 +1,189 @@
+"""The read-only analytics snapshot DB and its background refresher."""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import streamlit as st
+
+from exoticbill.config import (
+    IST, SNAPSHOT_BACKUP_PAGES, SNAPSHOT_BACKUP_RESTARTS, SNAPSHOT_BACKUP_SLEEP_S, SNAPSHOT_CACHE_KIB,
+    SNAPSHOT_DB_PATH, SNAPSHOT_MMAP_BYTES, SNAPSHOT_REFRESH_S, STORAGE_BACKEND
+)
+from exoticbill.core.cache import get_table_cache
+from exoticbill.core.db import get_conn, get_meta
+from exoticbill.core.tiering import attach_archive
+
+
+# ---------- ANALYTICS SNAPSHOT (read-only) ----------
+class _BackupRestarted(Exception):
+    pass
+
+
+def _copy_live_db(src, dst):
+    """
+    Backup-API copy in SNAPSHOT_BACKUP_PAGES steps. The live DB is on the
+    rollback journal, so each step holds a shared lock that bill commits
+    wait on: a commit waits for one step, not the whole copy. A commit from
+    another connection restarts the copy; if that keeps happening the last
+    attempt copies in one step.
+    """
+    progress = {"remaining": None, "restarts": 0}
+
+    def on_step(status, remaining, total):
+        if progress["remaining"] is not None and remaining > progress["remaining"]:
+            progress["restarts"] += 1
+            if progress["restarts"] >= SNAPSHOT_BACKUP_RESTARTS:
+                raise _BackupRestarted
+        progress["remaining"] = remaining
+
+    try:
+        src.backup(dst, pages=SNAPSHOT_BACKUP_PAGES, progress=on_step, sleep=SNAPSHOT_BACKUP_SLEEP_S)
+    except _BackupRestarted:
+        src.backup(dst)
+
+
+def refresh_snapshot():
+    """
+    Copy the live DB into SNAPSHOT_DB_PATH (_copy_live_db), stamp it, then
+    atomically swap it in. Readers holding the previous snapshot keep their
+    file until they close. The in-memory backend has no snapshot: analytics
+    read the live DB.
+    """
+    if STORAGE_BACKEND == "memory":
+        return
+    tmp = SNAPSHOT_DB_PATH + ".tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    src = get_conn()
+    dst = sqlite3.connect(tmp)
+    try:
+        _copy_live_db(src, dst)
+        dst.execute(
+            "INSERT OR REPLACE INTO app_meta (key, value) VALUES ('snapshot_taken_at', ?)",
+            (datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"),)
+        )
+        dst.commit()
+    finally:
+        dst.close()
+        src.close()
+    os.replace(tmp, SNAPSHOT_DB_PATH)
+
+
+class SnapshotRefresher:
+    """Background thread that keeps the analytics snapshot at most SNAPSHOT_REFRESH_S old."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+        self._thread.start()
+
+    def refresh(self):
+        """Rebuild now (serialized with the background thread)."""
+        with self._lock:
+            refresh_snapshot()
+
+    def request_refresh(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except (sqlite3.Error, OSError):
+                pass
+            self._wake.wait(SNAPSHOT_REFRESH_S)
+            self._wake.clear()
+
+
+@st.cache_resource
+def get_snapshot_refresher():
+    return SnapshotRefresher()
+
+
+def get_analytics_conn(history=False):
+    """
+    Read-only connection to the analytics snapshot: query_only, memory-mapped
+    and with a larger page cache, so long reports never hold locks on the
+    live DB. `history=True` also attaches the archive tier (bills_all).
+    With the in-memory backend this is a query_only connection to the live DB.
+    """
+    if STORAGE_BACKEND == "memory":
+        conn = get_conn()
+    else:
+        refresher = get_snapshot_refresher()
+        if not os.path.exists(SNAPSHOT_DB_PATH):
+            refresher.refresh()
+        conn = get_conn(path=f"file:{SNAPSHOT_DB_PATH}?mode=ro", uri=True)
+    if history:
+        attach_archive(conn, readonly=True)  # TEMP views must exist before query_only
+    conn.execute("PRAGMA query_only = 1")
+    conn.execute(f"PRAGMA mmap_size = {SNAPSHOT_MMAP_BYTES}")
+    conn.execute(f"PRAGMA cache_size = -{SNAPSHOT_CACHE_KIB}")
+    return conn
+
+
+_snapshot_generations = {}  # (inode, mtime) of the snapshot file -> its table_generations
+
+
+def get_analytics_generations():
+    """
+    {table: generation} for the data analytics connections read: the
+    snapshot's own copy of table_generations (a refresh that copied no new
+    writes leaves query-cache entries valid) plus the live "archive" marker,
+    as the archive tier is attached live. In-memory backend: the live ones.
+    """
+    live = get_table_cache().generations()
+    if STORAGE_BACKEND == "memory":
+        return live
+    try:
+        info = os.stat(SNAPSHOT_DB_PATH)
+    except FileNotFoundError:
+        return {"archive": live.get("archive")}
+    key = (info.st_ino, info.st_mtime_ns)
+    gens = _snapshot_generations.get(key)
+    if gens is None:
+        conn = get_conn(path=f"file:{SNAPSHOT_DB_PATH}?mode=ro", uri=True)
+        try:
+            gens = dict(conn.execute("SELECT table_name, generation FROM table_generations").fetchall())
+        except sqlite3.OperationalError:  # snapshot taken before table_generations existed
+            gens = {}
+        finally:
+            conn.close()
+        _snapshot_generations.clear()
+        _snapshot_generations[key] = gens
+    return dict(gens, archive=live.get("archive"))
+
+
+def get_snapshot_age():
+    """(taken_at string, age in seconds) of the current snapshot, or (None, None)."""
+    if STORAGE_BACKEND == "memory" or not os.path.exists(SNAPSHOT_DB_PATH):
+        return None, None
+    conn = get_conn(path=f"file:{SNAPSHOT_DB_PATH}?mode=ro", uri=True)
+    try:
+        taken_at = get_meta(conn, "snapshot_taken_at")
+    finally:
+        conn.close()
+    if not taken_at:
+        return None, None
+    taken = datetime.strptime(taken_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=IST)
+    return taken_at, int((datetime.now(IST) - taken).total_seconds())
+
+
+def show_snapshot_age(key):
+    """Caption with snapshot staleness plus a manual refresh button."""
+    taken_at, age = get_snapshot_age()
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        if STORAGE_BACKEND == "memory":
+            st.caption("📸 In-memory storage: analytics read the live database.")
+        elif taken_at:
+            st.caption(f"📸 Served from analytics snapshot taken {taken_at} IST "
+                       f"({age // 60}m {age % 60}s ago, refreshes every {SNAPSHOT_REFRESH_S // 60}m)")
+        else:
+            st.caption("📸 Analytics snapshot not built yet.")
+    with col2:
+        if st.button("Refresh", key=key):
+            get_snapshot_refresher().refresh()
+            st.rerun()
@@ -0,0 +1,131 @@
+"""Employees and hoods."""
+import sqlite3
+
+import streamlit as st
+
+from exoticbill.core.audit import audit
+from exoticbill.core.cache import table_cached
+from exoticbill.core.db import bump_generation, get_conn
+from exoticbill.core.parquet import mark_parquet_dirty
+from exoticbill.core.tiering import get_history_conn, has_archive
+
+
+@table_cached("employees")
+def get_employee_rank(cid):
+    conn = get_conn()
+    row = conn.execute("SELECT rank FROM employees WHERE cid = ?", (cid,)).fetchone()
+    conn.close()
+    return row[0] if row else "Trainee"
+
+
+def add_employee(cid, name, rank="Trainee"):
+    conn = get_conn()
+    try:
+        conn.execute("INSERT INTO employees (cid, name, rank) VALUES (?,?,?)", (cid, name, rank))
+        conn.commit()
+    except sqlite3.IntegrityError:
+        st.warning("Employee CID already exists.")
+    conn.close()
+
+
+def delete_employee(cid):
+    conn = get_conn()
+    conn.execute("DELETE FROM employees WHERE cid = ?", (cid,))
+    conn.commit()
+    conn.close()
+
+
+def update_employee(cid, name=None, rank=None, hood=None):
+    before = get_employee_details(cid)
+    conn = get_conn()
+    if name is not None:
+        conn.execute("UPDATE employees SET name = ? WHERE cid = ?", (name, cid))
+    if rank is not None:
+        conn.execute("UPDATE employees SET rank = ? WHERE cid = ?", (rank, cid))
+    if hood is not None:
+        conn.execute("UPDATE employees SET hood = ? WHERE cid = ?", (hood, cid))
+    conn.commit()
+    conn.close()
+    after = get_employee_details(cid)
+    audit("UPDATE_EMP", "employees", cid, st.session_state.get("username", "?"), before, after)
+
+
+@table_cached("employees")
+def get_employee_details(cid):
+    conn = get_conn()
+    row = conn.execute("SELECT name, rank, hood FROM employees WHERE cid = ?", (cid,)).fetchone()
+    conn.close()
+    if row:
+        return {"name": row[0], "rank": row[1], "hood": row[2]}
+    return None
+
+
+@table_cached("employees")
+def get_all_employee_cids():
+    conn = get_conn()
+    rows = conn.execute("SELECT cid, name FROM employees").fetchall()
+    conn.close()
+    return rows
+
+
+# ---------- HOODS HELPERS ----------
+def add_hood(name, location):
+    conn = get_conn()
+    try:
+        conn.execute("INSERT INTO hoods (name, location) VALUES (?,?)", (name, location))
+        conn.commit()
+    except sqlite3.IntegrityError:
+        st.warning("That hood already exists.")
+    conn.close()
+
+
+def update_hood(old_name, new_name, new_location):
+    conn = get_history_conn()
+    c = conn.cursor()
+    c.execute("UPDATE hoods SET name=?, location=? WHERE name=?", (new_name, new_location, old_name))
+    c.execute("UPDATE employees SET hood=? WHERE hood=?", (new_name, old_name))
+    # a rename, not a move: keep Hood War history (both tiers, deleted bills too) under the new name
+    renamed = 0
+    for schema in ("main", "archive") if has_archive(conn) else ("main",):
+        for table in ("bill_rows", "bills_deleted"):
+            c.execute(f"UPDATE {schema}.{table} SET hood=? WHERE hood=?", (new_name, old_name))
+            renamed += c.rowcount
+            if c.rowcount and schema == "archive":
+                bump_generation(conn, "archive")
+    if renamed:
+        mark_parquet_dirty("bills", conn=conn)
+    conn.commit()
+    conn.close()
+
+
+def delete_hood(name):
+    conn = get_conn()
+    c = conn.cursor()
+    c.execute("DELETE FROM hoods WHERE name=?", (name,))
+    c.execute("UPDATE employees SET hood='No Hood' WHERE hood=?", (name,))
+    conn.commit()
+    conn.close()
+
+
+@table_cached("hoods")
+def get_all_hoods():
+    conn = get_conn()
+    rows = conn.execute("SELECT name, location FROM hoods").fetchall()
+    conn.close()
+    return rows
+
+
+def assign_employees_to_hood(hood, cids):
+    conn = get_conn()
+    for cid in cids:
+        conn.execute("UPDATE employees SET hood=? WHERE cid=?", (hood, cid))
+    conn.commit()
+    conn.close()
+
+
+@table_cached("employees")
+def get_employees_by_hood(hood):
+    conn = get_conn()
+    rows = conn.execute("SELECT cid, name FROM employees WHERE hood=?", (hood,)).fetchall()
+    conn.close()
+    return rows
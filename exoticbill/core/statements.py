@@ -0,0 +1,248 @@
+"""Monthly customer statements: one ordered pass over bills, rendered in a process pool."""
+import hashlib
+import html
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from exoticbill.config import IST, STATEMENT_CHUNK, STATEMENT_WORKERS, STATEMENTS_DIR
+from exoticbill.core.snapshot import get_analytics_conn
+from exoticbill.core.tiering import bill_rows_source, bills_source
+
+
+# ---------- CUSTOMER STATEMENTS ----------
+STATEMENT_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Statement {month} - {cid}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; color: #222; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border-bottom: 1px solid #ddd; padding: 4px 8px; text-align: left; }}
+td.num, th.num {{ text-align: right; }}
+@media print {{ body {{ margin: 0; }} }}
+</style></head><body>
+<h1>Auto Exotic &mdash; Monthly Statement</h1>
+<p><b>Customer:</b> {cid}<br><b>Period:</b> {month}<br><b>Generated:</b> {generated_at} IST</p>
+<h2>Bills</h2>
+{bills}
+<p><b>{count} bill(s), total &#8377;{total:,.2f}</b></p>
+<h2>Membership</h2>
+<p>{membership}</p>
+<h2>Loyalty Points</h2>
+<p>Earned this month: {earned:,} &middot; Redeemed/expired this month: {spent:,} &middot; <b>Balance: {balance:,}</b></p>
+</body></html>
+"""
+
+
+def _month_bounds(month):
+    y, m = int(month[:4]), int(month[5:7])
+    return f"{month}-01 00:00:00", f"{y + m // 12:04d}-{m % 12 + 1:02d}-01 00:00:00"
+
+
+def statement_file(customer_cid):
+    """Path of a customer's statement inside the month folder (sharded, collision-free)."""
+    digest = hashlib.sha1(customer_cid.encode("utf-8")).hexdigest()
+    safe = re.sub(r"[^0-9A-Za-z_-]+", "_", customer_cid)[:40]
+    return os.path.join(digest[:2], f"{safe}-{digest[:8]}.html")
+
+
+def _render_statement(month, generated_at, cid, bills, membership, balance, earned, spent):
+    if bills:
+        body = "".join(
+            f"<tr><td>{html.escape(ts)}</td><td>{html.escape(btype or '')}</td>"
+            f"<td>{html.escape(details or '')}</td><td class=\"num\">&#8377;{amount or 0:,.2f}</td></tr>"
+            for _, ts, btype, details, amount in bills
+        )
+        bills_html = ("<table><tr><th>Date</th><th>Type</th><th>Details</th><th class=\"num\">Amount</th></tr>"
+                      f"{body}</table>")
+    else:
+        bills_html = "<p>No bills this month.</p>"
+    if membership:
+        tier, dop = membership
+        expires = (datetime.strptime(dop, "%Y-%m-%d %H:%M:%S") + timedelta(days=7)).strftime("%Y-%m-%d %H:%M")
+        membership_html = f"{html.escape(tier)} (bought {html.escape(dop[:16])}, valid until {expires})"
+    else:
+        membership_html = "No active membership."
+    return STATEMENT_HTML.format(
+        month=month, cid=html.escape(cid), generated_at=generated_at, bills=bills_html,
+        count=len(bills), total=sum(b[4] or 0 for b in bills), membership=membership_html,
+        earned=earned, spent=spent, balance=balance,
+    )
+
+
+def _render_chunk(month_dir, month, generated_at, customers):
+    """Worker: write one chunk's statements, return their manifest records (same order)."""
+    records = []
+    for cid, bills, membership, balance, earned, spent in customers:
+        data = _render_statement(month, generated_at, cid, bills, membership, balance, earned, spent).encode("utf-8")
+        rel = statement_file(cid)
+        path = os.path.join(month_dir, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        records.append({
+            "customer_cid": cid, "file": rel, "bills": len(bills),
+            "total": round(sum(b[4] or 0 for b in bills), 2),
+            "membership": membership[0] if membership else None, "loyalty_balance": balance,
+            "bytes": len(data), "sha256": hashlib.sha256(data).hexdigest(),
+        })
+    return records
+
+
+def _write_checkpoint(path, checkpoint):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def get_statement_status(month, out_dir=STATEMENTS_DIR):
+    """Checkpoint of `month`'s run ({last_customer, statements, done, ...}) or None if never started."""
+    try:
+        with open(os.path.join(out_dir, month, "checkpoint.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _active_customers(rows, extras):
+    """Merge bills grouped by customer (sorted) with sorted bill-less customers -> (cid, bills)."""
+    extras = iter(extras)
+    extra = next(extras, None)
+    for cid, group in itertools.groupby(rows, key=lambda r: r[0]):
+        while extra is not None and extra < cid:
+            yield extra, []
+            extra = next(extras, None)
+        if extra == cid:
+            extra = next(extras, None)
+        yield cid, [r[1:] for r in group]
+    while extra is not None:
+        yield extra, []
+        extra = next(extras, None)
+
+
+def generate_statements(month, out_dir=STATEMENTS_DIR, workers=STATEMENT_WORKERS, chunk=STATEMENT_CHUNK,
+                        resume=True, progress=None):
+    """
+    Write an HTML statement for every active customer of `month` ('YYYY-MM'):
+    anyone with a bill or loyalty activity in the month, or a current
+    membership. Bills are read from the analytics snapshot in one pass
+    ordered by customer; chunks of `chunk` customers render in a pool of
+    `workers` processes. Chunks are committed in order, each appending to
+    manifest.jsonl and advancing checkpoint.json, so an interrupted run
+    resumes after the last committed customer (resume=False starts over).
+    `progress(checkpoint)` is called after every chunk. Returns the final
+    checkpoint.
+    """
+    month_dir = os.path.join(out_dir, month)
+    if not resume:
+        shutil.rmtree(month_dir, ignore_errors=True)
+    os.makedirs(month_dir, exist_ok=True)
+    ckpt_path = os.path.join(month_dir, "checkpoint.json")
+    manifest_path = os.path.join(month_dir, "manifest.jsonl")
+    now = datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S")
+    ckpt = get_statement_status(month, out_dir)
+    if ckpt and ckpt["done"]:
+        return ckpt
+    if ckpt is None:
+        ckpt = {"month": month, "last_customer": "", "statements": 0, "manifest_bytes": 0,
+                "started_at": now, "updated_at": now, "done": False}
+    with open(manifest_path, "ab") as manifest:
+        manifest.truncate(ckpt["manifest_bytes"])  # drop records past the checkpoint
+
+    start, end = _month_bounds(month)
+    source = bills_source(start)
+    conn = get_analytics_conn(history=source == "bills_all")
+    try:
+        after = ckpt["last_customer"]
+        memberships = {cid: (tier, dop) for cid, tier, dop in conn.execute(
+            "SELECT customer_cid, tier, dop FROM memberships WHERE customer_cid > ?", (after,))}
+        balances = dict(conn.execute("SELECT customer_cid, points FROM loyalty WHERE customer_cid > ?", (after,)))
+        activity = {cid: (earned, spent) for cid, earned, spent in conn.execute("""
+            SELECT customer_cid, SUM(MAX(points, 0)), -SUM(MIN(points, 0)) FROM loyalty_ledger
+            WHERE ts >= ? AND ts < ? AND customer_cid > ? GROUP BY customer_cid
+        """, (start, end, after))}
+        rows = conn.execute(f"""
+            SELECT k.cid, b.id, b.timestamp, t.name, b.details, b.amount_paise / 100.0
+            FROM {bill_rows_source(source)} b
+            JOIN cid_keys k ON k.id = b.customer_key
+            LEFT JOIN billing_types t ON t.code = b.type_code
+            WHERE b.timestamp >= ? AND b.timestamp < ? AND k.cid > ?
+            ORDER BY k.cid, b.timestamp, b.id
+        """, (start, end, after))
+        customers = (
+            (cid, bills, memberships.get(cid), balances.get(cid, 0), *activity.get(cid, (0, 0)))
+            for cid, bills in _active_customers(rows, sorted(set(memberships) | set(activity)))
+        )
+
+        # spawn: the server process has threads (audit writer, refreshers) a fork would copy mid-lock
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool, \
+                open(manifest_path, "ab") as manifest:
+            pending = []
+            while True:
+                while len(pending) < workers * 2:
+                    batch = list(itertools.islice(customers, chunk))
+                    if not batch:
+                        break
+                    pending.append((pool.submit(_render_chunk, month_dir, month, now, batch), batch[-1][0]))
+                if not pending:
+                    break
+                future, last_cid = pending.pop(0)
+                records = future.result()
+                manifest.write("".join(json.dumps(r) + "\n" for r in records).encode("utf-8"))
+                manifest.flush()
+                ckpt.update(last_customer=last_cid, statements=ckpt["statements"] + len(records),
+                            manifest_bytes=manifest.tell(),
+                            updated_at=datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"))
+                _write_checkpoint(ckpt_path, ckpt)
+                if progress:
+                    progress(dict(ckpt))
+    finally:
+        conn.close()
+    ckpt.update(done=True, updated_at=datetime.now(IST).strftime("%Y-%m-%d %H:%M:%S"))
+    _write_checkpoint(ckpt_path, ckpt)
+    return ckpt
+
+
+class StatementRunner:
+    """Runs generate_statements on a background thread (one month at a time) so the page stays responsive."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self.month = None
+        self.progress = None
+        self.last_error = None
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, month, workers=STATEMENT_WORKERS, resume=True):
+        """False if a run is already in progress."""
+        with self._lock:
+            if self.running():
+                return False
+            self.month, self.progress, self.last_error = month, None, None
+            self._thread = threading.Thread(target=self._run, args=(month, workers, resume),
+                                            name="statements", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self, month, workers, resume):
+        try:
+            generate_statements(month, workers=workers, resume=resume,
+                                progress=lambda ckpt: setattr(self, "progress", ckpt))
+        except Exception as e:  # surfaced on the Reports page
+            self.last_error = str(e)
+
+
+@st.cache_resource
+def get_statement_runner():
+    return StatementRunner()
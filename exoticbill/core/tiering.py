@@ -0,0 +1,245 @@
+"""Hot/archive bill tiering: the archive DB, bills_all views and the mover."""
+import time
+from datetime import datetime, timedelta
+
+from exoticbill.config import ARCHIVE_DB_PATH, BILLS_HOT_DAYS, IST, STORAGE_BACKEND, TIERING_BATCH_SIZE
+from exoticbill.core.audit import audit
+from exoticbill.core.db import (
+    bump_generation, db_exists, db_location, ensure_bill_rows, feed_json, get_conn, get_meta, set_meta,
+    sync_bill_keys, sync_indexes, _table_columns
+)
+
+# the archive's share of db.INDEXES: the bills_all / bills_deleted_all arms read through these
+ARCHIVE_INDEXES = {
+    "idx_arch_bills_ts": "bill_rows(timestamp, employee_key, amount_paise, commission_paise, tax_paise)",
+    "idx_arch_bills_emp_ts": "bill_rows(employee_key, timestamp, amount_paise)",
+    "idx_arch_bills_emp_type": "bill_rows(employee_key, type_code, amount_paise)",
+    "idx_arch_bills_cust_ts": "bill_rows(customer_key, timestamp)",
+    "idx_arch_bills_hood_ts": "bill_rows(hood, timestamp, amount_paise)",
+    "idx_arch_bills_deleted_id": "bills_deleted(id)",
+    "idx_arch_bills_deleted_at": "bills_deleted(deleted_at)",
+}
+
+
+def _ensure_archive_schema(conn):
+    """
+    Mirror main.bills / main.bills_deleted into the attached archive,
+    adding any columns the main tables gained through later migrations,
+    convert a legacy archive.bills table to bill_rows and sync
+    ARCHIVE_INDEXES. Committed here; run by init_archive and tier_old_bills,
+    not on every attach.
+    """
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS archive.bills (
+        id INTEGER PRIMARY KEY,
+        employee_cid TEXT,
+        customer_cid TEXT,
+        billing_type TEXT,
+        details TEXT,
+        total_amount REAL,
+        timestamp TEXT
+      )
+    """)
+    conn.execute("""
+      CREATE TABLE IF NOT EXISTS archive.bills_deleted (
+        id INTEGER,
+        employee_cid TEXT,
+        customer_cid TEXT,
+        billing_type TEXT,
+        details TEXT,
+        total_amount REAL,
+        timestamp TEXT
+      )
+    """)
+    legacy = conn.execute("SELECT type FROM archive.sqlite_master WHERE name = 'bills'").fetchone()
+    for table in ("bills", "bills_deleted") if legacy and legacy[0] == "table" else ("bills_deleted",):
+        have = {name for name, _ in _table_columns(conn, "archive", table)}
+        for name, ctype in _table_columns(conn, "main", table):
+            if name not in have:
+                conn.execute(f"ALTER TABLE archive.{table} ADD COLUMN {name} {ctype}")
+                if name == "hood":
+                    conn.execute(f"""
+                      UPDATE archive.{table} SET hood = COALESCE(
+                        (SELECT e.hood FROM main.employees e WHERE e.cid = {table}.employee_cid), 'No Hood')
+                    """)
+    ensure_bill_rows(conn, "archive")
+    sync_indexes(conn, ARCHIVE_INDEXES, schema="archive")
+    if conn.in_transaction:
+        conn.commit()
+
+
+def init_archive():
+    """Bring an existing archive DB up to date with main's schema (once per process, after init_db)."""
+    if not db_exists(ARCHIVE_DB_PATH):
+        return
+    conn = get_conn()
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (db_location(ARCHIVE_DB_PATH)[0],))
+        _ensure_archive_schema(conn)
+    finally:
+        conn.close()
+
+
+def attach_archive(conn, readonly=False):
+    """
+    ATTACH the archive DB (if it exists) and define TEMP union views
+    bills_all / bills_deleted_all over both tiers, plus bill_rows_all over
+    the encoded rows (for exact paise sums). Without an archive file the
+    views simply alias the hot tables. `readonly` attaches a file
+    archive with mode=ro and needs a connection opened with uri=True.
+
+    Archive rows are only taken below main's own bills_hot_since watermark,
+    so a snapshot taken before a tiering run never double-counts the rows
+    that run moved.
+    """
+    bill_cols = ", ".join(name for name, _ in _table_columns(conn, "main", "bills"))
+    row_cols = ", ".join(name for name, _ in _table_columns(conn, "main", "bill_rows"))
+    del_cols = ", ".join(name for name, _ in _table_columns(conn, "main", "bills_deleted"))
+    hot_since = get_meta(conn, "bills_hot_since")
+    if db_exists(ARCHIVE_DB_PATH) and hot_since is not None:
+        if readonly and STORAGE_BACKEND == "file":
+            conn.execute("ATTACH DATABASE ? AS archive", (f"file:{ARCHIVE_DB_PATH}?mode=ro",))
+            if not conn.execute("SELECT 1 FROM archive.sqlite_master WHERE name = 'bill_rows'").fetchone():
+                # an archive from before the compact bill encoding: convert it once, writable
+                conn.execute("DETACH DATABASE archive")
+                init_archive()
+                conn.execute("ATTACH DATABASE ? AS archive", (f"file:{ARCHIVE_DB_PATH}?mode=ro",))
+        else:
+            conn.execute("ATTACH DATABASE ? AS archive", (db_location(ARCHIVE_DB_PATH)[0],))
+        below = "'" + hot_since.replace("'", "''") + "'"
+        conn.execute(f"""
+          CREATE TEMP VIEW IF NOT EXISTS bills_all AS
+            SELECT {bill_cols} FROM main.bills
+            UNION ALL
+            SELECT {bill_cols} FROM archive.bills WHERE timestamp < {below}
+        """)
+        conn.execute(f"""
+          CREATE TEMP VIEW IF NOT EXISTS bill_rows_all AS
+            SELECT {row_cols} FROM main.bill_rows
+            UNION ALL
+            SELECT {row_cols} FROM archive.bill_rows WHERE timestamp < {below}
+        """)
+        conn.execute(f"""
+          CREATE TEMP VIEW IF NOT EXISTS bills_deleted_all AS
+            SELECT {del_cols} FROM main.bills_deleted
+            UNION ALL
+            SELECT {del_cols} FROM archive.bills_deleted WHERE timestamp < {below}
+        """)
+    else:
+        conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS bills_all AS SELECT {bill_cols} FROM main.bills")
+        conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS bill_rows_all AS SELECT {row_cols} FROM main.bill_rows")
+        conn.execute(f"CREATE TEMP VIEW IF NOT EXISTS bills_deleted_all AS SELECT {del_cols} FROM main.bills_deleted")
+    return conn
+
+
+def has_archive(conn):
+    return any(row[1] == "archive" for row in conn.execute("PRAGMA database_list").fetchall())
+
+
+def get_history_conn():
+    """Connection for queries that must see both tiers (read `bills_all`)."""
+    return attach_archive(get_conn())
+
+
+def get_hot_since(conn=None):
+    """Timestamp from which main.bills is complete (None = never tiered)."""
+    own = conn is None
+    if own:
+        conn = get_conn()
+    try:
+        return get_meta(conn, "bills_hot_since")
+    finally:
+        if own:
+            conn.close()
+
+
+def bills_source(start_str=None):
+    """`bills` if the range is fully inside the hot tier, else `bills_all`."""
+    hot_since = get_hot_since()
+    if hot_since is None or (start_str and start_str >= hot_since):
+        return "bills"
+    return "bills_all"
+
+
+def bill_rows_source(source):
+    """The encoded rows behind a bills source: bill_rows for `bills`, bill_rows_all for `bills_all`."""
+    return {"bills": "bill_rows", "bills_all": "bill_rows_all"}[source]
+
+
+def tier_old_bills(days=BILLS_HOT_DAYS, batch_size=TIERING_BATCH_SIZE, actor="system"):
+    """
+    Move bills and bills_deleted rows older than `days` into the archive DB.
+    Each batch is its own short IMMEDIATE transaction, so counters keep
+    writing between batches. Returns (bills_moved, deleted_moved).
+    """
+    cutoff = (datetime.now(IST) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = get_conn()
+    conn.isolation_level = None  # explicit BEGIN/COMMIT per batch
+    moved_bills = moved_deleted = 0
+    try:
+        conn.execute("ATTACH DATABASE ? AS archive", (db_location(ARCHIVE_DB_PATH)[0],))
+        _ensure_archive_schema(conn)
+        bill_cols = ", ".join(name for name, _ in _table_columns(conn, "main", "bill_rows"))
+        del_cols = ", ".join(name for name, _ in _table_columns(conn, "main", "bills_deleted"))
+
+        # bills move as encoded rows; the archive's key dictionaries are synced first
+        for table, cols, key in (("bill_rows", bill_cols, "id"), ("bills_deleted", del_cols, "rowid")):
+            while True:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    keys = [r[0] for r in conn.execute(
+                        f"SELECT {key} FROM main.{table} WHERE timestamp < ? LIMIT ?",
+                        (cutoff, batch_size)
+                    ).fetchall()]
+                    if keys:
+                        marks = ",".join("?" * len(keys))
+                        if table == "bill_rows":  # keys added since the last batch
+                            sync_bill_keys(conn)
+                        verb = "INSERT OR IGNORE" if table == "bill_rows" else "INSERT"
+                        conn.execute(
+                            f"{verb} INTO archive.{table} ({cols}) "
+                            f"SELECT {cols} FROM main.{table} WHERE {key} IN ({marks})", keys
+                        )
+                        conn.execute(f"DELETE FROM main.{table} WHERE {key} IN ({marks})", keys)
+                        if table == "bill_rows":  # the feed saw deletes; record where the rows went
+                            conn.execute(f"""
+                                INSERT INTO main.change_feed (table_name, op, row_key, new)
+                                SELECT 'bills', 'A', id, {feed_json("bills", "b")} FROM archive.bills b
+                                WHERE id IN ({marks})
+                            """, keys)
+                    if table == "bill_rows":
+                        hot_since = get_meta(conn, "bills_hot_since")
+                        if hot_since is None or cutoff > hot_since:
+                            set_meta(conn, "bills_hot_since", cutoff)
+                            bump_generation(conn, "archive")
+                    if keys:
+                        bump_generation(conn, "archive")
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                if table == "bill_rows":
+                    moved_bills += len(keys)
+                else:
+                    moved_deleted += len(keys)
+                if len(keys) < batch_size:
+                    break
+                time.sleep(0.01)  # let waiting writers in between batches
+        # planner stats for archive indexes that were empty until this run
+        sync_indexes(conn, ARCHIVE_INDEXES, schema="archive")
+    finally:
+        conn.close()
+    if moved_bills or moved_deleted:
+        audit("TIER_BILLS", "bills", "-", actor,
+              new_values={"cutoff": cutoff, "bills": moved_bills, "bills_deleted": moved_deleted})
+    return moved_bills, moved_deleted
+
+
+def get_tier_status():
+    conn = get_history_conn()
+    try:
+        hot = conn.execute("SELECT COUNT(*) FROM main.bills").fetchone()[0]
+        total = conn.execute("SELECT COUNT(*) FROM bills_all").fetchone()[0]
+        return {"hot": hot, "archived": total - hot, "hot_since": get_meta(conn, "bills_hot_since")}
+    finally:
+        conn.close()
@@ -0,0 +1 @@
+"""One module per page; each exposes render(timer) and is imported only when shown."""
@@ -0,0 +1,51 @@
+"""Admin header shown above every admin page: revenue, reset and tiering."""
+import streamlit as st
+
+from exoticbill.config import BILLS_HOT_DAYS
+from exoticbill.core.db import bump_generation, get_conn
+from exoticbill.core.feed import get_live_aggregates
+from exoticbill.core.parquet import get_parquet_exporter, mark_parquet_dirty, parquet_available
+from exoticbill.core.payroll import invalidate_payroll_cache
+from exoticbill.core.snapshot import get_snapshot_refresher
+from exoticbill.core.tiering import get_history_conn, get_tier_status, has_archive, tier_old_bills
+
+
+def render(timer):
+    if parquet_available():
+        get_parquet_exporter()  # starts the background Parquet export
+    st.title("👑 ExoticBill Admin")
+    st.metric("💵 Total Revenue", f"₹{get_live_aggregates().refresh()['revenue']:,.2f}")
+    st.markdown("---")
+    st.subheader("🧹 Maintenance")
+    confirm = st.checkbox("I understand this will erase all billing history")
+    if confirm and st.button("⚠️ Reset All Billings"):
+        conn = get_conn()
+        conn.execute("DELETE FROM bill_rows")
+        conn.execute("UPDATE shifts SET bills_count = 0, revenue = 0, commission = 0 WHERE end_ts IS NULL")
+        conn.execute("UPDATE customers SET first_seen = NULL, last_seen = NULL, bill_count = 0, lifetime_spend = 0")
+        conn.commit()
+        conn.close()
+        invalidate_payroll_cache()
+        mark_parquet_dirty("bills")
+        conn = get_history_conn()
+        if has_archive(conn):
+            conn.execute("DELETE FROM archive.bill_rows")
+            bump_generation(conn, "archive")
+        conn.execute("INSERT INTO change_feed (table_name, op) VALUES ('bills', 'R')")  # dashboards rebuild
+        conn.commit()
+        conn.close()
+        get_snapshot_refresher().request_refresh()
+        st.success("All billing records have been reset.")
+
+    with st.expander("🗃️ Bill Tiering (hot / archive)"):
+        tier = get_tier_status()
+        colT1, colT2, colT3 = st.columns(3)
+        colT1.metric("Hot Bills", f"{tier['hot']:,}")
+        colT2.metric("Archived Bills", f"{tier['archived']:,}")
+        colT3.metric("Hot Since", tier["hot_since"] or "—")
+        tier_days = st.number_input("Archive bills older than (days)", min_value=7,
+                                    value=BILLS_HOT_DAYS, step=1, key="tier_days")
+        if st.button("Move Old Bills to Archive"):
+            moved, moved_del = tier_old_bills(int(tier_days), actor=st.session_state.get("username", "?"))
+            get_snapshot_refresher().request_refresh()
+            st.success(f"Archived {moved:,} bill(s) and {moved_del:,} deleted bill(s).")
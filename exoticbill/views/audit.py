@@ -0,0 +1,126 @@
+"""Audit page."""
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from exoticbill.config import AUDIT_ACTIONS, AUDIT_ARCHIVE_DIR, AUDIT_RETENTION_DAYS, AUDIT_TABLES, IST
+from exoticbill.core.audit import archive_audit_log, get_audit_writer, list_audit_archives, query_audit_log
+from exoticbill.core.consistency import CHECKS, get_consistency_status, get_drift, run_consistency
+
+
+def render(timer):
+    st.header("🛡️ Audit Log")
+    get_audit_writer().flush()
+
+    st.markdown("### Filters")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        f_action = st.selectbox("Action", ["Any"] + AUDIT_ACTIONS, key="audit_f_action")
+        f_table = st.selectbox("Table", ["Any"] + AUDIT_TABLES, key="audit_f_table")
+    with col2:
+        f_actor = st.text_input("Actor (exact)", key="audit_f_actor").strip()
+        f_row = st.text_input("Row ID (exact, needs Table)", key="audit_f_row").strip()
+    with col3:
+        f_entity = st.text_input("Employee CID (exact)", key="audit_f_entity").strip()
+        f_cust = st.text_input("Customer CID (exact)", key="audit_f_cust").strip()
+    use_range = st.checkbox("Limit to date range", key="audit_f_use_range")
+    f_start = f_end = None
+    if use_range:
+        now = datetime.now(IST)
+        colA, colB = st.columns(2)
+        with colA:
+            sd = st.date_input("From", value=(now - timedelta(days=7)).date(), key="audit_f_sd")
+        with colB:
+            ed = st.date_input("To", value=now.date(), key="audit_f_ed")
+        f_start = datetime(sd.year, sd.month, sd.day, 0, 0, 0).strftime("%Y-%m-%d %H:%M:%S")
+        f_end = datetime(ed.year, ed.month, ed.day, 23, 59, 59).strftime("%Y-%m-%d %H:%M:%S")
+    page_size = st.selectbox("Rows per page", [50, 100, 250, 500], index=1, key="audit_page_size")
+
+    filters = dict(
+        action=None if f_action == "Any" else f_action,
+        table_name=None if f_table == "Any" else f_table,
+        row_id=f_row if f_table != "Any" else None,
+        actor=f_actor or None,
+        entity_cid=f_entity or None,
+        customer_cid=f_cust or None,
+        start_str=f_start,
+        end_str=f_end,
+    )
+    # keyset pagination: a stack of cursors, reset whenever the filters change
+    filter_key = (tuple(sorted(filters.items())), page_size)
+    if st.session_state.get("audit_filter_key") != filter_key:
+        st.session_state.audit_filter_key = filter_key
+        st.session_state.audit_cursors = [None]
+    cursors = st.session_state.audit_cursors
+
+    rows, next_cursor = query_audit_log(after=cursors[-1], limit=page_size, **filters)
+    if rows:
+        df = pd.DataFrame(rows, columns=["ID", "Action", "Table", "Row ID", "Actor", "Time",
+                                         "Employee CID", "Customer CID", "Old", "New"])
+        st.caption(f"Page {len(cursors)} — {len(df)} row(s)")
+        st.dataframe(df, width="stretch")
+    else:
+        st.info("No audit entries match these filters.")
+
+    colP, colN = st.columns(2)
+    with colP:
+        if len(cursors) > 1 and st.button("◀ Newer"):
+            cursors.pop()
+            st.rerun()
+    with colN:
+        if next_cursor and st.button("Older ▶"):
+            cursors.append(next_cursor)
+            st.rerun()
+
+    st.markdown("---")
+    st.subheader("🗄️ Retention & Archive")
+    st.caption(f"Rows older than {AUDIT_RETENTION_DAYS} days are moved to monthly gzip files in '{AUDIT_ARCHIVE_DIR}/'.")
+    keep_days = st.number_input("Keep last N days in the live table", min_value=1,
+                                value=AUDIT_RETENTION_DAYS, step=1, key="audit_keep_days")
+    if st.button("Archive Now"):
+        moved = archive_audit_log(retention_days=int(keep_days))
+        st.success(f"Archived {moved:,} audit row(s).")
+    archives = list_audit_archives()
+    if archives:
+        sel_arc = st.selectbox("Archive segment", [name for name, _ in archives], key="audit_arc_sel")
+        st.caption(f"{dict(archives)[sel_arc] / 1024:,.1f} KB compressed")
+        with open(os.path.join(AUDIT_ARCHIVE_DIR, sel_arc), "rb") as f:
+            st.download_button("⬇️ Download Segment", data=f.read(), file_name=sel_arc,
+                               mime="application/gzip", key="audit_arc_dl")
+
+    st.markdown("---")
+    st.subheader("🩺 Data Consistency")
+    st.caption("Recomputes derived numbers from their sources: loyalty balances from the ledger, customers "
+               "from bills, shift counters from the bills in each shift, stock from inventory movements, "
+               "active memberships from their expiry. A run only checks what changed since the last one; "
+               "a full pass checks everything in short chunks and resumes where it stopped.")
+    names = st.multiselect("Checks", list(CHECKS), default=list(CHECKS), format_func=lambda n: CHECKS[n].label,
+                           key="cons_checks")
+    colR1, colR2 = st.columns(2)
+    with colR1:
+        repair = st.checkbox("Repair drift", key="cons_repair")
+    with colR2:
+        full = st.checkbox("Full pass", key="cons_full")
+    if st.button("Run Checks") and names:
+        with st.spinner("Checking..."):
+            run_consistency(names, repair=repair, full=full)
+    status = get_consistency_status()
+    st.dataframe(pd.DataFrame([{
+        "Check": s["label"],
+        "Last Run": (s["last_run"] or {}).get("at", "—"),
+        "Mode": (s["last_run"] or {}).get("mode", "—"),
+        "Checked": (s["last_run"] or {}).get("checked", 0),
+        "Drift": (s["last_run"] or {}).get("drift", 0),
+        "Repaired": (s["last_run"] or {}).get("repaired", 0),
+        "Time (ms)": (s["last_run"] or {}).get("ms", 0),
+        "Open Drift": s["open_drift"],
+        "Full Pass At": "—" if s["full_pass_after"] is None else str(s["full_pass_after"]),
+    } for s in status]), width="stretch")
+    drift = get_drift()
+    if drift:
+        st.dataframe(pd.DataFrame(drift, columns=["Check", "Key", "Field", "Stored", "From Source",
+                                                  "Found", "Repaired"]).astype(str), width="stretch")
+    else:
+        st.info("No drift on record.")
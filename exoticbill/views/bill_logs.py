@@ -0,0 +1,132 @@
+"""Bill Logs page."""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from exoticbill.config import IST
+from exoticbill.core.bills import get_bill_logs, get_deleted_bills, restore_bills, soft_delete_bills
+from exoticbill.core.snapshot import get_snapshot_refresher, show_snapshot_age
+
+
+def render(timer):
+    st.header("🧾 Bill Logs")
+
+    now = datetime.now(IST)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = now.replace(hour=23, minute=59, second=59, microsecond=0)
+
+    quick_range = st.selectbox(
+        "Quick Date Range",
+        ["Today", "Yesterday", "Last 2 days", "Last 7 days", "This Month", "Custom"]
+    )
+
+    start_dt, end_dt = None, None
+    if quick_range == "Today":
+        start_dt, end_dt = today_start, today_end
+    elif quick_range == "Yesterday":
+        y = today_start - timedelta(days=1)
+        start_dt = y
+        end_dt = y.replace(hour=23, minute=59, second=59)
+    elif quick_range == "Last 2 days":
+        start_dt, end_dt = (now - timedelta(days=2)), now
+    elif quick_range == "Last 7 days":
+        start_dt, end_dt = (now - timedelta(days=7)), now
+    elif quick_range == "This Month":
+        first_of_month = today_start.replace(day=1)
+        start_dt, end_dt = first_of_month, today_end
+    else:
+        st.markdown("### Custom Range")
+        colA, colB = st.columns(2)
+        with colA:
+            sd = st.date_input("Start date", value=today_start.date(), key="bill_logs_sd")
+        with colB:
+            ed = st.date_input("End date", value=today_end.date(), key="bill_logs_ed")
+        colC, colD = st.columns(2)
+        with colC:
+            sh = st.number_input("Start hour", min_value=0, max_value=23, value=0, key="bill_logs_sh")
+        with colD:
+            eh = st.number_input("End hour", min_value=0, max_value=23, value=23, key="bill_logs_eh")
+        start_dt = datetime(sd.year, sd.month, sd.day, sh, 0, 0, tzinfo=IST)
+        end_dt = datetime(ed.year, ed.month, ed.day, eh, 59, 59, tzinfo=IST)
+
+    start_str = start_dt.strftime("%Y-%m-%d %H:%M:%S")
+    end_str = end_dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    st.markdown("### Filters")
+    col1, col2, col3 = st.columns([2, 2, 2])
+    with col1:
+        type_filter = st.multiselect(
+            "Billing Type",
+            ["ITEMS", "UPGRADES", "REPAIR", "CUSTOMIZATION", "MEMBERSHIP"],
+            default=[],
+            key="bill_logs_typefilter"
+        )
+    with col2:
+        emp_query = st.text_input("Employee (name or CID) contains", key="bill_logs_empq")
+    with col3:
+        cust_query = st.text_input("Customer CID contains", key="bill_logs_custq")
+
+    show_snapshot_age("bill_logs_snap")
+    rows = get_bill_logs(start_str, end_str, analytics=True)
+    df = pd.DataFrame(rows, columns=[
+        "ID", "Time", "Employee Name", "Employee CID", "Hood",
+        "Customer CID", "Type", "Details", "Amount", "Commission", "Tax"
+    ])
+
+    if type_filter:
+        df = df[df["Type"].isin(type_filter)]
+    if emp_query:
+        emp_query_low = emp_query.lower()
+        df = df[
+            df["Employee Name"].str.lower().str.contains(emp_query_low, na=False) |
+            df["Employee CID"].str.lower().str.contains(emp_query_low, na=False)
+        ]
+    if cust_query:
+        df = df[df["Customer CID"].str.lower().str.contains(cust_query.lower(), na=False)]
+
+    total_amt = df["Amount"].sum() if not df.empty else 0.0
+    total_comm = df["Commission"].sum() if not df.empty else 0.0
+    total_tax = df["Tax"].sum() if not df.empty else 0.0
+
+    st.markdown(
+        f"**Showing {len(df):,} bill(s)** from **{start_str}** to **{end_str}**  \n"
+        f"**Total Amount:** ₹{total_amt:,.2f} | **Total Commission:** ₹{total_comm:,.2f} | **Total Tax:** ₹{total_tax:,.2f}"
+    )
+
+    grid = st.dataframe(df, width="stretch", on_select="rerun", selection_mode="multi-row",
+                        key="bill_logs_grid")
+    sel_ids = [int(i) for i in df.iloc[grid.selection.rows]["ID"]] if grid.selection.rows else []
+    if sel_ids and st.button(f"🗑️ Delete {len(sel_ids)} Selected Bill(s)", key="bill_logs_del"):
+        n = soft_delete_bills(sel_ids, st.session_state.get("username", "?"))
+        st.session_state.pop("bill_logs_grid", None)
+        get_snapshot_refresher().refresh()
+        st.success(f"Soft-deleted {n} bill(s).")
+        st.rerun()
+    csv = df.to_csv(index=False).encode("utf-8")
+    st.download_button(
+        "⬇️ Download CSV",
+        data=csv,
+        file_name=f"bill_logs_{start_str.replace(':','-')}_to_{end_str.replace(':','-')}.csv",
+        mime="text/csv",
+        key="bill_logs_dl"
+    )
+
+    deleted = get_deleted_bills(start_str, end_str)
+    with st.expander(f"♻️ Deleted Bills in Range ({len(deleted)})"):
+        if deleted:
+            ddf = pd.DataFrame(deleted, columns=[
+                "ID", "Employee CID", "Customer CID", "Type", "Details", "Amount", "Time",
+                "Deleted By", "Deleted At"
+            ])
+            dgrid = st.dataframe(ddf, width="stretch", on_select="rerun", selection_mode="multi-row",
+                                 key="bill_logs_deleted_grid")
+            res_ids = [int(i) for i in ddf.iloc[dgrid.selection.rows]["ID"]] if dgrid.selection.rows else []
+            if res_ids and st.button(f"Restore {len(res_ids)} Selected Bill(s)", key="bill_logs_restore"):
+                n = restore_bills(res_ids, st.session_state.get("username", "?"))
+                st.session_state.pop("bill_logs_deleted_grid", None)
+                get_snapshot_refresher().refresh()
+                st.success(f"Restored {n} bill(s).")
+                st.rerun()
+        else:
+            st.caption("No deleted bills in this range.")
@@ -0,0 +1,67 @@
+"""Commission page."""
+from datetime import datetime
+
+import streamlit as st
+
+from exoticbill.config import COMMISSION_RATES, IST, TAX_RATE
+from exoticbill.core.commission import recompute_commissions
+from exoticbill.core.staff import get_all_employee_cids
+
+
+def render(timer):
+    st.header("🧮 Recompute Commission")
+    st.caption("Recalculates commission and tax on existing bills from a rate table, "
+               "using each employee's current rank. UPGRADES/MEMBERSHIP and Harness/NOS-only "
+               "ITEMS bills stay at zero.")
+    now = datetime.now(IST)
+    colA, colB = st.columns(2)
+    with colA:
+        sd = st.date_input("From", value=now.replace(day=1).date(), key="recomp_sd")
+    with colB:
+        ed = st.date_input("To", value=now.date(), key="recomp_ed")
+    start_str = datetime(sd.year, sd.month, sd.day, 0, 0, 0).strftime("%Y-%m-%d %H:%M:%S")
+    end_str = datetime(ed.year, ed.month, ed.day, 23, 59, 59).strftime("%Y-%m-%d %H:%M:%S")
+
+    all_emp = get_all_employee_cids()
+    emp_opts = {f"{n} ({c})": c for c, n in all_emp}
+    sel_emps = st.multiselect("Employees (empty = all)", list(emp_opts.keys()), key="recomp_emps")
+    cids = [emp_opts[k] for k in sel_emps] or None
+
+    st.markdown("### Rate Table")
+    rates = {}
+    rate_cols = st.columns(4)
+    for i, (rank_name, default_rate) in enumerate(COMMISSION_RATES.items()):
+        with rate_cols[i % 4]:
+            rates[rank_name] = st.number_input(rank_name, min_value=0.0, max_value=1.0,
+                                               value=float(default_rate), step=0.01,
+                                               format="%.2f", key=f"recomp_rate_{rank_name}")
+    tax_rate = st.number_input("Tax rate (on commission)", min_value=0.0, max_value=1.0,
+                               value=float(TAX_RATE), step=0.01, format="%.2f", key="recomp_tax")
+
+    params = (start_str, end_str, tuple(sorted(rates.items())), tax_rate, tuple(cids or ()))
+    if st.button("🔍 Dry Run"):
+        st.session_state.recomp_plan = (params, recompute_commissions(
+            start_str, end_str, rates, tax_rate, cids, dry_run=True))
+
+    plan = st.session_state.get("recomp_plan")
+    if plan and plan[0] == params:
+        changes = plan[1]
+        if changes.empty:
+            st.success("Nothing to change — all bills already match this rate table.")
+        else:
+            old_c, new_c = changes["commission"].fillna(0).sum(), changes["new_commission"].sum()
+            old_t, new_t = changes["tax"].fillna(0).sum(), changes["new_tax"].sum()
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Bills Changing", f"{len(changes):,}")
+            col2.metric("Commission", f"₹{new_c:,.2f}", f"{new_c - old_c:+,.2f}")
+            col3.metric("Tax", f"₹{new_t:,.2f}", f"{new_t - old_t:+,.2f}")
+            st.dataframe(changes.rename(columns={
+                "id": "ID", "employee_cid": "Employee CID", "billing_type": "Type", "details": "Details",
+                "total_amount": "Amount", "timestamp": "Time", "commission": "Old Commission",
+                "tax": "Old Tax", "new_commission": "New Commission", "new_tax": "New Tax", "tier": "Tier",
+            }), width="stretch")
+            if st.button("✅ Apply Changes"):
+                applied = recompute_commissions(start_str, end_str, rates, tax_rate, cids, dry_run=False,
+                                                actor=st.session_state.get("username", "?"))
+                st.session_state.pop("recomp_plan", None)
+                st.success(f"Updated commission/tax on {len(applied):,} bill(s).")
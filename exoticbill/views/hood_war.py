@@ -0,0 +1,28 @@
+"""Hood War page."""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from exoticbill.config import IST
+from exoticbill.core.bills import get_hood_war
+from exoticbill.core.snapshot import show_snapshot_age
+
+
+def render(timer):
+    st.header("⚔️ Hood War — Revenue Leaderboard")
+    now = datetime.now(IST)
+    default_start = (now - timedelta(days=7)).date()
+    default_end = now.date()
+    colA, colB = st.columns(2)
+    with colA:
+        sd = st.date_input("Start date", value=default_start, key="war_sd")
+    with colB:
+        ed = st.date_input("End date", value=default_end, key="war_ed")
+    start_str = datetime(sd.year, sd.month, sd.day, 0, 0, 0, tzinfo=IST).strftime("%Y-%m-%d %H:%M:%S")
+    end_str = datetime(ed.year, ed.month, ed.day, 23, 59, 59, tzinfo=IST).strftime("%Y-%m-%d %H:%M:%S")
+
+    show_snapshot_age("war_snap")
+    rows = get_hood_war(start_str, end_str)
+    df = pd.DataFrame(rows, columns=["Hood", "Revenue"]).sort_values("Revenue", ascending=False)
+    st.table(df)
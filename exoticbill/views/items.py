@@ -0,0 +1,85 @@
+"""Items page."""
+import pandas as pd
+import streamlit as st
+
+from exoticbill.core.items import (
+    add_item, delete_item, get_all_items, get_inventory_movements, reconcile_inventory,
+    update_item_stock
+)
+
+
+def render(timer):
+    st.header("📦 Manage Items")
+    tabs = st.tabs(["Add Item", "Update Stock", "Delete Item", "View Items", "Movements"])
+
+    with tabs[0]:
+        timer.tab("Add Item")
+        st.subheader("➕ Add New Item")
+        with st.form("add_item_form", clear_on_submit=True):
+            name = st.text_input("Item Name")
+            price = st.number_input("Price (₹)", min_value=0.0, step=100.0)
+            stock = st.number_input("Initial Stock", min_value=0, step=1)
+            if st.form_submit_button("Add Item"):
+                if name and price > 0:
+                    add_item(name, price, stock)
+                    st.success(f"Added item {name} (₹{price}, stock {stock})")
+
+    with tabs[1]:
+        timer.tab("Update Stock")
+        st.subheader("🔄 Update Stock")
+        items = get_all_items()
+        if items:
+            names = [i[0] for i in items]
+            sel = st.selectbox("Select Item", names, key="update_stock_item")
+            delta = st.number_input("Change in Stock (e.g., +10 or -5)", step=1, value=0)
+            note = st.text_input("Reason", key="update_stock_note")
+            if st.button("Apply Stock Update"):
+                if delta == 0:
+                    st.info("Enter a non-zero change.")
+                elif update_item_stock(sel, delta, actor=st.session_state.username, note=note or None):
+                    st.success(f"Updated stock for {sel}: {delta:+d}")
+                else:
+                    st.error(f"Stock for {sel} cannot go below zero.")
+        else:
+            st.info("No items found.")
+
+
+    with tabs[2]:
+        timer.tab("Delete Item")
+        st.subheader("🗑️ Delete Item")
+        items = [i[0] for i in get_all_items()]
+        if items:
+            sel = st.selectbox("Select item", items)
+            if st.button("Delete Selected Item"):
+                delete_item(sel)
+                st.success(f"Deleted item {sel}")
+        else:
+            st.info("No items found.")
+
+    with tabs[3]:
+        timer.tab("View Items")
+        st.subheader("📋 All Items")
+        rows = get_all_items()
+        if rows:
+            st.table(pd.DataFrame(rows, columns=["Name", "Price", "Stock"]))
+        else:
+            st.info("No items defined.")
+
+    with tabs[4]:
+        timer.tab("Movements")
+        st.subheader("🔁 Inventory Movements")
+        recon = reconcile_inventory()
+        drift = recon[recon["diff"] != 0]
+        if drift.empty:
+            st.success("Stock matches the movement ledger for every item.")
+        else:
+            st.error(f"{len(drift)} item(s) do not reconcile with the movement ledger.")
+        st.dataframe(recon, width="stretch", hide_index=True)
+        names = ["All"] + recon["item"].tolist()
+        pick = st.selectbox("Item", names, key="inv_mov_item")
+        moves = get_inventory_movements(None if pick == "All" else pick)
+        if moves:
+            st.dataframe(pd.DataFrame(moves, columns=["Time", "Item", "Kind", "Delta", "Bill", "By", "Note"]),
+                         width="stretch", hide_index=True)
+        else:
+            st.info("No movements recorded.")
@@ -0,0 +1,48 @@
+"""Live Stats page."""
+import time
+
+import pandas as pd
+import streamlit as st
+
+from exoticbill.core.feed import get_live_aggregates
+
+
+def render(timer):
+    st.header("📈 Live Stats")
+    auto = st.toggle("Auto-refresh every 60s", value=False)
+    live = get_live_aggregates().refresh()  # applies only the change feed since the last refresh
+    today_count, today_amount = live["today_count"], live["today_amount"]
+    hr_count, hr_amount = live["hour_count"], live["hour_amount"]
+    top_types = live["types"]
+    active_shifts = [(s["employee_cid"], s["start_ts"], s["bills_count"] or 0, s["revenue"] or 0)
+                     for s in live["shifts"]]
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Bills Today", f"{today_count:,}")
+    with col2:
+        st.metric("Revenue Today", f"₹{today_amount:,.2f}")
+    with col3:
+        st.metric("Active Shifts", f"{len(active_shifts)}")
+
+    col4, col5, col6 = st.columns(3)
+    with col4:
+        st.metric("Bills (Last Hour)", f"{hr_count:,}")
+    with col5:
+        st.metric("Revenue (Last Hour)", f"₹{hr_amount:,.2f}")
+    with col6:
+        st.metric("Active Memberships", f"{live['memberships']:,}")
+
+    st.subheader("Top Billing Types Today")
+    if top_types:
+        df_top = pd.DataFrame(top_types, columns=["Type", "Count", "Amount"]).sort_values("Amount", ascending=False)
+        st.table(df_top)
+    else:
+        st.info("No bills yet today.")
+
+    if active_shifts:
+        st.subheader("Active Shifts")
+        st.table(pd.DataFrame(active_shifts, columns=["Employee CID", "Start Time", "Bills", "Revenue"]))
+    if auto:
+        time.sleep(60)
+        st.rerun()
@@ -0,0 +1,79 @@
+"""Loyalty page."""
+import pandas as pd
+import streamlit as st
+
+from exoticbill.config import LOYALTY_EARN_PER_RS, LOYALTY_EXPIRY_DAYS
+from exoticbill.core.db import get_conn
+from exoticbill.core.loyalty import (
+    add_loyalty_points, expire_loyalty_points, get_loyalty_history, redeem_loyalty_points
+)
+
+
+def render(timer):
+        st.header("🎯 Customer Loyalty")
+        st.caption(f"Earning rate: 1 point per ₹{LOYALTY_EARN_PER_RS} on non-membership bills")
+
+        # served straight off idx_loyalty_points
+        conn = get_conn()
+        top = conn.execute(
+            "SELECT customer_cid, points FROM loyalty WHERE points > 0 ORDER BY points DESC LIMIT 100"
+        ).fetchall()
+        conn.close()
+        if top:
+            st.subheader("Top Customers")
+            st.table(pd.DataFrame(top, columns=["Customer CID", "Points"]))
+        else:
+            st.info("No loyalty data yet.")
+
+        st.markdown("---")
+        st.subheader("Adjust Points (Admin)")
+        with st.form("loyalty_adjust", clear_on_submit=True):
+            cust = st.text_input("Customer CID")
+            delta = st.number_input("Add/Subtract Points (e.g., 50 or -20)", value=0, step=1)
+            note = st.text_input("Reason", key="loy_adjust_note")
+            submitted = st.form_submit_button("Apply")
+            if submitted:
+                if not cust or delta == 0:
+                    st.warning("Enter CID and non-zero delta.")
+                elif add_loyalty_points(cust, int(delta), kind="adjust",
+                                        actor=st.session_state.username, note=note or None):
+                    st.success("Points updated.")
+                else:
+                    st.error("Not enough points to subtract.")
+
+        st.subheader("Redeem Points")
+        with st.form("loyalty_redeem", clear_on_submit=True):
+            cust = st.text_input("Customer CID", key="loy_redeem_cid")
+            pts = st.number_input("Points to redeem", min_value=0, value=0, step=1)
+            note = st.text_input("Redeemed for", key="loy_redeem_note")
+            if st.form_submit_button("Redeem"):
+                if not cust or pts <= 0:
+                    st.warning("Enter CID and points to redeem.")
+                elif redeem_loyalty_points(cust, int(pts), actor=st.session_state.username, note=note or None):
+                    st.success(f"Redeemed {int(pts)} points.")
+                else:
+                    st.error("Insufficient balance.")
+
+        with st.expander("⌛ Expire Inactive Balances"):
+            days = st.number_input("Inactive for (days)", min_value=1, value=LOYALTY_EXPIRY_DAYS, step=1)
+            if st.button("Expire Now"):
+                n, pts = expire_loyalty_points(int(days), actor=st.session_state.username)
+                st.success(f"Expired {pts} points across {n} customers.")
+
+        st.markdown("---")
+        st.subheader("Lookup Customer Points")
+        lookup = st.text_input("Customer CID", key="loy_lookup")
+        if st.button("Check Points"):
+            conn = get_conn()
+            row = conn.execute("SELECT points FROM loyalty WHERE customer_cid=?", (lookup,)).fetchone()
+            conn.close()
+            pts = row[0] if row else 0
+            st.info(f"{lookup} has **{pts}** loyalty points.")
+            hist = get_loyalty_history(lookup)
+            if hist:
+                st.dataframe(pd.DataFrame(hist, columns=["Time", "Kind", "Points", "Bill", "By", "Note"]),
+                             use_container_width=True)
+
+    # Shifts
+        # Shifts
+        # Shifts
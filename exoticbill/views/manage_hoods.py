@@ -0,0 +1,73 @@
+"""Manage Hoods page."""
+import pandas as pd
+import streamlit as st
+
+from exoticbill.core.staff import (
+    add_hood, assign_employees_to_hood, delete_hood, get_all_employee_cids, get_all_hoods,
+    get_employees_by_hood, update_hood
+)
+
+
+def render(timer):
+    st.header("🏙️ Manage Hoods")
+    tabs = st.tabs(["Add Hood", "Edit Hood", "Assign Staff", "View Hoods"])
+
+    with tabs[0]:
+        timer.tab("Add Hood")
+        st.subheader("➕ Add New Hood")
+        with st.form("add_hood", clear_on_submit=True):
+            hname = st.text_input("Hood Name")
+            hloc = st.text_input("Location")
+            if st.form_submit_button("Add Hood") and hname and hloc:
+                add_hood(hname, hloc)
+                st.success(f"Added hood '{hname}'")
+
+    with tabs[1]:
+        timer.tab("Edit Hood")
+        st.subheader("✏️ Edit / Delete Hood")
+        hds = get_all_hoods()
+        if hds:
+            names = [h[0] for h in hds]
+            sel = st.selectbox("Select Hood", names, key="edit_hood_sel")
+            old_loc = dict(hds)[sel]
+            new_name = st.text_input("New Name", sel, key="edit_hood_name")
+            new_loc = st.text_input("New Location", old_loc, key="edit_hood_loc")
+            if st.button("Update Hood"):
+                update_hood(sel, new_name, new_loc)
+                st.success("Hood updated.")
+            if st.button("Delete Hood"):
+                delete_hood(sel)
+                st.success("Hood deleted.")
+        else:
+            st.info("No hoods defined yet.")
+
+    with tabs[2]:
+        timer.tab("Assign Staff")
+        st.subheader("👷 Assign Employees to Hood")
+        hds = get_all_hoods()
+        if hds:
+            hood_names = [h[0] for h in hds]
+            sel_hood = st.selectbox("Select Hood", hood_names, key="assign_hood_sel")
+            all_emp = get_all_employee_cids()
+            choices = {f"{n} ({c})": c for c, n in all_emp}
+            sel_list = st.multiselect("Select Employees to assign", list(choices.keys()), key="assign_emp_multi")
+            if st.button("Assign"):
+                assign_employees_to_hood(sel_hood, [choices[k] for k in sel_list])
+                st.success("Employees reassigned.")
+        else:
+            st.info("Define some hoods first.")
+
+    with tabs[3]:
+        timer.tab("View Hoods")
+        st.subheader("🔍 View Hoods & Members")
+        hds = get_all_hoods()
+        if hds:
+            for name, loc in hds:
+                with st.expander(f"{name} — {loc}"):
+                    emps = get_employees_by_hood(name)
+                    if emps:
+                        st.table(pd.DataFrame(emps, columns=["CID", "Name"]))
+                    else:
+                        st.write("No employees assigned.")
+        else:
+            st.info("No hoods to view.")
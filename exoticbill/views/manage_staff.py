@@ -0,0 +1,106 @@
+"""Manage Staff page."""
+import pandas as pd
+import streamlit as st
+
+from exoticbill.config import COMMISSION_RATES
+from exoticbill.core.staff import (
+    add_employee, delete_employee, get_all_employee_cids, get_all_hoods, get_employee_details,
+    update_employee
+)
+
+
+def render(timer):
+    st.header("👷 Manage Staff")
+    tabs = st.tabs(["➕ Add Employee", "🗑️ Remove Employee", "✏️ Edit Employee", "📋 View All Employees"])
+
+    with tabs[0]:
+        timer.tab("Add Employee")
+        st.subheader("➕ Add New Employee")
+        with st.form("add_emp", clear_on_submit=True):
+            new_cid = st.text_input("Employee CID")
+            new_name = st.text_input("Name")
+            new_rank = st.selectbox("Rank", list(COMMISSION_RATES.keys()))
+            hds = [h[0] for h in get_all_hoods()] or []
+            new_hood = st.selectbox("Hood", ["No Hood"] + hds)
+            if st.form_submit_button("Add Employee"):
+                if new_cid and new_name:
+                    add_employee(new_cid, new_name, new_rank)
+                    if new_hood != "No Hood":
+                        update_employee(new_cid, hood=new_hood)
+                    st.success(f"Added {new_name} ({new_cid})")
+                else:
+                    st.warning("CID and Name required.")
+
+    with tabs[1]:
+        timer.tab("Remove Employee")
+        st.subheader("🗑️ Remove Employee")
+        all_emp = get_all_employee_cids()
+        if all_emp:
+            opts = {f"{n} ({c})": c for c, n in all_emp}
+            sel = st.selectbox("Select Employee to Remove", list(opts.keys()), key="rm_emp_sel")
+            if st.button("Delete Employee"):
+                delete_employee(opts[sel])
+                st.success(f"Removed {sel}")
+        else:
+            st.info("No employees to remove.")
+
+    with tabs[2]:
+        timer.tab("Edit Employee")
+        st.subheader("✏️ Edit Employee")
+        all_emp = get_all_employee_cids()
+        if not all_emp:
+            st.info("No employees to edit.")
+        else:
+            labels = [f"{name} ({cid})" for cid, name in all_emp]
+            cid_map = {f"{name} ({cid})": cid for cid, name in all_emp}
+            sel_emp = st.selectbox("Select Employee", labels, key="edit_emp_sel")
+            if sel_emp:
+                emp_cid = cid_map[sel_emp]
+                details = get_employee_details(emp_cid)
+                if not details:
+                    st.warning("Could not load details for this employee.")
+                else:
+                    current_name = details.get("name") or ""
+                    current_rank = details.get("rank") or "Trainee"
+                    rank_options = list(COMMISSION_RATES.keys())
+                    try:
+                        rank_index = rank_options.index(current_rank)
+                    except ValueError:
+                        rank_index = 0
+                    hds = [h[0] for h in get_all_hoods()] or []
+                    hood_options = ["No Hood"] + hds
+                    current_hood = details.get("hood") or "No Hood"
+                    try:
+                        hood_index = hood_options.index(current_hood)
+                    except ValueError:
+                        hood_options = [current_hood] + hood_options
+                        hood_index = 0
+
+                    with st.form("edit_emp", clear_on_submit=True):
+                        name = st.text_input("Name", value=current_name)
+                        rank = st.selectbox("Rank", rank_options, index=rank_index)
+                        hood = st.selectbox("Hood", hood_options, index=hood_index)
+                        submitted = st.form_submit_button("Update Employee")
+                        if submitted:
+                            update_employee(emp_cid, name=name, rank=rank, hood=hood)
+                            st.success(f"Updated {sel_emp}")
+                            st.rerun()
+
+    with tabs[3]:
+        timer.tab("View All Employees")
+        st.subheader("📋 All Employees List")
+        all_rows = []
+        for cid, name in get_all_employee_cids():
+            details = get_employee_details(cid)
+            if details:
+                all_rows.append({
+                    "CID": cid,
+                    "Name": name,
+                    "Rank": details["rank"],
+                    "Hood": details["hood"]
+                })
+        if all_rows:
+            df = pd.DataFrame(all_rows)
+            st.dataframe(df)
+        else:
+            st.info("No employees found.")
@@ -0,0 +1,57 @@
+"""Payroll page."""
+from datetime import datetime
+
+import streamlit as st
+
+from exoticbill.config import IST
+from exoticbill.core.payroll import compute_payroll, get_month_payroll, month_bounds
+
+
+def render(timer):
+    st.header("💰 Payroll")
+    now = datetime.now(IST)
+    mode = st.radio("Period", ["Month", "Custom"], horizontal=True, key="payroll_mode")
+    cached = False
+    if mode == "Month":
+        colA, colB = st.columns(2)
+        with colA:
+            year = st.selectbox("Year", list(range(now.year, now.year - 5, -1)), key="payroll_year")
+        with colB:
+            month = st.selectbox("Month", list(range(1, 13)), index=now.month - 1, key="payroll_month")
+        start_str, end_str = month_bounds(year, month)
+        refresh = st.button("Recompute", key="payroll_refresh")
+        df, cached = get_month_payroll(year, month, refresh=refresh)
+        label = f"{year:04d}-{month:02d}"
+    else:
+        colA, colB = st.columns(2)
+        with colA:
+            sd = st.date_input("From", value=now.replace(day=1).date(), key="payroll_sd")
+        with colB:
+            ed = st.date_input("To", value=now.date(), key="payroll_ed")
+        start_str = datetime(sd.year, sd.month, sd.day, 0, 0, 0).strftime("%Y-%m-%d %H:%M:%S")
+        end_str = datetime(ed.year, ed.month, ed.day, 23, 59, 59).strftime("%Y-%m-%d %H:%M:%S")
+        df = compute_payroll(start_str, end_str)
+        label = f"{sd}_to_{ed}"
+
+    st.caption(f"{start_str} → {end_str}" + (" • served from closed-month cache" if cached else ""))
+    if df.empty:
+        st.info("No shifts or bills in this period.")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Employees", f"{len(df):,}")
+        col2.metric("Hours", f"{df['hours'].sum():,.1f}")
+        col3.metric("Commission", f"₹{df['commission'].sum():,.2f}")
+        col4.metric("Net Payout", f"₹{df['net_payout'].sum():,.2f}")
+        sheet = df.rename(columns={
+            "employee_cid": "Employee CID", "name": "Name", "rank": "Rank", "hood": "Hood",
+            "shifts": "Shifts", "hours": "Hours", "bills": "Bills", "revenue": "Revenue",
+            "commission": "Commission", "tax": "Tax", "net_payout": "Net Payout",
+        }).drop(columns=["minutes"])
+        st.dataframe(sheet, width="stretch")
+        st.download_button(
+            "⬇️ Download Payroll Sheet",
+            data=sheet.to_csv(index=False).encode("utf-8"),
+            file_name=f"payroll_{label}.csv",
+            mime="text/csv",
+            key="payroll_dl"
+        )
@@ -0,0 +1,144 @@
+"""Performance page."""
+import pandas as pd
+import streamlit as st
+
+from exoticbill.core.cache import get_query_cache
+from exoticbill.core.db import get_query_stats
+from exoticbill.core.profiling import get_render_stats
+
+
+def render(timer):
+    st.header("🚦 Performance")
+    stats = get_query_stats()
+    colA, colB = st.columns([3, 1])
+    with colA:
+        stats.slow_ms = st.number_input(
+            "Slow-query threshold (ms)", min_value=1, value=int(stats.slow_ms), step=10, key="perf_slow_ms"
+        )
+    with colB:
+        if st.button("Reset Stats"):
+            stats.reset()
+            st.rerun()
+
+    snap = stats.snapshot()
+    st.subheader("Top Statements")
+    if snap:
+        top_n = st.slider("Show top", min_value=5, max_value=100, value=25, step=5, key="perf_top_n")
+        df = pd.DataFrame([{
+            "Statement": r["sql"],
+            "Calls": r["calls"],
+            "Total (ms)": round(r["total_ms"], 2),
+            "Avg (ms)": round(r["avg_ms"], 2),
+            "p50 (ms)": round(r["p50_ms"], 2),
+            "p95 (ms)": round(r["p95_ms"], 2),
+            "p99 (ms)": round(r["p99_ms"], 2),
+            "Rows": r["rows"],
+            "Full Scan": "⚠️" if r["full_scan"] else "",
+        } for r in snap[:top_n]])
+        st.dataframe(df, width="stretch")
+
+        scans = [r for r in snap if r["full_scan"]]
+        if scans:
+            st.subheader("⚠️ Full Table Scans")
+            for r in scans:
+                with st.expander(r["sql"][:120]):
+                    st.code(r["sql"], language="sql")
+                    st.code("\n".join(r["plan"]))
+    else:
+        st.info("No statements recorded yet.")
+
+    st.subheader(f"🐢 Slow Queries (≥ {stats.slow_ms} ms)")
+    slow = list(stats.slow_log)
+    if slow:
+        for entry in reversed(slow):
+            with st.expander(f"{entry['ts']} — {entry['ms']} ms — {entry['sql'][:80]}"):
+                st.code(entry["sql"], language="sql")
+                st.caption(f"Params: {entry['params']}")
+                st.code("\n".join(entry["plan"]) or "(no plan)")
+    else:
+        st.info("No slow queries logged.")
+
+    st.markdown("---")
+    st.subheader("🗃️ Query Result Cache")
+    qcache = get_query_cache()
+    st.caption(f"{len(qcache.entries)} cached result(s), {qcache.bytes / 1024:,.0f} KiB of "
+               f"{qcache.max_bytes / 1024 / 1024:,.0f} MiB. Stale = a table it read was written; "
+               f"Expired = older than its TTL.")
+    qsnap = qcache.snapshot()
+    if qsnap:
+        st.dataframe(pd.DataFrame([{
+            "Query": r["query"],
+            "Lookups": r["lookups"],
+            "Hit Rate": f"{r['hit_rate']:.1%}",
+            "Hits": r["hits"],
+            "Misses": r["misses"],
+            "Stale": r["stale"],
+            "Expired": r["expired"],
+            "Evictions": r["evictions"],
+            "Entries": r["entries"],
+            "KiB": round(r["bytes"] / 1024, 1),
+            "Avg Load (ms)": round(r["avg_load_ms"], 2),
+            "TTL (s)": r["ttl_s"],
+        } for r in qsnap]), width="stretch")
+        colC, colD = st.columns(2)
+        with colC:
+            if st.button("Clear Query Cache"):
+                qcache.clear()
+                st.rerun()
+        with colD:
+            if st.button("Reset Cache Counters"):
+                qcache.reset()
+                st.rerun()
+    else:
+        st.info("No cached queries run yet.")
+
+    st.markdown("---")
+    st.subheader("⏲️ Render Times (per rerun)")
+    rstats = get_render_stats()
+    rsnap = rstats.snapshot()
+    if rsnap:
+        labels = rstats.bucket_labels()
+        data = []
+        for key, e in sorted(rsnap.items(), key=lambda kv: kv[1]["total_ms"], reverse=True):
+            row = {
+                "Section": key,
+                "Reruns": e["count"],
+                "Avg (ms)": round(e["total_ms"] / e["count"], 2),
+                "Max (ms)": round(e["max_ms"], 2),
+            }
+            row.update(dict(zip(labels, e["hist"])))
+            data.append(row)
+        st.dataframe(pd.DataFrame(data), width="stretch")
+        if st.button("Reset Render Times"):
+            rstats.reset()
+            st.rerun()
+    else:
+        st.info("No reruns recorded yet.")
+
+    st.subheader("🔬 cProfile Capture")
+    st.caption("Arms the profiler; the next rerun (e.g. switching to the slow page) is captured.")
+    if st.button("Profile Next Rerun"):
+        st.session_state.profile_next_rerun = True
+        st.success("Profiler armed — navigate to the page to profile.")
+    prof = st.session_state.get("last_profile")
+    if prof:
+        st.write(f"Last capture: **{prof['page']}** at {prof['ts']}")
+        colP, colQ = st.columns(2)
+        with colP:
+            st.download_button(
+                "⬇️ Download .prof (pstats)",
+                data=prof["prof"],
+                file_name=f"rerun_{prof['ts'].replace(':', '-').replace(' ', '_')}.prof",
+                mime="application/octet-stream",
+                key="perf_prof_dl"
+            )
+        with colQ:
+            st.download_button(
+                "⬇️ Download Report (txt)",
+                data=prof["report"].encode("utf-8"),
+                file_name=f"rerun_{prof['ts'].replace(':', '-').replace(' ', '_')}.txt",
+                mime="text/plain",
+                key="perf_report_dl"
+            )
+        with st.expander("Top functions (cumulative)"):
+            st.code(prof["report"])
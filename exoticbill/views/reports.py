@@ -0,0 +1,99 @@
+"""Reports page."""
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from exoticbill.config import IST, PARQUET_EXPORT_INTERVAL_S, STATEMENT_WORKERS, STATEMENTS_DIR
+from exoticbill.core.parquet import (
+    get_parquet_exporter, get_parquet_status, parquet_available, report_item_velocity,
+    report_membership_sales, report_revenue
+)
+from exoticbill.core.statements import get_statement_runner, get_statement_status
+
+
+def render(timer):
+    st.header("📈 Historical Reports")
+    if not parquet_available():
+        st.warning("Install pyarrow to enable the Parquet analytics store.")
+    else:
+        exporter = get_parquet_exporter()
+        status = get_parquet_status()
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.caption(f"🗂️ Served from the Parquet store ({status['files']} files, "
+                       f"{status['bytes'] / 1e6:.1f} MB), last export {status['exported_at'] or 'never'} IST, "
+                       f"every {PARQUET_EXPORT_INTERVAL_S // 60}m. Pending rewrites: {status['dirty']}.")
+        with col2:
+            if st.button("Export Now", key="pq_export"):
+                appended = exporter.export()
+                st.success(", ".join(f"{t}: +{n:,}" for t, n in appended.items()))
+        if exporter.last_error:
+            st.error(f"Last background export failed: {exporter.last_error}")
+
+        now = datetime.now(IST)
+        colA, colB = st.columns(2)
+        with colA:
+            sd = st.date_input("From month", value=(now - timedelta(days=180)).date(), key="pq_sd")
+        with colB:
+            ed = st.date_input("To month", value=now.date(), key="pq_ed")
+        start_month, end_month = sd.strftime("%Y-%m"), ed.strftime("%Y-%m")
+
+        report = st.radio("Report", ["Revenue", "Item Velocity", "Memberships"], horizontal=True,
+                          key="pq_report")
+        t0 = time.perf_counter()
+        if report == "Revenue":
+            by = st.multiselect("Group by", ["month", "hood", "billing_type", "hour", "weekday"],
+                                default=["month", "hood"], key="pq_by")
+            df = report_revenue(by or ["month"], start_month, end_month)
+        elif report == "Item Velocity":
+            df = report_item_velocity(start_month, end_month)
+        else:
+            df = report_membership_sales(start_month, end_month)
+        st.caption(f"Computed in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        st.dataframe(df, width="stretch", hide_index=True)
+        st.download_button("⬇️ Download CSV", data=df.to_csv(index=False).encode("utf-8"),
+                           file_name=f"{report.lower().replace(' ', '_')}_{start_month}_{end_month}.csv",
+                           mime="text/csv", key="pq_dl")
+
+    st.markdown("---")
+    st.subheader("📬 Monthly Customer Statements")
+    runner = get_statement_runner()
+    last_month = (datetime.now(IST).replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+    colM, colW = st.columns(2)
+    with colM:
+        month = st.text_input("Month (YYYY-MM)", value=last_month, key="stmt_month").strip()
+    with colW:
+        workers = st.number_input("Worker processes", min_value=1, max_value=32, value=STATEMENT_WORKERS,
+                                  key="stmt_workers")
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", month):
+        st.warning("Enter the month as YYYY-MM.")
+        return
+    status = get_statement_status(month)
+    if runner.running():
+        done = (runner.progress or {}).get("statements", 0)
+        st.info(f"Generating {runner.month}: {done:,} statement(s) written so far.")
+        if st.button("Refresh Progress", key="stmt_refresh"):
+            st.rerun()
+    elif runner.last_error and runner.month == month:
+        st.error(f"Last run stopped: {runner.last_error} (Resume continues from the checkpoint.)")
+    if status:
+        state = "complete" if status["done"] else f"checkpointed after {status['last_customer']}"
+        st.caption(f"{month}: {status['statements']:,} statement(s), {state}, last update {status['updated_at']} IST "
+                   f"(in {os.path.join(STATEMENTS_DIR, month)}).")
+    colG, colR = st.columns(2)
+    with colG:
+        label = "Resume" if status and not status["done"] else "Generate"
+        if st.button(label, key="stmt_go", disabled=runner.running() or bool(status and status["done"])):
+            runner.start(month, workers=int(workers))
+            st.rerun()
+    with colR:
+        if st.button("Start Over", key="stmt_restart", disabled=runner.running() or not status):
+            runner.start(month, workers=int(workers), resume=False)
+            st.rerun()
+    if status and status["done"]:
+        with open(os.path.join(STATEMENTS_DIR, month, "manifest.jsonl"), "rb") as f:
+            st.download_button("⬇️ Download Manifest", data=f.read(), file_name=f"statements_{month}_manifest.jsonl",
+                               mime="application/jsonl", key="stmt_manifest")
@@ -0,0 +1,18 @@
+"""Sales page."""
+import streamlit as st
+
+from exoticbill.core.bills import get_bill_count, get_total_billing, get_total_commission_and_tax
+
+
+def render(timer):
+    st.header("💹 Sales Overview")
+    total_sales = get_total_billing()
+    bill_count = get_bill_count()
+    avg_sale = total_sales / bill_count if bill_count else 0.0
+    sum_comm, sum_tax = get_total_commission_and_tax()
+    profit = total_sales - (sum_comm + sum_tax)
+    st.metric("Total Sales", f"₹{total_sales:,.2f}")
+    st.metric("Average Sale", f"₹{avg_sale:,.2f}")
+    st.metric("Total Commission Paid", f"₹{sum_comm:,.2f}")
+    st.metric("Total Tax on Commission", f"₹{sum_tax:,.2f}")
+    st.metric("Estimated Profit", f"₹{profit:,.2f}")
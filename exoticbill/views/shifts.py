@@ -0,0 +1,106 @@
+"""Shifts page."""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from exoticbill.config import IST
+from exoticbill.core.feed import get_live_aggregates
+from exoticbill.core.shifts import get_employee_shifts
+from exoticbill.core.staff import get_all_employee_cids, get_employee_details
+
+
+def render(timer):
+    st.header("⏱️ Shifts")
+
+    # tabs: by-employee vs live
+    tab_emp, tab_live = st.tabs(["By Employee", "Live Shifts"])
+
+    # ---------- BY EMPLOYEE ----------
+    with tab_emp:
+        timer.tab("By Employee")
+        # employee selector (name + CID)
+        all_emp = get_all_employee_cids()  # [(cid, name), ...]
+        if not all_emp:
+            st.info("No employees found.")
+        else:
+            labels = [f"{name} ({cid})" for cid, name in all_emp]
+            cid_map = {f"{name} ({cid})": cid for cid, name in all_emp}
+            sel_label = st.selectbox("Select Employee", labels, key="shift_emp_picker")
+            sel_cid = cid_map[sel_label]
+
+            # date range for this employee
+            now = datetime.now(IST)
+            colA, colB = st.columns(2)
+            with colA:
+                sd = st.date_input("From", value=(now - timedelta(days=7)).date(), key="shift_emp_sd")
+            with colB:
+                ed = st.date_input("To", value=now.date(), key="shift_emp_ed")
+
+            start_str = datetime(sd.year, sd.month, sd.day, 0, 0, 0, tzinfo=IST).strftime("%Y-%m-%d %H:%M:%S")
+            end_str = datetime(ed.year, ed.month, ed.day, 23, 59, 59, tzinfo=IST).strftime("%Y-%m-%d %H:%M:%S")
+
+            # only that employee's shifts, sorted (latest first)
+            rows = get_employee_shifts(sel_cid, start_str, end_str)
+
+            df = pd.DataFrame(
+                rows,
+                columns=[
+                    "ID", "Employee CID", "Employee Name", "Start", "End",
+                    "Duration (min)", "Bills", "Revenue"
+                ]
+            )
+
+            # quick summary
+            if not df.empty:
+                total_shifts = len(df)
+                total_minutes = int(df["Duration (min)"].fillna(0).sum())
+                total_bills = int(df["Bills"].fillna(0).sum())
+                total_rev = float(df["Revenue"].fillna(0).sum())
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Shifts", f"{total_shifts}")
+                col2.metric("Minutes", f"{total_minutes:,}")
+                col3.metric("Bills", f"{total_bills:,}")
+                col4.metric("Revenue", f"₹{total_rev:,.2f}")
+
+            st.dataframe(df, width="stretch")
+
+    # ---------- LIVE SHIFTS ----------
+    with tab_live:
+        timer.tab("Live Shifts")
+        st.subheader("Active (Live) Shifts")
+        auto = st.toggle("Auto-refresh every 60s", value=False, key="shifts_live_auto")
+
+        # show all active shifts with names and elapsed time (from the change-feed aggregates)
+        live = [(sh["employee_cid"], (get_employee_details(sh["employee_cid"]) or {}).get("name") or "Unknown",
+                 sh["start_ts"], sh["bills_count"] or 0, sh["revenue"] or 0, sh["commission"] or 0)
+                for sh in get_live_aggregates().refresh()["shifts"]]
+
+        if live:
+            # compute elapsed per shift
+            data = []
+            now_ist = datetime.now(IST)
+            for cid, name, start_ts, bills, revenue, commission in live:
+                try:
+                    dt_start = datetime.strptime(start_ts, "%Y-%m-%d %H:%M:%S").replace(tzinfo=IST)
+                except Exception:
+                    dt_start = now_ist
+                elapsed_min = int((now_ist - dt_start).total_seconds() // 60)
+                data.append({
+                    "Employee Name": name,
+                    "Employee CID": cid,
+                    "Start Time": start_ts,
+                    "Elapsed (min)": elapsed_min,
+                    "Bills": bills,
+                    "Revenue": f"₹{revenue:,.2f}",
+                    "Commission": f"₹{commission:,.2f}"
+                })
+            st.metric("Live Shift Revenue", f"₹{sum(r[4] for r in live):,.2f}")
+            st.table(pd.DataFrame(data).sort_values("Elapsed (min)", ascending=False))
+        else:
+            st.info("No active shifts.")
+
+        if auto:
+            import time
+            time.sleep(60)
+            st.rerun()
@@ -0,0 +1,249 @@
+"""Tracking page."""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from exoticbill.config import COMMISSION_RATES, IST
+from exoticbill.core.bills import (
+    count_employee_bills, get_billing_summary_by_cid, get_customer_bills, get_deleted_bills,
+    get_employee_bills_page, restore_bills, soft_delete_bills
+)
+from exoticbill.core.customers import get_customer, get_recent_customers, search_customers
+from exoticbill.core.db import get_conn
+from exoticbill.core.memberships import get_all_memberships, get_past_memberships
+from exoticbill.core.snapshot import get_analytics_conn, show_snapshot_age
+from exoticbill.core.staff import (
+    get_all_employee_cids, get_all_hoods, get_employee_rank, get_employees_by_hood
+)
+from exoticbill.core.tiering import bill_rows_source, bills_source, get_history_conn
+
+
+def render(timer):
+    st.header("📊 Tracking")
+    tabs = st.tabs([
+        "Employee", "Customer", "Hood", "Membership",
+        "Employee Rankings", "Custom Filter"
+    ])
+
+    # Employee tab
+    with tabs[0]:
+        timer.tab("Employee")
+        st.subheader("Employee Billing")
+        ranks = ["All"] + list(COMMISSION_RATES.keys())
+        sel_rank = st.selectbox("Filter by Rank", ranks)
+        all_emps = get_all_employee_cids()
+        if sel_rank != "All":
+            all_emps = [(cid, name) for cid, name in all_emps if get_employee_rank(cid) == sel_rank]
+        emp_keys = [f"{n} ({c})" for c, n in all_emps]
+        if not emp_keys:
+            st.info("No employees match that rank.")
+        else:
+            sel = st.selectbox("Select Employee", emp_keys)
+            view = st.radio("View", ["Overall", "Detailed"], horizontal=True)
+            cid = dict(zip(emp_keys, [c for c, _ in all_emps]))[sel]
+            if view == "Overall":
+                summary, total = get_billing_summary_by_cid(cid)
+                for k, v in summary.items():
+                    st.metric(k, f"₹{v:.2f}")
+                st.metric("Total", f"₹{total:.2f}")
+            else:
+                total_bills = count_employee_bills(cid)
+                if total_bills:
+                    st.subheader(f"📋 Bill Entries ({total_bills:,})")
+                    colS, colZ = st.columns(2)
+                    with colS:
+                        order = st.radio("Sort by time", ["Newest first", "Oldest first"],
+                                         horizontal=True, key="emp_bills_order")
+                    with colZ:
+                        page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1,
+                                                 key="emp_bills_page_size")
+                    # keyset pagination: a stack of cursors, reset when employee/order/size change
+                    page_key = (cid, order, page_size)
+                    if st.session_state.get("emp_bills_key") != page_key:
+                        st.session_state.emp_bills_key = page_key
+                        st.session_state.emp_bills_cursors = [None]
+                    cursors = st.session_state.emp_bills_cursors
+                    bills, next_cursor = get_employee_bills_page(
+                        cid, after=cursors[-1], limit=page_size, newest_first=order == "Newest first"
+                    )
+                    df = pd.DataFrame(bills, columns=["ID", "Customer", "Type", "Details", "Amount",
+                                                      "Time", "Commission", "Tax"])
+                    st.caption(f"Page {len(cursors)} of {-(-total_bills // page_size)}")
+                    # selection is per page; a fresh key keeps it from carrying over
+                    grid_key = f"emp_bills_grid_{cid}_{len(cursors)}_{cursors[-1]}"
+                    grid = st.dataframe(df, width="stretch", hide_index=True, on_select="rerun",
+                                        selection_mode="multi-row", key=grid_key)
+                    sel_ids = [int(i) for i in df.iloc[grid.selection.rows]["ID"]] if grid.selection.rows else []
+
+                    colP, colD, colN = st.columns(3)
+                    with colP:
+                        if len(cursors) > 1 and st.button("◀ Previous", key="emp_bills_prev"):
+                            cursors.pop()
+                            st.rerun()
+                    with colD:
+                        if sel_ids and st.button(f"🗑️ Delete {len(sel_ids)} Selected", key="emp_bills_del"):
+                            n = soft_delete_bills(sel_ids, st.session_state.get("username", "?"))
+                            st.session_state.pop(grid_key, None)
+                            st.success(f"Soft-deleted {n} bill(s).")
+                            st.rerun()
+                    with colN:
+                        if next_cursor and st.button("Next ▶", key="emp_bills_next"):
+                            cursors.append(next_cursor)
+                            st.rerun()
+                else:
+                    st.info("No bills found for this employee.")
+
+                deleted = get_deleted_bills(employee_cid=cid)
+                if deleted:
+                    with st.expander(f"♻️ Deleted Bills ({len(deleted)})"):
+                        st.dataframe(pd.DataFrame(deleted, columns=[
+                            "ID", "Employee", "Customer", "Type", "Details", "Amount", "Time",
+                            "Deleted By", "Deleted At"
+                        ]), use_container_width=True)
+                        res_ids = st.multiselect("Bills to restore", [d[0] for d in deleted],
+                                                 key=f"restore_sel_{cid}")
+                        if res_ids and st.button(f"Restore {len(res_ids)} Selected", key=f"restore_btn_{cid}"):
+                            n = restore_bills(res_ids, st.session_state.get("username", "?"))
+                            st.success(f"Restored {n} bill(s).")
+                            st.rerun()
+
+    # Customer tab
+    with tabs[1]:
+        timer.tab("Customer")
+        st.subheader("Customer Billing History")
+        prefix = st.text_input("Search Customer CID", key="cust_search",
+                               placeholder="Type the start of a CID")
+        customers = search_customers(prefix) if prefix.strip() else get_recent_customers()
+        if customers:
+            cust = st.selectbox("Matching Customers" if prefix.strip() else "Recent Customers", customers)
+            info = get_customer(cust)
+            if info:
+                c1, c2, c3 = st.columns(3)
+                c1.metric("Bills", info["bill_count"])
+                c2.metric("Lifetime Spend", f"₹{info['lifetime_spend'] or 0:,.2f}")
+                c3.metric("Loyalty Points", info["loyalty_points"] or 0)
+                st.caption(f"First seen {info['first_seen'] or '—'} · Last seen {info['last_seen'] or '—'}"
+                           f" · Membership: {info['membership_tier'] or 'None'}")
+            df = pd.DataFrame(get_customer_bills(cust),
+                              columns=["Employee", "Type", "Details", "Amount", "Time", "Commission", "Tax"])
+            st.dataframe(df)
+        elif prefix.strip():
+            st.info("No customers match that prefix.")
+        else:
+            st.info("No customer billing data yet.")
+
+    # Hood tab
+    with tabs[2]:
+        timer.tab("Hood")
+        st.subheader("Hood Summary")
+        hood_names = [h[0] for h in get_all_hoods()]
+        if hood_names:
+            sel_hood = st.selectbox("Select Hood", hood_names)
+            rows = []
+            for cid, name in get_employees_by_hood(sel_hood):
+                _, tot = get_billing_summary_by_cid(cid)
+                rows.append({"CID": cid, "Name": name, "Total": tot})
+            st.table(pd.DataFrame(rows))
+        else:
+            st.info("No hoods found.")
+
+    # Membership tab
+    with tabs[3]:
+        timer.tab("Membership")
+        st.subheader("📋 Memberships")
+        view = st.radio("Show", ["Active", "Past"], horizontal=True)
+        if view == "Active":
+            rows = get_all_memberships()
+            data = []
+            for cid, tier, dop_str in rows:
+                dop = datetime.strptime(dop_str, "%Y-%m-%d %H:%M:%S").replace(tzinfo=IST)
+                expiry = dop + timedelta(days=7)
+                rem = expiry - datetime.now(IST)
+                data.append({
+                    "Customer CID": cid,
+                    "Tier": tier,
+                    "Started On": dop.strftime("%Y-%m-%d %H:%M:%S"),
+                    "Expires On": expiry.strftime("%Y-%m-%d %H:%M:%S"),
+                    "Remaining": f"{rem.days}d {rem.seconds // 3600}h"
+                })
+            st.table(pd.DataFrame(data))
+
+            st.markdown("---")
+            st.subheader("🗑️ Delete a Membership")
+            mem_options = {f"{cid} ({tier})": cid for cid, tier, _ in rows}
+            if mem_options:
+                sel_mem = st.selectbox("Select membership to delete", list(mem_options.keys()))
+                if st.button("Delete Selected Membership"):
+                    cid_to_delete = mem_options[sel_mem]
+                    conn = get_conn()
+                    conn.execute("DELETE FROM memberships WHERE customer_cid = ?", (cid_to_delete,))
+                    conn.execute("UPDATE customers SET membership_tier = NULL WHERE customer_cid = ?",
+                                 (cid_to_delete,))
+                    conn.commit()
+                    conn.close()
+                    st.success(f"Deleted membership for {cid_to_delete}.")
+                    st.rerun()
+            else:
+                st.info("No active memberships found.")
+        else:
+            hist_cid = st.text_input("Customer CID (optional)", key="past_mem_cid").strip()
+            rows = get_past_memberships(hist_cid or None)
+            data = []
+            for cid, tier, dop_str, expired_str in rows:
+                data.append({
+                    "Customer CID": cid,
+                    "Tier": tier,
+                    "Started On": dop_str,
+                    "Expired At": expired_str
+                })
+            st.table(pd.DataFrame(data))
+
+    # Employee Rankings tab
+    with tabs[4]:
+        timer.tab("Employee Rankings")
+        st.subheader("🏆 Employee Rankings")
+        metric = st.selectbox("Select ranking metric",
+                              ["Total Sales", "ITEMS", "UPGRADES", "REPAIR", "CUSTOMIZATION", "MEMBERSHIP"])
+        show_snapshot_age("rank_snap")
+        ranking = []
+        conn = get_analytics_conn(history=True)
+        # exact paise sums over the encoded rows; keys are bound values so they reach each tier's index
+        keys = dict(conn.execute("SELECT cid, id FROM cid_keys").fetchall())
+        code = conn.execute("SELECT code FROM billing_types WHERE name=?", (metric,)).fetchone()
+        for cid, name in get_all_employee_cids():
+            if metric == "Total Sales":
+                q = "SELECT SUM(amount_paise) FROM bill_rows_all WHERE employee_key=?"
+                params = (keys.get(cid),)
+            else:
+                q = "SELECT SUM(amount_paise) FROM bill_rows_all WHERE employee_key=? AND type_code=?"
+                params = (keys.get(cid), code and code[0])
+            val = (conn.execute(q, params).fetchone()[0] or 0) / 100
+            ranking.append({"Employee": f"{name} ({cid})", metric: val})
+        conn.close()
+        df_rank = pd.DataFrame(ranking).sort_values(by=metric, ascending=False)
+        st.table(df_rank.head(100))
+
+    # Custom Filter tab
+    with tabs[5]:
+        timer.tab("Custom Filter")
+        st.subheader("🔍 Custom Sales Filter")
+        days = st.number_input("Last X days", min_value=1, max_value=30, value=7)
+        min_sales = st.number_input("Min sales amount (₹)", min_value=0.0, value=0.0)
+        if st.button("Apply Filter"):
+            cutoff = datetime.now(IST) - timedelta(days=days)
+            results = []
+            source = bills_source(cutoff.strftime("%Y-%m-%d %H:%M:%S"))
+            conn = get_history_conn() if source == "bills_all" else get_conn()
+            for cid, name in get_all_employee_cids():
+                q = (f"SELECT SUM(amount_paise) FROM {bill_rows_source(source)} "
+                     "WHERE employee_key=(SELECT id FROM cid_keys WHERE cid=?) AND timestamp>=?")
+                total = (conn.execute(q, (cid, cutoff.strftime("%Y-%m-%d %H:%M:%S"))).fetchone()[0] or 0) / 100
+                if total >= min_sales:
+                    results.append({"Employee": f"{name} ({cid})",
+                                    f"Sales in last {days}d": total})
+            conn.close()
+            if results:
+                st.table(pd.DataFrame(results))
+            else:
+                st.info("No employees match that filter.")
@@ -0,0 +1,260 @@
+"""Employee billing panel (role "user")."""
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from exoticbill.config import IST, LABOR, MEMBERSHIP_DISCOUNTS, MEMBERSHIP_PRICES, PART_COST
+from exoticbill.core.bills import save_bill
+from exoticbill.core.db import get_conn
+from exoticbill.core.items import get_all_items
+from exoticbill.core.memberships import add_membership, get_membership
+from exoticbill.core.shifts import end_shift, start_shift
+
+
+def render(timer):
+    st.title("🧾 ExoticBill - Add New Bill")
+    if st.session_state.bill_saved:
+        st.success(f"Bill saved! Total: ₹{st.session_state.bill_total:.2f}")
+        st.session_state.bill_saved = False
+
+    # Try to resolve logged-in employee CID (prefill and lock)
+    def _resolve_logged_in_cid():
+        # Prefer an explicit session value if present
+        if st.session_state.get("user_cid"):
+            return st.session_state.get("user_cid")
+        # Try to lookup by full display name (set by login)
+        disp = st.session_state.get("display_name")
+        conn = get_conn()
+        try:
+            if disp:
+                row = conn.execute("SELECT cid FROM employees WHERE name = ?", (disp,)).fetchone()
+                if row:
+                    return row[0]
+            # fallback: try first name (username)
+            uname = st.session_state.get("username")
+            if uname:
+                # match name starting with first name (case-insensitive)
+                row = conn.execute("SELECT cid, name FROM employees").fetchall()
+                for cid, name in row:
+                    if name and name.strip().split()[0].lower() == uname.lower():
+                        return cid
+        finally:
+            conn.close()
+        return ""
+
+    emp_cid_locked = _resolve_logged_in_cid()
+
+    st.markdown("### ⏱️ Shift Controls")
+    with st.container():
+        cid_for_shift = st.text_input("Your CID for Shift", key="user_shift_cid")
+        colA, colB = st.columns(2)
+        with colA:
+            if st.button("▶️ Start Shift"):
+                if cid_for_shift:
+                    ok, msg = start_shift(cid_for_shift)
+                    (st.success if ok else st.warning)(msg)
+                else:
+                    st.warning("Enter your CID to start shift.")
+        with colB:
+            if st.button("⏹️ End Shift"):
+                if cid_for_shift:
+                    ok, msg = end_shift(cid_for_shift)
+                    (st.success if ok else st.warning)(msg)
+                else:
+                    st.warning("Enter your CID to end shift.")
+
+    st.markdown("---")
+    btype = st.selectbox("Select Billing Type", ["UPGRADES", "CUSTOMIZATION"])
+    rtype = st.radio("Repair Type", ["Normal Repair", "Advanced Repair"]) if btype == "REPAIR" else None
+
+
+    with st.form("bill_form", clear_on_submit=True):
+        emp_cid = st.text_input("Your CID (Employee)")
+        cust_cid = st.text_input("Customer CID")
+        total, det = 0.0, ""
+
+        if btype == "ITEMS":
+            sel = {}
+            items = get_all_items()
+            for item, price, stock in items:
+                q = st.number_input(f"{item} (₹{price}, Stock: {stock}) – Qty", min_value=0, step=1, key=f"user_items_{item}")
+                if q:
+                    # advisory only; save_bill re-checks stock atomically
+                    if q > stock:
+                        st.warning(f"Not enough stock for {item}. Available: {stock}")
+                    else:
+                        sel[item] = q
+                        total += price * q
+            det = ", ".join(f"{i}×{q}" for i, q in sel.items())
+
+
+        elif btype == "UPGRADES":
+            amt = st.number_input("Base upgrade amount (₹)", min_value=0.0, key="user_upg_amt")
+            total = amt * 1.5
+            det = f"Upgrade: ₹{amt}"
+
+        elif btype == "REPAIR":
+            if rtype == "Normal Repair":
+                b = st.number_input("Base repair charge (₹)", min_value=0.0, key="user_rep_base")
+                total = b + LABOR
+                det = f"Normal Repair: ₹{b}+₹{LABOR}"
+            else:
+                p = st.number_input("Number of parts repaired", min_value=0, step=1, key="user_rep_parts")
+                total = p * PART_COST
+                det = f"Advanced Repair: {p}×₹{PART_COST}"
+        else:
+            c_amt = st.number_input("Base customization amount (₹)", min_value=0.0, key="user_cust_amt")
+            total = c_amt * 2
+            det = f"Customization: ₹{c_amt}×2"
+
+        mem = get_membership(cust_cid)
+        if mem:
+            disc = MEMBERSHIP_DISCOUNTS.get(mem["tier"], {}).get(btype, 0)
+            if disc > 0:
+                total *= (1 - disc)
+                det += f" | {mem['tier']} discount {int(disc * 100)}%"
+
+        # ensure sel is always defined for later stock deduction / display logic
+        sel_items = sel if "sel" in locals() else {}
+
+        if st.form_submit_button("💾 Save Bill"):
+            if not emp_cid or not cust_cid or total == 0:
+                st.warning("Fill all fields.")
+            else:
+                ok, msg = save_bill(emp_cid, cust_cid, btype, det, total, items=sel_items)
+                if not ok:
+                    st.error(msg)
+                else:
+                    st.session_state.bill_saved = True
+                    st.session_state.bill_total = total
+                    # persist last saved bill to show below the button
+                    st.session_state.last_bill = {
+                        "employee_cid": emp_cid,
+                        "customer_cid": cust_cid,
+                        "billing_type": btype,
+                        "details": det,
+                        "amount": total,
+                    }
+
+                    # rerun to refresh UI; last_bill is stored in session_state so will be shown after rerun
+                    st.rerun()
+
+    # Show last saved bill if available (kept outside the submit branch so it always renders)
+    if "last_bill" in st.session_state:
+        lb = st.session_state.last_bill
+        st.markdown(
+            f"""
+            <div style="
+            display:flex;
+            align-items:center;
+            border-left:3px solid #28a745;
+            padding:10px;
+            border-radius:8px;
+            background:rgba(255,255,255,0.0);
+            backdrop-filter: blur(6px);
+            -webkit-backdrop-filter: blur(6px);
+            margin-top:8px;
+            ">
+            <div style="flex:1">
+                <div style="font-weight:700;font-size:16px;margin-bottom:4px">
+                Saved bill — ₹{lb['amount']:.2f}
+                </div>
+                <div style="color:#FFFFFF;font-size:13px;margin-bottom:6px">
+                Type: <strong>{lb['billing_type']}</strong> &nbsp;•&nbsp; Details: {lb['details']}
+                </div>
+                <div style="color:#666;font-size:12px">
+                Seller CID: <code style="background:rgb(239 239 239 / 10%);padding:2px 6px;border-radius:4px">{lb['employee_cid']}</code>
+                &nbsp;•&nbsp;
+                Customer CID: <code style="background:rgb(239 239 239 / 10%);padding:2px 6px;border-radius:4px">{lb['customer_cid']}</code>
+                </div>
+            </div>
+            </div>
+            """,
+            unsafe_allow_html=True,
+            )
+
+
+
+    # MEMBERSHIP FORM (user only)
+    st.markdown("---")
+    st.subheader("🎟️ Manage Membership")
+    with st.form("mem_form_user", clear_on_submit=True):
+        m_cust = st.text_input("Customer CID", key="mem_cust")
+        m_tier = st.selectbox("Tier", ["Tier1", "Tier2", "Tier3", "Racer"], key="mem_tier")
+        # seller CID should be the logged-in employee and not editable if resolved
+        if emp_cid_locked:
+            st.text_input("Your CID (Seller)", value=emp_cid_locked, disabled=True, key="mem_seller_locked")
+            seller_cid = emp_cid_locked
+        else:
+            seller_cid = st.text_input("Your CID (Seller)", key="mem_seller")
+
+        submitted = st.form_submit_button("Add/Update Membership")
+        if submitted:
+            if m_cust and seller_cid and m_tier:
+                add_membership(m_cust, m_tier)
+                if m_tier in MEMBERSHIP_PRICES:
+                    sale_amt = MEMBERSHIP_PRICES[m_tier]
+                    save_bill(seller_cid, m_cust, "MEMBERSHIP", f"{m_tier} Membership", sale_amt)
+                    st.success(f"{m_tier} membership updated and billed (₹{sale_amt})")
+                elif m_tier == "Racer":
+                    st.success("Racer membership updated (no billing).")
+                else:
+                    st.warning("Unknown tier.")
+            else:
+                st.warning("Fill all fields correctly.")
+
+    # MEMBERSHIP CHECKER
+    st.subheader("🔍 Check Membership")
+    lookup = st.text_input("Customer CID to check", key="mem_lookup")
+    if st.button("Check Membership"):
+        mem = get_membership(lookup)
+        if mem:
+            dop = datetime.strptime(mem["dop"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=IST)
+            expiry = dop + timedelta(days=7)
+            rem = expiry - datetime.now(IST)
+            st.info(f"{lookup}: {mem['tier']}, expires in {rem.days}d {rem.seconds // 3600}h on {expiry.strftime('%Y-%m-%d %H:%M:%S')} IST")
+        else:
+            st.info(f"No active membership for {lookup}")
+
+    # MONTHLY SHIFT LOGS & TOTAL WORKING HOURS
+    # st.markdown("---")
+    # st.subheader("🗓️ This Month — Shift Summary")
+    # if emp_cid_locked:
+    #     now = datetime.now(IST)
+    #     month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    #     conn = get_conn()
+    #     try:
+    #         rows = conn.execute("""
+    #             SELECT id, employee_cid, start_ts, end_ts, COALESCE(duration_minutes,0), COALESCE(bills_count,0), COALESCE(revenue,0.0)
+    #             FROM shifts
+    #             WHERE employee_cid = ?
+    #               AND start_ts >= ?
+    #             ORDER BY COALESCE(end_ts, start_ts) DESC
+    #         """, (emp_cid_locked, month_start.strftime("%Y-%m-%d %H:%M:%S"))).fetchall()
+    #     finally:
+    #         conn.close()
+
+    #     total_minutes = sum((r[4] or 0) for r in rows)
+    #     total_hours = total_minutes / 60.0
+    #     # display name if available
+    #     display_name = st.session_state.get("display_name") or ""
+    #     st.metric("Employee", f"{display_name} ({emp_cid_locked})")
+    #     hours, minutes = divmod(int(total_minutes), 60)
+    #     st.metric("Total Working Hours (this month)", f"{hours}hr {minutes} min")
+
+    #     if rows:
+    #         table_rows = []
+    #         for sid, cid, start_ts, end_ts, mins, bills, revenue in rows:
+    #             table_rows.append({
+    #                 "Shift ID": sid,
+    #                 "Start": start_ts,
+    #                 "End": end_ts or "ONGOING",
+    #                 "Duration (min)": mins,
+    #                 "Bills": bills,
+    #                 "Revenue": f"₹{revenue:.2f}"
+    #             })
+    #         st.dataframe(pd.DataFrame(table_rows), width="stretch")
+    #     else:
+    #         st.info("No shifts recorded for this month.")
+    # else:
+    #     st.info("Could not determine your CID automatically. Start a shift or contact admin to link your account.")